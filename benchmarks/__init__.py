@@ -0,0 +1 @@
+# Benchmarks de la capa de datos. Se ejecutan sobre bases temporales, nunca sobre barberia.db.
@@ -0,0 +1,82 @@
+"""Compara COMMITs (fsync) y tiempo por cobro con y sin unidad de trabajo.
+
+Uso: python -m benchmarks.bench_checkout --n 200
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from src import repositories
+from src.database import db
+from src.services.payment_service import payment_service
+
+
+def _crear_citas(n: int) -> list:
+    inicio = datetime(2025, 1, 6, 9, 30)
+    ids = []
+    with db.transaction():
+        for i in range(n):
+            start = inicio + timedelta(days=i // 40, minutes=15 * (i % 40))
+            ids.append(
+                repositories.create_appointment(1, 1, None, start, start + timedelta(minutes=15), "RESERVADA", None)
+            )
+    return ids
+
+
+def _cobro_sin_transaccion(appointment_id: int) -> None:
+    # Comportamiento anterior: cada repositorio confirma por su cuenta
+    servicio = repositories.list_services()[0]
+    line = (appointment_id, servicio["id"], 1, servicio["price"], servicio["barber_earning"], servicio["shop_liquidation"])
+    repositories.create_payment(
+        appointment_id, servicio["price"], servicio["barber_earning"], servicio["shop_liquidation"],
+        "Efectivo", datetime.now(), [line],
+    )
+    repositories.update_appointment_status(appointment_id, "ATENDIDA")
+
+
+def _medir(nombre: str, ids: list, fn) -> dict:
+    commits = db.commit_count
+    t0 = time.perf_counter()
+    for cid in ids:
+        fn(cid)
+    elapsed = time.perf_counter() - t0
+    return {
+        "modo": nombre,
+        "cobros": len(ids),
+        "commits_por_cobro": (db.commit_count - commits) / len(ids),
+        "ms_por_cobro": elapsed * 1000 / len(ids),
+    }
+
+
+def run(n: int) -> list:
+    with tempfile.TemporaryDirectory() as tmp:
+        db.close()
+        db.db_path = Path(tmp) / "bench.db"
+        db.init_db()
+        ids = _crear_citas(n * 2)
+        servicio_id = repositories.list_services()[0]["id"]
+        resultados = [
+            _medir("por_repositorio", ids[:n], _cobro_sin_transaccion),
+            _medir(
+                "unidad_de_trabajo",
+                ids[n:],
+                lambda cid: payment_service.cobrar(cid, [{"service_id": servicio_id, "qty": 1}], "Efectivo"),
+            ),
+        ]
+        db.close()
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=200, help="cobros por modo")
+    args = parser.parse_args()
+    print(json.dumps(run(args.n), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Mide la búsqueda de clientes (autocompletado) sobre una base con muchos clientes.
+
+Uso: python -m benchmarks.bench_clients --clientes 50000 --consultas 500
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from src import repositories
+from src.database import db
+
+NOMBRES = ["Juan", "Andrés", "Camilo", "Santiago", "Mateo", "Sebastián", "Felipe", "Julián", "Daniel", "Alejandro",
+           "Carlos", "Luis", "Miguel", "David", "Esteban", "Nicolás", "Samuel", "Tomás", "Óscar", "Jorge"]
+APELLIDOS = ["Gómez", "Rodríguez", "Martínez", "López", "García", "Hernández", "Ramírez", "Pérez", "Torres", "Díaz",
+             "Restrepo", "Giraldo", "Álvarez", "Muñoz", "Rojas", "Vargas", "Castaño", "Osorio", "Zapata", "Bedoya"]
+
+
+def _poblar(n: int, rnd: random.Random) -> None:
+    filas = []
+    for _ in range(n):
+        telefono = f"3{rnd.randrange(10**9):09d}"
+        nombre = f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}"
+        filas.append((nombre, f"{telefono[:3]} {telefono[3:]}", telefono))
+    with db.transaction():
+        db.conn.executemany("INSERT INTO clients(name, phone, phone_key) VALUES(?,?,?);", filas)
+
+
+def _medir(textos: list) -> dict:
+    tiempos = []
+    for texto in textos:
+        t0 = time.perf_counter()
+        repositories.search_clients(texto)
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    tiempos.sort()
+    return {"ms_mediana": round(tiempos[len(tiempos) // 2], 3), "ms_p95": round(tiempos[int(len(tiempos) * 0.95)], 3)}
+
+
+def run(n_clientes: int, n_consultas: int) -> dict:
+    rnd = random.Random(11)
+    with tempfile.TemporaryDirectory() as tmp:
+        db.close()
+        db.db_path = Path(tmp) / "bench.db"
+        db.init_db()
+        _poblar(n_clientes, rnd)
+        db.conn.execute("ANALYZE;")
+        nombres = [rnd.choice(NOMBRES)[: rnd.randint(2, 5)] for _ in range(n_consultas)]
+        completos = [f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)[:3]}" for _ in range(n_consultas)]
+        telefonos = [f"3{rnd.randrange(10**4):04d}" for _ in range(n_consultas)]
+        resultado = {
+            "clientes": n_clientes,
+            "prefijo_nombre": _medir(nombres),
+            "nombre_y_apellido": _medir(completos),
+            "prefijo_telefono": _medir(telefonos),
+        }
+        db.close()
+    return resultado
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clientes", type=int, default=50000)
+    parser.add_argument("--consultas", type=int, default=500)
+    args = parser.parse_args()
+    print(json.dumps(run(args.clientes, args.consultas), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Mide la validación de choques de horario a medida que crece el histórico de citas.
+
+Uso: python -m benchmarks.bench_overlap --anios 1 3 6 --consultas 2000
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from src import repositories
+from src.database import db
+from src.utils import to_iso
+
+CITAS_POR_DIA = 30
+INICIO = datetime(2020, 1, 1, 9, 30)
+
+# Consulta anterior: recorre todo el histórico del barbero
+OVERLAP_SIN_ACOTAR = """
+    SELECT 1 FROM appointments
+    WHERE barber_id=?
+    AND status IN ('RESERVADA', 'ATENDIDA')
+    AND NOT(end_dt <= ? OR start_dt >= ?)
+"""
+
+
+def _poblar(desde_dia: int, hasta_dia: int) -> None:
+    filas = []
+    for dia in range(desde_dia, hasta_dia):
+        base = INICIO + timedelta(days=dia)
+        for i in range(CITAS_POR_DIA):
+            start = base + timedelta(minutes=15 * (i // 3))
+            filas.append((1 + i % 3, 1, to_iso(start), to_iso(start + timedelta(minutes=15)), "ATENDIDA", to_iso(start)))
+    with db.transaction():
+        db.conn.executemany(
+            "INSERT INTO appointments(barber_id, primary_service_id, start_dt, end_dt, status, created_at) VALUES(?,?,?,?,?,?);",
+            filas,
+        )
+
+
+def _sin_acotar(barber_id: int, start_dt: datetime, end_dt: datetime) -> bool:
+    return db.conn.execute(OVERLAP_SIN_ACOTAR, (barber_id, to_iso(start_dt), to_iso(end_dt))).fetchone() is not None
+
+
+def _medir(fn, consultas: list) -> float:
+    t0 = time.perf_counter()
+    for args in consultas:
+        fn(*args)
+    return (time.perf_counter() - t0) * 1e6 / len(consultas)
+
+
+def run(anios: list, n_consultas: int) -> list:
+    resultados = []
+    rnd = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        db.close()
+        db.db_path = Path(tmp) / "bench.db"
+        db.init_db()
+        dias = 0
+        for total_anios in sorted(anios):
+            objetivo = int(total_anios * 365)
+            _poblar(dias, objetivo)
+            dias = objetivo
+            db.conn.execute("ANALYZE;")
+            consultas = []
+            for _ in range(n_consultas):
+                start = INICIO + timedelta(days=rnd.randrange(dias), minutes=15 * rnd.randrange(40))
+                consultas.append((1 + rnd.randrange(3), start, start + timedelta(minutes=40)))
+            resultados.append(
+                {
+                    "anios": total_anios,
+                    "citas": dias * CITAS_POR_DIA,
+                    "us_sin_acotar": round(_medir(_sin_acotar, consultas), 1),
+                    "us_acotado_al_dia": round(_medir(repositories.has_overlap, consultas), 1),
+                }
+            )
+        db.close()
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--anios", type=float, nargs="+", default=[1, 3, 6], help="tamaños de histórico a medir")
+    parser.add_argument("--consultas", type=int, default=2000, help="validaciones por tamaño")
+    args = parser.parse_args()
+    print(json.dumps(run(args.anios, args.consultas), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
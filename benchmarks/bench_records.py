@@ -0,0 +1,92 @@
+"""Compara dict por fila contra los registros de src.models al leer rangos grandes.
+
+Uso: python -m benchmarks.bench_records --anios 10 --barberos 6
+
+Para cada listado mide el tiempo de construcción (mejor de varias corridas) y la
+memoria que retiene la lista resultante, con la misma consulta en ambos casos.
+"""
+
+import argparse
+import json
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.datagen import generar
+from src.database import db
+from src.models import AgendaItem, Appointment, Payment, ServiceLine
+
+CASOS = [
+    ("appointments", Appointment, "SELECT {columnas} FROM appointments ORDER BY start_dt"),
+    ("v_agenda", AgendaItem, "SELECT {columnas} FROM v_agenda ORDER BY start_dt"),
+    ("payments", Payment, "SELECT {columnas} FROM payments ORDER BY paid_at"),
+    ("appointment_service_lines", ServiceLine, "SELECT {columnas} FROM appointment_service_lines ORDER BY id"),
+]
+
+
+def _como_dicts(sql: str) -> list:
+    cur = db.conn.cursor()
+    cur.row_factory = sqlite3.Row
+    cur.execute(sql)
+    return [dict(r) for r in cur.fetchall()]
+
+
+def _como_registros(sql: str, modelo) -> list:
+    cur = db.conn.cursor()
+    cur.row_factory = modelo.fila
+    cur.execute(sql)
+    return cur.fetchall()
+
+
+def _medir(construir, repeticiones: int) -> dict:
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        construir()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    tracemalloc.start()
+    filas = construir()
+    retenido, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "filas": len(filas),
+        "ms_mejor": round(min(tiempos), 1),
+        "mb_retenidos": round(retenido / 1e6, 2),
+        "mb_pico": round(pico / 1e6, 2),
+        "bytes_por_fila": round(retenido / max(1, len(filas))),
+    }
+
+
+def run(anios: float, barberos: int, citas_por_dia: int, repeticiones: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        datos = generar(Path(tmp) / "bench.db", anios, barberos, 5000, citas_por_dia)
+        resultado = {"datos": datos, "casos": []}
+        for nombre, modelo, plantilla in CASOS:
+            sql = plantilla.format(columnas=modelo.columnas())
+            dicts = _medir(lambda: _como_dicts(sql), repeticiones)
+            registros = _medir(lambda: _como_registros(sql, modelo), repeticiones)
+            resultado["casos"].append({
+                "consulta": nombre,
+                "dict": dicts,
+                "registro": registros,
+                "tiempo_relativo": round(registros["ms_mejor"] / dicts["ms_mejor"], 2),
+                "memoria_relativa": round(registros["mb_retenidos"] / dicts["mb_retenidos"], 2),
+            })
+        db.close()
+    return resultado
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--anios", type=float, default=10)
+    parser.add_argument("--barberos", type=int, default=6)
+    parser.add_argument("--citas-por-dia", type=int, default=10, help="promedio por barbero")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run(args.anios, args.barberos, args.citas_por_dia, args.repeticiones), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
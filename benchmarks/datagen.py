@@ -0,0 +1,179 @@
+"""Genera una base sintética con varios años de operación de la barbería.
+
+Uso: python -m benchmarks.datagen --db /tmp/barberia_grande.db --anios 3 --clientes 20000
+
+Crea barberos, clientes, descansos, citas con mezcla de estados y cobros con líneas de
+servicio; los días pasados quedan atendidos, cancelados o como no asistió y las dos
+semanas siguientes como reservas. Al final recalcula daily_totals.
+"""
+
+import argparse
+import json
+import random
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Optional
+
+from src import config, repositories
+from src.catalog import catalog
+from src.database import db
+from src.utils import normalize_phone, to_iso
+
+NOMBRES = ["Juan", "Andrés", "Camilo", "Santiago", "Mateo", "Sebastián", "Felipe", "Julián", "Daniel", "Alejandro",
+           "Carlos", "Luis", "Miguel", "David", "Esteban", "Nicolás", "Samuel", "Tomás", "Óscar", "Jorge"]
+APELLIDOS = ["Gómez", "Rodríguez", "Martínez", "López", "García", "Hernández", "Ramírez", "Pérez", "Torres", "Díaz",
+             "Restrepo", "Giraldo", "Álvarez", "Muñoz", "Rojas", "Vargas", "Castaño", "Osorio", "Zapata", "Bedoya"]
+DIAS_FUTUROS = 14
+# Estado de las citas pasadas: (estado, probabilidad acumulada)
+ESTADOS_PASADOS = [("ATENDIDA", 0.82), ("CANCELADA", 0.91), ("NO ASISTIÓ", 0.97), ("RESERVADA", 1.0)]
+
+
+def _estado_pasado(rnd: random.Random) -> str:
+    r = rnd.random()
+    for estado, limite in ESTADOS_PASADOS:
+        if r < limite:
+            return estado
+    return "ATENDIDA"
+
+
+def _crear_barberos(n: int) -> list:
+    existentes = [b["id"] for b in repositories.list_barbers()]
+    with db.transaction():
+        for i in range(len(existentes), n):
+            existentes.append(repositories.create_barber(f"Barbero {i + 1}"))
+    return existentes[:n]
+
+
+def _crear_clientes(n: int, rnd: random.Random) -> list:
+    filas = []
+    for _ in range(n):
+        telefono = f"3{rnd.randrange(10**9):09d}" if rnd.random() < 0.85 else None
+        nombre = f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}"
+        filas.append((nombre, telefono, normalize_phone(telefono)))
+    with db.transaction():
+        db.conn.executemany("INSERT INTO clients(name, phone, phone_key) VALUES(?,?,?);", filas)
+    return [r[0] for r in db.conn.execute("SELECT id FROM clients;").fetchall()]
+
+
+def generar(
+    db_path: Path,
+    anios: float = 2,
+    barberos: int = 3,
+    clientes: int = 5000,
+    citas_por_dia: int = 10,
+    semilla: int = 1,
+    hasta: Optional[date] = None,
+) -> dict:
+    """Llena db_path (se crea si no existe) y deja el singleton `db` apuntando a esa base."""
+    rnd = random.Random(semilla)
+    hasta = hasta or date.today()
+    desde = hasta - timedelta(days=int(anios * 365))
+    db.close()
+    db.db_path = Path(db_path)
+    db.init_db()
+    catalog.invalidate()
+
+    barber_ids = _crear_barberos(barberos)
+    client_ids = _crear_clientes(clientes, rnd)
+    servicios = [s for s in repositories.list_services() if s["active"]]
+    apertura = time(*config.HORARIO_APERTURA)
+    cierre = time(*config.HORARIO_CIERRE)
+
+    descansos = set()
+    for b_id in barber_ids:
+        dia = desde
+        while dia <= hasta + timedelta(days=DIAS_FUTUROS):
+            dia += timedelta(days=rnd.randint(20, 40))
+            descansos.add((b_id, dia.isoformat()))
+
+    citas = pagos = lineas = 0
+    with db.transaction():
+        cur = db.conn.cursor()
+        cur.executemany(
+            "INSERT OR IGNORE INTO barber_days_off(barber_id, off_date, note) VALUES(?,?,'Sintético');",
+            sorted(descansos),
+        )
+        dia = desde
+        while dia <= hasta + timedelta(days=DIAS_FUTUROS):
+            if dia.weekday() == 6:
+                dia += timedelta(days=1)
+                continue
+            for b_id in barber_ids:
+                if (b_id, dia.isoformat()) in descansos:
+                    continue
+                inicio = datetime.combine(dia, apertura)
+                fin_jornada = datetime.combine(dia, cierre)
+                for _ in range(max(0, int(rnd.gauss(citas_por_dia, 2)))):
+                    inicio += timedelta(minutes=config.INTERVALO_MINUTOS * rnd.randint(0, 2))
+                    servicio = rnd.choice(servicios)
+                    fin = inicio + timedelta(minutes=servicio["duration_min"])
+                    if fin > fin_jornada:
+                        break
+                    estado = _estado_pasado(rnd) if dia < hasta else "RESERVADA"
+                    cur.execute(
+                        """
+                        INSERT INTO appointments(barber_id, primary_service_id, client_id, start_dt, end_dt, status, notes, created_at)
+                        VALUES(?,?,?,?,?,?,NULL,?);
+                        """,
+                        (b_id, servicio["id"], rnd.choice(client_ids), to_iso(inicio), to_iso(fin), estado,
+                         to_iso(inicio - timedelta(days=rnd.randint(0, 10)))),
+                    )
+                    citas += 1
+                    if estado == "ATENDIDA":
+                        appointment_id = cur.lastrowid
+                        detalle = [(servicio, 1)] + [(rnd.choice(servicios), rnd.randint(1, 2)) for _ in range(rnd.randint(0, 2))]
+                        cur.executemany(
+                            """
+                            INSERT INTO appointment_service_lines(appointment_id, service_id, qty, unit_price_snapshot, barber_earning_snapshot, shop_liquidation_snapshot)
+                            VALUES(?,?,?,?,?,?);
+                            """,
+                            [(appointment_id, s["id"], q, s["price"], s["barber_earning"], s["shop_liquidation"]) for s, q in detalle],
+                        )
+                        cur.execute(
+                            """
+                            INSERT INTO payments(appointment_id, total_amount, barber_total, shop_total, payment_method, paid_at)
+                            VALUES(?,?,?,?,?,?);
+                            """,
+                            (
+                                appointment_id,
+                                sum(s["price"] * q for s, q in detalle),
+                                sum(s["barber_earning"] * q for s, q in detalle),
+                                sum(s["shop_liquidation"] * q for s, q in detalle),
+                                rnd.choice(config.METODOS_PAGO),
+                                to_iso(fin + timedelta(minutes=rnd.randint(0, 10))),
+                            ),
+                        )
+                        pagos += 1
+                        lineas += len(detalle)
+                    inicio = fin
+            dia += timedelta(days=1)
+    repositories.rebuild_daily_totals()
+    db.conn.execute("ANALYZE;")
+    return {
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "barberos": len(barber_ids),
+        "clientes": len(client_ids),
+        "descansos": len(descansos),
+        "citas": citas,
+        "pagos": pagos,
+        "lineas_servicio": lineas,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", type=Path, required=True, help="base a crear o ampliar")
+    parser.add_argument("--anios", type=float, default=2)
+    parser.add_argument("--barberos", type=int, default=3)
+    parser.add_argument("--clientes", type=int, default=5000)
+    parser.add_argument("--citas-por-dia", type=int, default=10, help="promedio por barbero")
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args()
+    resumen = generar(args.db, args.anios, args.barberos, args.clientes, args.citas_por_dia, args.semilla)
+    db.close()
+    print(json.dumps(resumen, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
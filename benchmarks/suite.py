@@ -0,0 +1,187 @@
+"""Suite de benchmarks de la capa de datos sobre una base sintética (ver datagen).
+
+Uso: python -m benchmarks.suite --anios 3 --salida resultados.json
+
+Cada caso reporta mediana, p95 y total en milisegundos; el JSON incluye la escala de
+los datos y las versiones de Python/SQLite para comparar corridas.
+"""
+
+import argparse
+import importlib.util
+import json
+import platform
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from benchmarks.datagen import generar
+from src import config, repositories
+from src.database import db
+from src.services.agenda_service import agenda_service
+from src.services.payment_service import payment_service
+from src.services.report_service import ReportService
+
+
+def _caso(nombre: str, fn: Callable[[int], None], repeticiones: int) -> dict:
+    tiempos = []
+    commits = db.commit_count
+    for i in range(repeticiones):
+        t0 = time.perf_counter()
+        fn(i)
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    ordenados = sorted(tiempos)
+    return {
+        "caso": nombre,
+        "repeticiones": repeticiones,
+        "ms_mediana": round(ordenados[len(ordenados) // 2], 3),
+        "ms_p95": round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))], 3),
+        "ms_total": round(sum(tiempos), 1),
+        "commits_por_operacion": round((db.commit_count - commits) / repeticiones, 2),
+    }
+
+
+def _dias(desde: date, hasta: date, n: int, rnd: random.Random) -> List[date]:
+    total = (hasta - desde).days
+    return [desde + timedelta(days=rnd.randrange(total)) for _ in range(n)]
+
+
+def _huecos_libres(n: int, rnd: random.Random) -> list:
+    """(barbero, servicio, inicio) libres en días futuros, sin repetir choques entre sí."""
+    servicio_id = repositories.list_services()[0]["id"]
+    huecos = []
+    dia = date.today() + timedelta(days=30)
+    while len(huecos) < n:
+        for barber_id, inicios in agenda_service.horarios_disponibles(dia, servicio_id).items():
+            # Uno de cada tres inicios para que las citas de 40 min no se pisen
+            huecos.extend((barber_id, servicio_id, inicio) for inicio in inicios[::3])
+        dia += timedelta(days=1)
+    rnd.shuffle(huecos)
+    return huecos[:n]
+
+
+def run(
+    anios: float,
+    clientes: int,
+    citas_por_dia: int,
+    repeticiones: int,
+    semilla: int = 1,
+    db_path: Optional[Path] = None,
+) -> dict:
+    rnd = random.Random(semilla)
+    with tempfile.TemporaryDirectory() as tmp:
+        datos = generar(db_path or Path(tmp) / "bench.db", anios, 3, clientes, citas_por_dia, semilla)
+        desde, hasta = date.fromisoformat(datos["desde"]), date.fromisoformat(datos["hasta"])
+        barberos = [b["id"] for b in repositories.list_barbers()]
+        casos = []
+
+        dias = _dias(desde, hasta, repeticiones, rnd)
+        casos.append(_caso(
+            "repositories.list_appointments_by_range (día)",
+            lambda i: repositories.list_appointments_by_range(
+                datetime.combine(dias[i], dtime.min), datetime.combine(dias[i], dtime.max)
+            ),
+            repeticiones,
+        ))
+        casos.append(_caso(
+            "repositories.list_agenda_by_range (semana)",
+            lambda i: repositories.list_agenda_by_range(
+                datetime.combine(dias[i], dtime.min), datetime.combine(dias[i] + timedelta(days=7), dtime.min)
+            ),
+            repeticiones,
+        ))
+        casos.append(_caso(
+            "repositories.list_payments_by_range (mes)",
+            lambda i: repositories.list_payments_by_range(
+                datetime.combine(dias[i], dtime.min), datetime.combine(dias[i] + timedelta(days=30), dtime.min)
+            ),
+            repeticiones,
+        ))
+        inicios = [datetime.combine(d, datetime.min.time()) + timedelta(hours=9, minutes=30 + 15 * rnd.randrange(38)) for d in dias]
+        casos.append(_caso(
+            "repositories.has_overlap",
+            lambda i: repositories.has_overlap(rnd.choice(barberos), inicios[i], inicios[i] + timedelta(minutes=40)),
+            repeticiones,
+        ))
+        textos = [rnd.choice(["Ju", "Cam", "Mateo Gó", "Sebas", "300", "31"]) for _ in range(repeticiones)]
+        casos.append(_caso("repositories.search_clients", lambda i: repositories.search_clients(textos[i]), repeticiones))
+        casos.append(_caso(
+            "AgendaService.horarios_disponibles (todos los barberos)",
+            lambda i: agenda_service.horarios_disponibles(dias[i], 1),
+            repeticiones,
+        ))
+
+        huecos = _huecos_libres(repeticiones, rnd)
+        creadas = []
+        casos.append(_caso(
+            "AgendaService.crear_cita",
+            lambda i: creadas.append(agenda_service.crear_cita(huecos[i][0], "Cliente Benchmark", "3000000000", huecos[i][1], huecos[i][2])),
+            repeticiones,
+        ))
+        casos.append(_caso(
+            "PaymentService.cobrar",
+            lambda i: payment_service.cobrar(creadas[i], [{"service_id": 1, "qty": 1}, {"service_id": 4, "qty": 1}], "Efectivo"),
+            repeticiones,
+        ))
+
+        servicio = ReportService(cache=None)
+        meses = [datetime.combine(d, datetime.min.time()) for d in _dias(desde, hasta - timedelta(days=31), repeticiones, rnd)]
+        casos.append(_caso(
+            "ReportService.resumen (mes)",
+            lambda i: servicio.resumen(meses[i], meses[i] + timedelta(days=30, hours=23, minutes=59)),
+            repeticiones,
+        ))
+        anio = max(datetime.combine(desde, datetime.min.time()), datetime.combine(hasta, datetime.min.time()) - timedelta(days=365))
+        casos.append(_caso(
+            "ReportService.resumen (año, sin detalle)",
+            lambda i: servicio.resumen(anio, anio + timedelta(days=365), incluir_detalle=False),
+            max(1, repeticiones // 10),
+        ))
+
+        if importlib.util.find_spec("reportlab") is None:
+            casos.append({"caso": "ReportService.exportar_pdf_detallado (mes)", "omitido": "reportlab no está instalado"})
+        else:
+            destino = Path(tmp) / "reporte.pdf"
+            casos.append(_caso(
+                "ReportService.exportar_pdf_detallado (mes)",
+                lambda i: servicio.exportar_pdf_detallado(destino, meses[i], meses[i] + timedelta(days=30)),
+                max(1, repeticiones // 20),
+            ))
+        db.close()
+
+    return {
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform(),
+            "semilla": semilla,
+            "horario": [config.HORARIO_APERTURA, config.HORARIO_CIERRE],
+        },
+        "datos": datos,
+        "casos": casos,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--anios", type=float, default=3)
+    parser.add_argument("--clientes", type=int, default=20000)
+    parser.add_argument("--citas-por-dia", type=int, default=10, help="promedio por barbero")
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--db", type=Path, help="conservar la base generada en esta ruta")
+    parser.add_argument("--salida", type=Path, help="escribir el JSON en este archivo además de imprimirlo")
+    args = parser.parse_args()
+    resultado = run(args.anios, args.clientes, args.citas_por_dia, args.repeticiones, args.semilla, args.db)
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.salida:
+        args.salida.write_text(texto, encoding="utf-8")
+    print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Línea de comandos sin interfaz gráfica: resúmenes, PDF, CSV, exportaciones y backups.
+
+Uso:
+    python -m src resumen --rango ayer [--json]
+    python -m src pdf --desde 2025-01-01 --hasta 2025-01-31 --salida enero.pdf
+    python -m src csv --rango mes --salida cobros.csv
+    python -m src exportar cobros --formato jsonl --incremental --salida cobros.jsonl
+    python -m src backup [--destino carpeta]
+    python -m src archivar [--meses 12 | --antes-de 2025-01-01]
+
+No importa PySide6, así que puede ejecutarse desde el programador de tareas.
+"""
+
+import argparse
+import csv
+import json
+import sys
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from . import config
+from .database import db
+
+RANGOS = ["hoy", "ayer", "semana", "mes", "mes-anterior"]
+COLUMNAS_CSV = ["appointment_id", "fecha", "hora", "barber", "metodo_pago", "total", "servicios"]
+
+
+def _rango(args: argparse.Namespace) -> Tuple[datetime, datetime]:
+    hoy = date.today()
+    if args.desde or args.hasta:
+        inicio = date.fromisoformat(args.desde) if args.desde else hoy
+        fin = date.fromisoformat(args.hasta) if args.hasta else inicio
+    elif args.rango == "ayer":
+        inicio = fin = hoy - timedelta(days=1)
+    elif args.rango == "semana":
+        inicio = hoy - timedelta(days=hoy.weekday())
+        fin = inicio + timedelta(days=6)
+    elif args.rango == "mes":
+        inicio = hoy.replace(day=1)
+        fin = (inicio + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    elif args.rango == "mes-anterior":
+        fin = hoy.replace(day=1) - timedelta(days=1)
+        inicio = fin.replace(day=1)
+    else:
+        inicio = fin = hoy
+    if fin < inicio:
+        raise ValueError("La fecha final debe ser igual o posterior a la inicial")
+    return datetime.combine(inicio, time.min), datetime.combine(fin, time.max)
+
+
+def _barbero(valor: Optional[str]) -> Optional[int]:
+    if not valor:
+        return None
+    from .catalog import catalog
+
+    if valor.isdigit() and catalog.barber(int(valor)):
+        return int(valor)
+    for barbero in catalog.barbers():
+        if barbero["name"].lower() == valor.lower():
+            return barbero["id"]
+    raise ValueError(f"Barbero no encontrado: {valor}")
+
+
+def _carpeta_backups(db_path: Path) -> Path:
+    """Carpeta de backups junto a la base elegida con --db (la de config para la base por defecto)."""
+    return db_path.resolve().parent / config.BACKUP_DIR.name
+
+
+def _abrir_base(db_path: Path, apertura: Optional[str]) -> None:
+    """Apunta `db` a la base elegida.
+
+    "lectura" no migra y falla si la base tiene migraciones pendientes; "migrar" respalda
+    la base y aplica las migraciones como al iniciar la aplicación; None solo comprueba
+    que el archivo exista.
+    """
+    if not db_path.exists():
+        raise ValueError(f"No existe la base de datos: {db_path}")
+    config.DB_PATH = db_path
+    db.close()
+    db.db_path = db_path
+    if apertura == "lectura":
+        pendientes = db.pending_migrations()
+        if pendientes:
+            raise ValueError(
+                f"La base está en la versión {db.schema_version()} y le faltan migraciones ({', '.join(map(str, pendientes))}); "
+                "ábrala con la aplicación o ejecute archivar para actualizarla"
+            )
+    elif apertura == "migrar":
+        from .services.backup_service import backup_before_migrations
+
+        backup_before_migrations(db, _carpeta_backups(db_path))
+        db.init_db()
+
+
+def cmd_resumen(args: argparse.Namespace) -> None:
+    from .services.report_service import formatear_servicios, report_service
+    from .utils import format_currency
+
+    inicio, fin = _rango(args)
+    data = report_service.resumen(inicio, fin, _barbero(args.barbero), incluir_detalle=False)
+    if args.json:
+        salida = {
+            "desde": inicio.date().isoformat(),
+            "hasta": fin.date().isoformat(),
+            "totales": data["totales"],
+            "citas": data["citas"],
+            "por_barbero": data["por_barbero"],
+            "por_dia": data["por_dia"],
+        }
+        print(json.dumps(salida, indent=2, ensure_ascii=False))
+        return
+    tot = data["totales"]
+    print(f"Rango: {inicio.strftime('%d/%m/%Y')} - {fin.strftime('%d/%m/%Y')}")
+    print(
+        f"Ventas: {format_currency(tot['ventas'])} | Barberos: {format_currency(tot['barberos'])} | "
+        f"Barbería: {format_currency(tot['barberia'])}"
+    )
+    for nombre, valores in data["por_barbero"].items():
+        print(
+            f"  {nombre}: ventas {format_currency(valores['ventas'])}, barbero {format_currency(valores['barbero'])}, "
+            f"barbería {format_currency(valores['barberia'])} | {formatear_servicios(valores['servicios'])}"
+        )
+
+
+def cmd_pdf(args: argparse.Namespace) -> None:
+    from .services.report_service import report_service
+
+    inicio, fin = _rango(args)
+    salida = args.salida or config.REPORTS_DIR / f"reporte_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    path = report_service.exportar_pdf_detallado(salida, inicio, fin, _barbero(args.barbero), args.titulo)
+    print(path)
+
+
+def cmd_csv(args: argparse.Namespace) -> None:
+    from .services.report_service import report_service
+
+    inicio, fin = _rango(args)
+    barber_id = _barbero(args.barbero)
+    archivo = open(args.salida, "w", newline="", encoding="utf-8") if args.salida else sys.stdout
+    try:
+        writer = csv.writer(archivo)
+        writer.writerow(COLUMNAS_CSV)
+        filas = report_service.iter_detalle_pagos(inicio, fin, barber_id)
+        writer.writerows([fila[c] for c in COLUMNAS_CSV] for fila in filas)
+    finally:
+        if archivo is not sys.stdout:
+            archivo.close()
+
+
+def cmd_exportar(args: argparse.Namespace) -> None:
+    from .services.export_service import export_service
+
+    desde = hasta = None
+    if args.desde or args.hasta or args.rango:
+        desde, hasta = _rango(args)
+    salida = args.salida or config.REPORTS_DIR / f"{args.conjunto}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{args.formato}"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    resultado = export_service.exportar(
+        args.conjunto, args.formato, salida, desde, hasta, incremental=args.incremental, estado_path=args.estado
+    )
+    print(f"{resultado['path']} ({resultado['filas']} registros, último id {resultado['ultimo_id']})")
+
+
+def cmd_backup(args: argparse.Namespace) -> None:
+    from .services.backup_service import perform_backup
+
+    print(perform_backup(args.db, args.destino or _carpeta_backups(args.db)))
+
+
+def cmd_archivar(args: argparse.Namespace) -> None:
+    from .services.archive_service import archive_service
+
+    antes_de = date.fromisoformat(args.antes_de) if args.antes_de else archive_service.corte_por_meses(args.meses)
+    resultado = archive_service.archivar(
+        antes_de, backup_dir=None if args.sin_backup else _carpeta_backups(args.db), compactar=not args.sin_compactar
+    )
+    if not resultado["anios"]:
+        print(f"Nada que archivar antes de {resultado['corte']}")
+        return
+    for anio, movido in resultado["anios"].items():
+        print(f"{anio}: {movido['citas']} citas, {movido['cobros']} cobros -> {movido['archivo']}")
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--db", type=Path, default=config.DB_PATH, help="ruta de barberia.db")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    def con_rango(p: argparse.ArgumentParser) -> argparse.ArgumentParser:
+        p.add_argument("--rango", choices=RANGOS, default="hoy")
+        p.add_argument("--desde", metavar="AAAA-MM-DD", help="reemplaza --rango")
+        p.add_argument("--hasta", metavar="AAAA-MM-DD", help="incluido; por defecto igual a --desde")
+        p.add_argument("--barbero", help="id o nombre del barbero")
+        return p
+
+    p = con_rango(sub.add_parser("resumen", help="totales del rango por barbero y por día"))
+    p.add_argument("--json", action="store_true", help="salida en JSON")
+    p.set_defaults(func=cmd_resumen, apertura="lectura")
+
+    p = con_rango(sub.add_parser("pdf", help="PDF con resumen y detalle de cobros"))
+    p.add_argument("--salida", type=Path, help=f"por defecto en {config.REPORTS_DIR}")
+    p.add_argument("--titulo", default="Reporte Barbería")
+    p.set_defaults(func=cmd_pdf, apertura="lectura")
+
+    p = con_rango(sub.add_parser("csv", help="detalle de cobros en CSV"))
+    p.add_argument("--salida", type=Path, help="por defecto a la salida estándar")
+    p.set_defaults(func=cmd_csv, apertura="lectura")
+
+    p = sub.add_parser("exportar", help="citas, cobros o clientes completos a CSV o JSON Lines")
+    p.add_argument("conjunto", choices=["citas", "cobros", "clientes"])
+    p.add_argument("--formato", choices=["csv", "jsonl"], default="csv")
+    p.add_argument("--salida", type=Path, help=f"por defecto en {config.REPORTS_DIR}")
+    p.add_argument("--rango", choices=RANGOS, help="sin rango ni fechas exporta todo")
+    p.add_argument("--desde", metavar="AAAA-MM-DD")
+    p.add_argument("--hasta", metavar="AAAA-MM-DD")
+    p.add_argument("--incremental", action="store_true", help="solo lo nuevo desde la última exportación incremental (sin fechas)")
+    p.add_argument("--estado", type=Path, help="archivo de marcas; por defecto exportaciones.json junto a la base")
+    p.set_defaults(func=cmd_exportar, apertura="lectura")
+
+    p = sub.add_parser("archivar", help="mueve citas y cobros antiguos a archivos por año")
+    p.add_argument("--meses", type=int, default=config.ARCHIVO_MESES, help="antigüedad mínima en meses completos")
+    p.add_argument("--antes-de", metavar="AAAA-MM-DD", help="reemplaza --meses")
+    p.add_argument("--sin-backup", action="store_true", help="no respaldar la base ni los archivos")
+    p.add_argument("--sin-compactar", action="store_true", help="no ejecutar VACUUM al terminar")
+    p.set_defaults(func=cmd_archivar, apertura="migrar")
+
+    p = sub.add_parser("backup", help="copia verificada de la base")
+    p.add_argument("--destino", type=Path, help="por defecto la carpeta backups junto a la base")
+    p.set_defaults(func=cmd_backup, apertura=None)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parser().parse_args(argv)
+    try:
+        _abrir_base(args.db, args.apertura)
+        args.func(args)
+    except (ValueError, RuntimeError, OSError, ImportError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
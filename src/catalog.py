@@ -0,0 +1,80 @@
+from typing import Dict, List, Optional
+
+from .database import db
+from .models import Barber, Service
+
+
+class Catalog:
+    """Caché en memoria de barberos y servicios.
+
+    Se carga con una consulta por tabla la primera vez que se usa y los repositorios
+    la invalidan al crear, actualizar o eliminar barberos y servicios.
+    """
+
+    def __init__(self):
+        self._barbers: Optional[List[Barber]] = None
+        self._services: Optional[List[Service]] = None
+        self._barbers_by_id: Dict[int, Barber] = {}
+        self._services_by_id: Dict[int, Service] = {}
+        self._services_by_name: Dict[str, Service] = {}
+
+    def invalidate(self) -> None:
+        self._barbers = None
+        self._services = None
+
+    # BARBEROS
+    def barbers(self, include_inactive: bool = True) -> List[Barber]:
+        barberos = self._load_barbers()
+        if include_inactive:
+            return list(barberos)
+        return [b for b in barberos if b["active"]]
+
+    def barber(self, barber_id: int) -> Optional[Barber]:
+        self._load_barbers()
+        return self._barbers_by_id.get(barber_id)
+
+    def barber_name(self, barber_id: int) -> str:
+        barbero = self.barber(barber_id)
+        return barbero["name"] if barbero else ""
+
+    # SERVICIOS
+    def services(self, include_inactive: bool = False) -> List[Service]:
+        servicios = self._load_services()
+        if include_inactive:
+            return sorted(servicios, key=lambda s: (not s["active"], s["id"]))
+        return [s for s in servicios if s["active"]]
+
+    def service(self, service_id: int) -> Optional[Service]:
+        self._load_services()
+        return self._services_by_id.get(service_id)
+
+    def service_by_name(self, name: str) -> Optional[Service]:
+        self._load_services()
+        return self._services_by_name.get(name)
+
+    def service_name(self, service_id: Optional[int]) -> str:
+        servicio = self.service(service_id) if service_id else None
+        return servicio["name"] if servicio else ""
+
+    def _load_barbers(self) -> List[Barber]:
+        if self._barbers is None:
+            cur = db.conn.cursor()
+            cur.row_factory = Barber.fila
+            self._barbers = cur.execute(f"SELECT {Barber.columnas()} FROM barbers ORDER BY id;").fetchall()
+            self._barbers_by_id = {b["id"]: b for b in self._barbers}
+        return self._barbers
+
+    def _load_services(self) -> List[Service]:
+        if self._services is None:
+            cur = db.conn.cursor()
+            cur.row_factory = Service.fila
+            self._services = cur.execute(f"SELECT {Service.columnas()} FROM services ORDER BY id;").fetchall()
+            self._services_by_id = {s["id"]: s for s in self._services}
+            # Ante nombres repetidos prevalece el servicio activo más reciente
+            self._services_by_name = {
+                s["name"]: s for s in sorted(self._services, key=lambda s: (s["active"], s["id"]))
+            }
+        return self._services
+
+
+catalog = Catalog()
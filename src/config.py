@@ -18,6 +18,24 @@ HORARIO_APERTURA = (9, 30)  # 09:30
 HORARIO_CIERRE = (20, 0)    # 20:00
 INTERVALO_MINUTOS = 15
 
+# Backups: copias retenidas al iniciar/cerrar, frecuencia en minutos de las periódicas (0 = solo al
+# iniciar) y cuántas periódicas se conservan, aparte de las anteriores, y copia al cerrar
+BACKUP_KEEP = 30
+BACKUP_INTERVAL_MIN = 60
+BACKUP_PERIODICO_KEEP = 24
+BACKUP_AL_CERRAR = True
+
+# Traza de consultas (opt-in con --trace-queries o BARBERIA_TRACE=1) y umbral de consulta lenta
+TRACE_QUERIES = os.environ.get("BARBERIA_TRACE") == "1"
+QUERY_SLOW_MS = 100
+
+# Archivo anual: antigüedad en meses de lo que se archiva y carpeta (junto a la base) de los archivos
+ARCHIVO_MESES = 12
+ARCHIVO_CARPETA = "archivo"
+
+# Resúmenes de reportes guardados en memoria (se descartan al registrar cambios)
+REPORT_CACHE_SIZE = 16
+
 # Estados de cita
 ESTADOS_CITA = ["RESERVADA", "ATENDIDA", "CANCELADA", "NO ASISTIÓ"]
 
@@ -1,20 +1,419 @@
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, Tuple
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 from . import config
+from .tracing import QueryTracer, TracedConnection
+from .utils import normalize_phone
+
+
+# Migraciones de esquema: (versión, descripción, paso). El paso es un script SQL o una
+# función que recibe la conexión; cada una se aplica en su propia transacción.
+SCHEMA_V1 = """
+CREATE TABLE IF NOT EXISTS barbers(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS services(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    price REAL NOT NULL,
+    barber_earning REAL NOT NULL,
+    shop_liquidation REAL NOT NULL,
+    duration_min INTEGER NOT NULL DEFAULT 30,
+    active INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS clients(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    phone TEXT
+);
+CREATE TABLE IF NOT EXISTS appointments(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    barber_id INTEGER NOT NULL,
+    primary_service_id INTEGER,
+    client_id INTEGER,
+    start_dt TEXT NOT NULL,
+    end_dt TEXT NOT NULL,
+    status TEXT NOT NULL,
+    notes TEXT,
+    created_at TEXT NOT NULL,
+    FOREIGN KEY(barber_id) REFERENCES barbers(id),
+    FOREIGN KEY(primary_service_id) REFERENCES services(id),
+    FOREIGN KEY(client_id) REFERENCES clients(id)
+);
+CREATE INDEX IF NOT EXISTS idx_appointments_barber_date ON appointments(barber_id, start_dt);
+CREATE TABLE IF NOT EXISTS payments(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    appointment_id INTEGER UNIQUE NOT NULL,
+    total_amount REAL NOT NULL,
+    barber_total REAL NOT NULL,
+    shop_total REAL NOT NULL,
+    payment_method TEXT NOT NULL,
+    paid_at TEXT NOT NULL,
+    FOREIGN KEY(appointment_id) REFERENCES appointments(id)
+);
+CREATE TABLE IF NOT EXISTS appointment_service_lines(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    appointment_id INTEGER NOT NULL,
+    service_id INTEGER NOT NULL,
+    qty INTEGER NOT NULL,
+    unit_price_snapshot REAL NOT NULL,
+    barber_earning_snapshot REAL NOT NULL,
+    shop_liquidation_snapshot REAL NOT NULL,
+    FOREIGN KEY(appointment_id) REFERENCES appointments(id),
+    FOREIGN KEY(service_id) REFERENCES services(id)
+);
+CREATE TABLE IF NOT EXISTS barber_days_off(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    barber_id INTEGER NOT NULL,
+    off_date TEXT NOT NULL,
+    note TEXT,
+    UNIQUE(barber_id, off_date),
+    FOREIGN KEY(barber_id) REFERENCES barbers(id)
+);
+"""
+
+SCHEMA_V2_INDICES = """
+CREATE INDEX IF NOT EXISTS idx_payments_paid_at ON payments(paid_at);
+CREATE INDEX IF NOT EXISTS idx_service_lines_appointment ON appointment_service_lines(appointment_id);
+CREATE INDEX IF NOT EXISTS idx_appointments_start ON appointments(start_dt);
+CREATE INDEX IF NOT EXISTS idx_clients_name ON clients(name);
+"""
+
+SCHEMA_V3_VISTA_AGENDA = """
+CREATE VIEW IF NOT EXISTS v_agenda AS
+SELECT
+    a.*,
+    b.name AS barber_name,
+    c.name AS client_name,
+    c.phone AS client_phone,
+    s.name AS service_name
+FROM appointments a
+LEFT JOIN barbers b ON b.id = a.barber_id
+LEFT JOIN clients c ON c.id = a.client_id
+LEFT JOIN services s ON s.id = a.primary_service_id;
+"""
+
+# Acumulados diarios por barbero y método de pago; create/delete_payment los mantienen
+SCHEMA_V4_DAILY_TOTALS = """
+CREATE TABLE IF NOT EXISTS daily_totals(
+    day TEXT NOT NULL,
+    barber_id INTEGER NOT NULL,
+    payment_method TEXT NOT NULL,
+    payments_count INTEGER NOT NULL DEFAULT 0,
+    total_amount REAL NOT NULL DEFAULT 0,
+    barber_total REAL NOT NULL DEFAULT 0,
+    shop_total REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY(day, barber_id, payment_method)
+) WITHOUT ROWID;
+"""
+
+# Versión con day en texto, para las migraciones 4 y 6 (antes de existir payments.paid_day)
+REBUILD_DAILY_TOTALS_V4_SQL = """
+DELETE FROM daily_totals;
+INSERT INTO daily_totals(day, barber_id, payment_method, payments_count, total_amount, barber_total, shop_total)
+SELECT substr(p.paid_at, 1, 10), a.barber_id, p.payment_method, COUNT(*),
+       SUM(p.total_amount), SUM(p.barber_total), SUM(p.shop_total)
+FROM payments p
+JOIN appointments a ON a.id = p.appointment_id
+GROUP BY substr(p.paid_at, 1, 10), a.barber_id, p.payment_method;
+"""
+
+# Búsqueda de clientes: nombre en FTS5 (prefijos de 2 y 3 letras) mantenido por triggers
+SCHEMA_V5_CLIENTS_FTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5(
+        name, content='clients', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    );
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS clients_fts_ai AFTER INSERT ON clients BEGIN
+        INSERT INTO clients_fts(rowid, name) VALUES (new.id, new.name);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS clients_fts_ad AFTER DELETE ON clients BEGIN
+        INSERT INTO clients_fts(clients_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS clients_fts_au AFTER UPDATE OF name ON clients BEGIN
+        INSERT INTO clients_fts(clients_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO clients_fts(rowid, name) VALUES (new.id, new.name);
+    END;
+    """,
+    "INSERT INTO clients_fts(clients_fts) VALUES ('rebuild');",
+]
+
+
+def _migrar_busqueda_clientes(conn: sqlite3.Connection) -> None:
+    conn.execute("ALTER TABLE clients ADD COLUMN phone_key TEXT;")
+    filas = conn.execute("SELECT id, phone FROM clients WHERE phone IS NOT NULL;").fetchall()
+    conn.executemany("UPDATE clients SET phone_key=? WHERE id=?;", [(normalize_phone(r[1]), r[0]) for r in filas])
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_clients_phone_key ON clients(phone_key);")
+    if not fts5_disponible(conn):
+        # Sin FTS5 la búsqueda por nombre cae en LIKE sobre clients
+        return
+    for sql in SCHEMA_V5_CLIENTS_FTS:
+        conn.execute(sql)
+
+
+# Montos en pesos enteros: las tablas con dinero se reconstruyen con columnas INTEGER
+# (SQLite no cambia la afinidad de una columna existente). {tabla} es el nombre a crear.
+SCHEMA_V6_TABLAS_MONTOS = [
+    (
+        "services",
+        """
+        CREATE TABLE {tabla}(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            price INTEGER NOT NULL,
+            barber_earning INTEGER NOT NULL,
+            shop_liquidation INTEGER NOT NULL,
+            duration_min INTEGER NOT NULL DEFAULT 30,
+            active INTEGER NOT NULL DEFAULT 1
+        );
+        """,
+        ("id", "name", "price", "barber_earning", "shop_liquidation", "duration_min", "active"),
+        ("price", "barber_earning", "shop_liquidation"),
+    ),
+    (
+        "payments",
+        """
+        CREATE TABLE {tabla}(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            appointment_id INTEGER UNIQUE NOT NULL,
+            total_amount INTEGER NOT NULL,
+            barber_total INTEGER NOT NULL,
+            shop_total INTEGER NOT NULL,
+            payment_method TEXT NOT NULL,
+            paid_at TEXT NOT NULL,
+            FOREIGN KEY(appointment_id) REFERENCES appointments(id)
+        );
+        """,
+        ("id", "appointment_id", "total_amount", "barber_total", "shop_total", "payment_method", "paid_at"),
+        ("total_amount", "barber_total", "shop_total"),
+    ),
+    (
+        "appointment_service_lines",
+        """
+        CREATE TABLE {tabla}(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            appointment_id INTEGER NOT NULL,
+            service_id INTEGER NOT NULL,
+            qty INTEGER NOT NULL,
+            unit_price_snapshot INTEGER NOT NULL,
+            barber_earning_snapshot INTEGER NOT NULL,
+            shop_liquidation_snapshot INTEGER NOT NULL,
+            FOREIGN KEY(appointment_id) REFERENCES appointments(id),
+            FOREIGN KEY(service_id) REFERENCES services(id)
+        );
+        """,
+        (
+            "id", "appointment_id", "service_id", "qty", "unit_price_snapshot", "barber_earning_snapshot",
+            "shop_liquidation_snapshot",
+        ),
+        ("unit_price_snapshot", "barber_earning_snapshot", "shop_liquidation_snapshot"),
+    ),
+]
+
+SCHEMA_V6_DAILY_TOTALS = """
+CREATE TABLE daily_totals(
+    day TEXT NOT NULL,
+    barber_id INTEGER NOT NULL,
+    payment_method TEXT NOT NULL,
+    payments_count INTEGER NOT NULL DEFAULT 0,
+    total_amount INTEGER NOT NULL DEFAULT 0,
+    barber_total INTEGER NOT NULL DEFAULT 0,
+    shop_total INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY(day, barber_id, payment_method)
+) WITHOUT ROWID;
+"""
+
+
+def _migrar_montos_enteros(conn: sqlite3.Connection) -> None:
+    """Redondea los montos a pesos y los guarda como INTEGER (procedimiento de ALTER TABLE de SQLite).
+
+    Se conservan ids y la secuencia AUTOINCREMENT de cada tabla; la vista, los índices y
+    daily_totals se recrean. Requiere foreign_keys desactivado (ver _apply_migration).
+    """
+    conn.execute("DROP VIEW IF EXISTS v_agenda;")
+    for tabla, crear, columnas, montos in SCHEMA_V6_TABLAS_MONTOS:
+        secuencia = conn.execute("SELECT seq FROM sqlite_sequence WHERE name=?;", (tabla,)).fetchone()
+        valores = ", ".join(f"CAST(ROUND({c}) AS INTEGER)" if c in montos else c for c in columnas)
+        conn.execute(crear.format(tabla=f"{tabla}_v6"))
+        conn.execute(f"INSERT INTO {tabla}_v6({', '.join(columnas)}) SELECT {valores} FROM {tabla};")
+        conn.execute(f"DROP TABLE {tabla};")
+        conn.execute(f"ALTER TABLE {tabla}_v6 RENAME TO {tabla};")
+        if secuencia is not None:
+            conn.execute("UPDATE sqlite_sequence SET seq=? WHERE name=?;", (secuencia[0], tabla))
+    for sql in (SCHEMA_V2_INDICES + SCHEMA_V3_VISTA_AGENDA).split(";"):
+        if sql.strip():
+            conn.execute(sql)
+    conn.execute("DROP TABLE daily_totals;")
+    conn.execute(SCHEMA_V6_DAILY_TOTALS)
+    for sql in REBUILD_DAILY_TOTALS_V4_SQL.split(";"):
+        if sql.strip():
+            conn.execute(sql)
+    for tabla in ("appointments", "payments", "appointment_service_lines"):
+        if conn.execute(f"PRAGMA foreign_key_check({tabla});").fetchone():
+            raise sqlite3.IntegrityError(f"Referencias rotas en {tabla} tras convertir montos")
+
+
+# Tiempos enteros junto a las columnas ISO: minutos y días desde 1970-01-01 de la hora
+# local guardada (utils.to_epoch_min / to_day_number hacen el mismo cálculo en Python).
+# Los triggers los mantienen en cualquier INSERT o cambio de las columnas ISO.
+_MINUTOS = "CAST(strftime('%s', {col}) AS INTEGER) / 60"
+_DIA = "CAST(strftime('%s', {col}) AS INTEGER) / 86400"
+_SET_TIEMPOS_CITA = (
+    f"start_min = {_MINUTOS.format(col='{fila}.start_dt')}, end_min = {_MINUTOS.format(col='{fila}.end_dt')}, "
+    f"start_day = {_DIA.format(col='{fila}.start_dt')}"
+)
+_SET_TIEMPOS_PAGO = f"paid_min = {_MINUTOS.format(col='{fila}.paid_at')}, paid_day = {_DIA.format(col='{fila}.paid_at')}"
+
+SCHEMA_V7_TIEMPOS_ENTEROS = [
+    "ALTER TABLE appointments ADD COLUMN start_min INTEGER;",
+    "ALTER TABLE appointments ADD COLUMN end_min INTEGER;",
+    "ALTER TABLE appointments ADD COLUMN start_day INTEGER;",
+    "ALTER TABLE payments ADD COLUMN paid_min INTEGER;",
+    "ALTER TABLE payments ADD COLUMN paid_day INTEGER;",
+    f"UPDATE appointments SET {_SET_TIEMPOS_CITA.format(fila='appointments')};",
+    f"UPDATE payments SET {_SET_TIEMPOS_PAGO.format(fila='payments')};",
+    f"""
+    CREATE TRIGGER appointments_tiempos_ai AFTER INSERT ON appointments BEGIN
+        UPDATE appointments SET {_SET_TIEMPOS_CITA.format(fila='new')} WHERE id = new.id;
+    END;
+    """,
+    f"""
+    CREATE TRIGGER appointments_tiempos_au AFTER UPDATE OF start_dt, end_dt ON appointments BEGIN
+        UPDATE appointments SET {_SET_TIEMPOS_CITA.format(fila='new')} WHERE id = new.id;
+    END;
+    """,
+    f"""
+    CREATE TRIGGER payments_tiempos_ai AFTER INSERT ON payments BEGIN
+        UPDATE payments SET {_SET_TIEMPOS_PAGO.format(fila='new')} WHERE id = new.id;
+    END;
+    """,
+    f"""
+    CREATE TRIGGER payments_tiempos_au AFTER UPDATE OF paid_at ON payments BEGIN
+        UPDATE payments SET {_SET_TIEMPOS_PAGO.format(fila='new')} WHERE id = new.id;
+    END;
+    """,
+    # Los filtros pasan a las columnas enteras; los índices sobre el texto ya no se usan
+    "DROP INDEX IF EXISTS idx_appointments_barber_date;",
+    "DROP INDEX IF EXISTS idx_appointments_start;",
+    "DROP INDEX IF EXISTS idx_payments_paid_at;",
+    "CREATE INDEX idx_appointments_barber_start_min ON appointments(barber_id, start_min);",
+    "CREATE INDEX idx_appointments_start_min ON appointments(start_min);",
+    "CREATE INDEX idx_payments_paid_min ON payments(paid_min);",
+    "DROP TABLE daily_totals;",
+    """
+    CREATE TABLE daily_totals(
+        day INTEGER NOT NULL,
+        barber_id INTEGER NOT NULL,
+        payment_method TEXT NOT NULL,
+        payments_count INTEGER NOT NULL DEFAULT 0,
+        total_amount INTEGER NOT NULL DEFAULT 0,
+        barber_total INTEGER NOT NULL DEFAULT 0,
+        shop_total INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY(day, barber_id, payment_method)
+    ) WITHOUT ROWID;
+    """,
+]
+
+# daily_totals.day es el número de día (payments.paid_day) desde la migración 7
+REBUILD_DAILY_TOTALS_SQL = """
+DELETE FROM daily_totals;
+INSERT INTO daily_totals(day, barber_id, payment_method, payments_count, total_amount, barber_total, shop_total)
+SELECT p.paid_day, a.barber_id, p.payment_method, COUNT(*),
+       SUM(p.total_amount), SUM(p.barber_total), SUM(p.shop_total)
+FROM payments p
+JOIN appointments a ON a.id = p.appointment_id
+GROUP BY p.paid_day, a.barber_id, p.payment_method;
+"""
+
+
+def _migrar_tiempos_enteros(conn: sqlite3.Connection) -> None:
+    for sql in SCHEMA_V7_TIEMPOS_ENTEROS:
+        conn.execute(sql)
+    for sql in REBUILD_DAILY_TOTALS_SQL.split(";"):
+        if sql.strip():
+            conn.execute(sql)
+
+
+# Archivo por años (services/archive_service.py): citas y cobros de periodos cerrados viven en
+# bases aparte. archives indica los días que cubre cada una; archive_barbers y archive_services
+# conservan la FK de barberos y servicios referenciados solo desde el archivo.
+SCHEMA_V8_ARCHIVOS = """
+CREATE TABLE IF NOT EXISTS archives(
+    year INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    first_day INTEGER NOT NULL,
+    last_day INTEGER NOT NULL,
+    archived_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archive_barbers(
+    year INTEGER NOT NULL,
+    barber_id INTEGER NOT NULL,
+    PRIMARY KEY(year, barber_id),
+    FOREIGN KEY(year) REFERENCES archives(year),
+    FOREIGN KEY(barber_id) REFERENCES barbers(id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS archive_services(
+    year INTEGER NOT NULL,
+    service_id INTEGER NOT NULL,
+    PRIMARY KEY(year, service_id),
+    FOREIGN KEY(year) REFERENCES archives(year),
+    FOREIGN KEY(service_id) REFERENCES services(id)
+) WITHOUT ROWID;
+"""
+
+
+def fts5_disponible(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_prueba USING fts5(x);")
+    except sqlite3.OperationalError:
+        return False
+    conn.execute("DROP TABLE temp.fts5_prueba;")
+    return True
+
+
+MIGRATIONS = [
+    (1, "Esquema inicial", SCHEMA_V1),
+    (2, "Índices para pagos, líneas de servicio, citas por fecha y clientes", SCHEMA_V2_INDICES),
+    (3, "Vista de agenda con barbero, cliente y servicio", SCHEMA_V3_VISTA_AGENDA),
+    (4, "Acumulados diarios de ventas", SCHEMA_V4_DAILY_TOTALS + REBUILD_DAILY_TOTALS_V4_SQL),
+    (5, "Clave de teléfono normalizada e índice de texto para nombres de clientes", _migrar_busqueda_clientes),
+    (6, "Montos en pesos enteros", _migrar_montos_enteros),
+    (7, "Minutos y días enteros para citas y pagos", _migrar_tiempos_enteros),
+    (8, "Registro de archivos anuales de citas y cobros", SCHEMA_V8_ARCHIVOS),
+]
 
 
 class Database:
-    def __init__(self, db_path: Path):
+    def __init__(self, db_path: Path, tracer: Optional[QueryTracer] = None):
         self.db_path = db_path
         self._conn = None
+        self._tx_depth = 0
+        self.commit_count = 0
+        self.tracer = tracer
 
     @property
     def conn(self) -> sqlite3.Connection:
         if self._conn is None:
-            self._conn = sqlite3.connect(self.db_path, detect_types=sqlite3.PARSE_DECLTYPES)
+            # Autocommit: las transacciones se abren explícitamente con transaction()
+            if self.tracer is None:
+                self._conn = sqlite3.connect(self.db_path, detect_types=sqlite3.PARSE_DECLTYPES, isolation_level=None)
+            else:
+                self._conn = sqlite3.connect(
+                    self.db_path, detect_types=sqlite3.PARSE_DECLTYPES, isolation_level=None, factory=TracedConnection
+                )
+                self._conn.tracer = self.tracer
+                self._conn.set_trace_callback(self.tracer.trace_callback)
             self._conn.row_factory = sqlite3.Row
             self._conn.execute("PRAGMA foreign_keys = ON;")
         return self._conn
@@ -23,100 +422,133 @@ class Database:
         if self._conn is not None:
             self._conn.close()
             self._conn = None
+            self._tx_depth = 0
+
+    def enable_tracing(self, slow_ms: float = config.QUERY_SLOW_MS, log_path: Optional[Path] = None) -> QueryTracer:
+        """Activa la medición de consultas; las lentas van a consultas_lentas.log junto a la base.
+
+        Reabre la conexión, así que no puede llamarse dentro de una transacción.
+        """
+        if self._tx_depth:
+            raise RuntimeError("No se puede activar la traza dentro de una transacción")
+        log_path = log_path or Path(self.db_path).with_name("consultas_lentas.log")
+        self.close()
+        self.tracer = QueryTracer(slow_ms, log_path)
+        return self.tracer
+
+    def disable_tracing(self) -> None:
+        if self._tx_depth:
+            raise RuntimeError("No se puede desactivar la traza dentro de una transacción")
+        self.close()
+        self.tracer = None
+
+    def trace_summary(self, limit: Optional[int] = 20) -> dict:
+        """Sentencias ordenadas por tiempo total, con conteo, máximo, promedio y función que las llamó."""
+        if self.tracer is None:
+            return {"statements": [], "executed": []}
+        return self.tracer.summary(limit)
+
+    def dump_trace_summary(self, path: Optional[Path] = None, limit: Optional[int] = None) -> Optional[Path]:
+        if self.tracer is None:
+            return None
+        return self.tracer.dump(path or Path(self.db_path).with_name("consultas_resumen.json"), limit)
+
+    def attached(self) -> List[str]:
+        """Esquemas adjuntos con ATTACH (sin main ni temp)."""
+        return [fila[1] for fila in self.conn.execute("PRAGMA database_list;") if fila[1] not in ("main", "temp")]
+
+    def attach(self, esquema: str, path: Path) -> None:
+        """ATTACH de `path` como `esquema` si no está ya adjunto; no puede usarse dentro de una transacción."""
+        if esquema not in self.attached():
+            self.conn.execute(f"ATTACH DATABASE ? AS {esquema};", (str(path),))
+
+    def detach(self, esquema: str) -> None:
+        if esquema in self.attached():
+            self.conn.execute(f"DETACH DATABASE {esquema};")
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Agrupa escrituras en un solo COMMIT. Las transacciones anidadas usan SAVEPOINT."""
+        conn = self.conn
+        depth = self._tx_depth
+        if depth == 0:
+            conn.execute("BEGIN IMMEDIATE;")
+        else:
+            conn.execute(f"SAVEPOINT sp_{depth};")
+        self._tx_depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            self._tx_depth = depth
+            if depth == 0:
+                conn.execute("ROLLBACK;")
+            else:
+                conn.execute(f"ROLLBACK TO sp_{depth};")
+                conn.execute(f"RELEASE sp_{depth};")
+            raise
+        self._tx_depth = depth
+        if depth == 0:
+            conn.execute("COMMIT;")
+            self.commit_count += 1
+        else:
+            conn.execute(f"RELEASE sp_{depth};")
 
     def init_db(self) -> None:
-        """Crea tablas y aplica semilla inicial."""
-        self._create_tables()
+        """Aplica migraciones pendientes y semilla inicial."""
+        self.migrate()
         self._seed_barbers()
         self._seed_services()
 
-    def _create_tables(self) -> None:
-        cur = self.conn.cursor()
-        cur.executescript(
-            """
-            CREATE TABLE IF NOT EXISTS barbers(
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                active INTEGER NOT NULL DEFAULT 1
-            );
-            CREATE TABLE IF NOT EXISTS services(
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                price REAL NOT NULL,
-                barber_earning REAL NOT NULL,
-                shop_liquidation REAL NOT NULL,
-                duration_min INTEGER NOT NULL DEFAULT 30,
-                active INTEGER NOT NULL DEFAULT 1
-            );
-            CREATE TABLE IF NOT EXISTS clients(
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                phone TEXT
-            );
-            CREATE TABLE IF NOT EXISTS appointments(
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                barber_id INTEGER NOT NULL,
-                primary_service_id INTEGER,
-                client_id INTEGER,
-                start_dt TEXT NOT NULL,
-                end_dt TEXT NOT NULL,
-                status TEXT NOT NULL,
-                notes TEXT,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY(barber_id) REFERENCES barbers(id),
-                FOREIGN KEY(primary_service_id) REFERENCES services(id),
-                FOREIGN KEY(client_id) REFERENCES clients(id)
-            );
-            CREATE INDEX IF NOT EXISTS idx_appointments_barber_date ON appointments(barber_id, start_dt);
-            CREATE TABLE IF NOT EXISTS payments(
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                appointment_id INTEGER UNIQUE NOT NULL,
-                total_amount REAL NOT NULL,
-                barber_total REAL NOT NULL,
-                shop_total REAL NOT NULL,
-                payment_method TEXT NOT NULL,
-                paid_at TEXT NOT NULL,
-                FOREIGN KEY(appointment_id) REFERENCES appointments(id)
-            );
-            CREATE TABLE IF NOT EXISTS appointment_service_lines(
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                appointment_id INTEGER NOT NULL,
-                service_id INTEGER NOT NULL,
-                qty INTEGER NOT NULL,
-                unit_price_snapshot REAL NOT NULL,
-                barber_earning_snapshot REAL NOT NULL,
-                shop_liquidation_snapshot REAL NOT NULL,
-                FOREIGN KEY(appointment_id) REFERENCES appointments(id),
-                FOREIGN KEY(service_id) REFERENCES services(id)
-            );
-            CREATE TABLE IF NOT EXISTS barber_days_off(
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                barber_id INTEGER NOT NULL,
-                off_date TEXT NOT NULL,
-                note TEXT,
-                UNIQUE(barber_id, off_date),
-                FOREIGN KEY(barber_id) REFERENCES barbers(id)
-            );
-            """
-        )
-        self.conn.commit()
+    def schema_version(self) -> int:
+        return self.conn.execute("PRAGMA user_version;").fetchone()[0]
+
+    def pending_migrations(self) -> List[int]:
+        current = self.schema_version()
+        return [version for version, _descripcion, _step in MIGRATIONS if version > current]
+
+    def migrate(self, hasta: Optional[int] = None) -> int:
+        """Aplica en orden solo las migraciones posteriores a PRAGMA user_version (hasta la versión `hasta`)."""
+        current = self.schema_version()
+        for version, _descripcion, step in MIGRATIONS:
+            if version > current and (hasta is None or version <= hasta):
+                self._apply_migration(version, step)
+        return self.schema_version()
+
+    def _apply_migration(self, version: int, step) -> None:
+        conn = self.conn
+        # Reconstruir tablas (DROP + RENAME) exige foreign_keys apagado; solo cambia fuera de transacción
+        conn.execute("PRAGMA foreign_keys = OFF;")
+        try:
+            if callable(step):
+                conn.execute("BEGIN;")
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {version};")
+                conn.execute("COMMIT;")
+            else:
+                conn.executescript(f"BEGIN;\n{step}\nPRAGMA user_version = {version};\nCOMMIT;")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK;")
+            raise
+        finally:
+            conn.execute("PRAGMA foreign_keys = ON;")
 
     def _seed_barbers(self) -> None:
         cur = self.conn.cursor()
         cur.execute("SELECT COUNT(*) FROM barbers;")
         if cur.fetchone()[0] == 0:
-            cur.executemany("INSERT INTO barbers(name, active) VALUES(?, ?);", config.DEFAULT_BARBERS)
-            self.conn.commit()
+            with self.transaction():
+                cur.executemany("INSERT INTO barbers(name, active) VALUES(?, ?);", config.DEFAULT_BARBERS)
 
     def _seed_services(self) -> None:
         cur = self.conn.cursor()
         cur.execute("SELECT COUNT(*) FROM services;")
         if cur.fetchone()[0] == 0:
-            cur.executemany(
-                "INSERT INTO services(name, price, barber_earning, shop_liquidation, duration_min, active) VALUES(?,?,?,?,?,?);",
-                config.DEFAULT_SERVICES,
-            )
-            self.conn.commit()
+            with self.transaction():
+                cur.executemany(
+                    "INSERT INTO services(name, price, barber_earning, shop_liquidation, duration_min, active) VALUES(?,?,?,?,?,?);",
+                    config.DEFAULT_SERVICES,
+                )
 
     def run_query(self, query: str, params: Tuple = (), many: bool = False) -> Iterable[sqlite3.Row]:
         cur = self.conn.cursor()
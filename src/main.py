@@ -1,35 +1,113 @@
+import time
+
+# Marca de inicio antes de importar Qt, para medir el costo de las importaciones
+_T0 = time.perf_counter()
+
+import argparse
+import json
 import sys
+from pathlib import Path
+from typing import List, Optional
 
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import QApplication, QMessageBox
 from PySide6.QtGui import QIcon
 
 from . import config
 from .database import db
-from .services.backup_service import perform_backup
+from .services.backup_service import BackupScheduler, backup_before_migrations, perform_backup_async
+from .services.maintenance_service import run_maintenance_async
 from .ui.main_window import MainWindow
 
 
+class StartupProfiler:
+    """Registra la duración de cada fase del arranque y la escribe en JSON."""
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self.fases: List[dict] = []
+        self._ultimo = _T0
+
+    def mark(self, fase: str) -> None:
+        ahora = time.perf_counter()
+        self.fases.append({"fase": fase, "ms": round((ahora - self._ultimo) * 1000, 2)})
+        self._ultimo = ahora
+
+    def write(self) -> None:
+        if self.path is None:
+            return
+        data = {"fases": self.fases, "total_ms": round((self._ultimo - _T0) * 1000, 2)}
+        self.path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def _parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        "--profile-startup",
+        nargs="?",
+        const=str(config.BASE_DIR / "startup_profile.json"),
+        default=None,
+        metavar="RUTA",
+    )
+    parser.add_argument("--trace-queries", action="store_true", default=config.TRACE_QUERIES)
+    # Los argumentos propios de Qt (p. ej. -style) se dejan pasar
+    args, _ = parser.parse_known_args(argv[1:])
+    return args
+
+
 def main():
-    try:
-        config.ensure_directories()
-        # Crear carpeta de reportes si no existe
-        config.REPORTS_DIR.mkdir(parents=True, exist_ok=True)
-        db.init_db()
-        if config.DB_PATH.exists():
-            perform_backup()
-    except Exception as exc:
-        QMessageBox.critical(None, "Error inicializando", str(exc))
-        raise
+    args = _parse_args(sys.argv)
+    profiler = StartupProfiler(Path(args.profile_startup) if args.profile_startup else None)
+    profiler.mark("importaciones")
 
     app = QApplication(sys.argv)
     if config.LOGO_PATH.exists():
         app.setWindowIcon(QIcon(str(config.LOGO_PATH)))
-    window = MainWindow()
+    profiler.mark("qapplication")
+
+    # La ventana aparece antes de tocar la base; las pestañas se construyen al activarse
+    window = MainWindow(construir_pestanas=False)
     window.show()
+    profiler.mark("ventana_visible")
+
+    scheduler = BackupScheduler(config.BACKUP_INTERVAL_MIN * 60)
+    if args.trace_queries:
+        db.enable_tracing()
+
+    def completar_arranque():
+        try:
+            config.ensure_directories()
+            # Crear carpeta de reportes si no existe
+            config.REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+            backup_before_migrations(db)
+            db.init_db()
+        except Exception as exc:
+            QMessageBox.critical(window, "Error inicializando", str(exc))
+            app.exit(1)
+            return
+        profiler.mark("init_db")
+
+        window.habilitar_pestanas()
+        profiler.mark("primera_pestana")
+
+        # Backup en línea y mantenimiento en segundo plano
+        if config.DB_PATH.exists():
+            perform_backup_async()
+        run_maintenance_async()
+        scheduler.start()
+        profiler.mark("tareas_segundo_plano")
+        profiler.write()
+
+    def al_cerrar():
+        scheduler.stop()
+        db.dump_trace_summary()
+        if config.BACKUP_AL_CERRAR and config.DB_PATH.exists():
+            perform_backup_async().join()
+
+    app.aboutToQuit.connect(al_cerrar)
+    QTimer.singleShot(0, completar_arranque)
     sys.exit(app.exec())
 
 
 if __name__ == "__main__":
     main()
-
-
@@ -0,0 +1,112 @@
+"""Registros de solo lectura que devuelven los repositorios.
+
+Cada registro es una tupla con nombre: no guarda un dict por fila y se construye
+directamente desde la fila de SQLite con `cursor.row_factory = Modelo.fila`. Se lee
+igual que sqlite3.Row (r["name"], r[0], r.keys(), dict(r)) y además por atributo
+(r.name) y con r.get("name").
+"""
+
+from operator import itemgetter
+from typing import Any, Dict, Optional, Tuple
+
+_nueva_tupla = tuple.__new__
+_item = tuple.__getitem__
+
+
+class Registro(tuple):
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    _indices: Dict[str, int] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._indices = {campo: i for i, campo in enumerate(cls._fields)}
+        for i, campo in enumerate(cls._fields):
+            setattr(cls, campo, property(itemgetter(i)))
+
+    def __new__(cls, *valores):
+        if len(valores) != len(cls._fields):
+            raise TypeError(f"{cls.__name__} espera {len(cls._fields)} valores")
+        return _nueva_tupla(cls, valores)
+
+    @classmethod
+    def fila(cls, _cursor, fila: tuple) -> "Registro":
+        """row_factory: la consulta debe traer las columnas en el orden de _fields (ver columnas())."""
+        return _nueva_tupla(cls, fila)
+
+    @classmethod
+    def columnas(cls, alias: Optional[str] = None) -> str:
+        prefijo = f"{alias}." if alias else ""
+        return ", ".join(prefijo + campo for campo in cls._fields)
+
+    def __getitem__(self, clave):
+        if isinstance(clave, str):
+            return _item(self, self._indices[clave])
+        return _item(self, clave)
+
+    def get(self, clave: str, default: Any = None) -> Any:
+        i = self._indices.get(clave)
+        return default if i is None else _item(self, i)
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def __repr__(self) -> str:
+        campos = ", ".join(f"{campo}={valor!r}" for campo, valor in zip(self._fields, self))
+        return f"{type(self).__name__}({campos})"
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+
+class Barber(Registro):
+    __slots__ = ()
+    _fields = ("id", "name", "active")
+
+
+class Service(Registro):
+    __slots__ = ()
+    _fields = ("id", "name", "price", "barber_earning", "shop_liquidation", "duration_min", "active")
+
+
+class Client(Registro):
+    __slots__ = ()
+    _fields = ("id", "name", "phone", "phone_key")
+
+
+class Appointment(Registro):
+    __slots__ = ()
+    _fields = (
+        "id", "barber_id", "primary_service_id", "client_id", "start_dt", "end_dt", "status", "notes", "created_at",
+        "start_min", "end_min", "start_day",
+    )
+
+
+class AgendaItem(Registro):
+    """Fila de v_agenda: la cita con los nombres de barbero, cliente y servicio."""
+
+    __slots__ = ()
+    _fields = Appointment._fields + ("barber_name", "client_name", "client_phone", "service_name")
+
+
+class Payment(Registro):
+    __slots__ = ()
+    _fields = (
+        "id", "appointment_id", "total_amount", "barber_total", "shop_total", "payment_method", "paid_at", "paid_min",
+        "paid_day",
+    )
+
+
+class ServiceLine(Registro):
+    __slots__ = ()
+    _fields = (
+        "id", "appointment_id", "service_id", "qty", "unit_price_snapshot", "barber_earning_snapshot",
+        "shop_liquidation_snapshot",
+    )
+
+
+class PaymentDetail(Registro):
+    """Fila del detalle de cobros de los reportes (ver DETALLE_PAGOS_SQL)."""
+
+    __slots__ = ()
+    _fields = ("appointment_id", "barber", "total", "fecha", "hora", "metodo_pago", "servicios")
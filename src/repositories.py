@@ -1,93 +1,165 @@
 from datetime import datetime, date
-from typing import List, Optional, Tuple
+from typing import List, Optional, Set, Tuple
 
-from .database import db
-from .utils import to_iso
+from .catalog import catalog
+from .database import REBUILD_DAILY_TOTALS_SQL, Database, db
+from .models import AgendaItem, Appointment, Barber, Client, Payment, Service, ServiceLine
+from .utils import from_day_number, normalize_phone, to_day_number, to_epoch_min, to_iso, to_pesos
 
 
-# BARBEROS
-def list_barbers(include_inactive: bool = True) -> List[dict]:
+def _con_modelo(modelo):
+    """Cursor cuyas filas se construyen directamente como `modelo` (ver models.Registro)."""
     cur = db.conn.cursor()
+    cur.row_factory = modelo.fila
+    return cur
+
+
+# BARBEROS
+def list_barbers(include_inactive: bool = True) -> List[Barber]:
+    cur = _con_modelo(Barber)
     if include_inactive:
-        cur.execute("SELECT * FROM barbers ORDER BY id;")
+        cur.execute(f"SELECT {Barber.columnas()} FROM barbers ORDER BY id;")
     else:
-        cur.execute("SELECT * FROM barbers WHERE active=1 ORDER BY id;")
-    return [dict(r) for r in cur.fetchall()]
+        cur.execute(f"SELECT {Barber.columnas()} FROM barbers WHERE active=1 ORDER BY id;")
+    return cur.fetchall()
 
 
 def create_barber(name: str, active: bool = True) -> int:
-    cur = db.conn.cursor()
-    cur.execute("INSERT INTO barbers(name, active) VALUES(?, ?);", (name, int(active)))
-    db.conn.commit()
+    with db.transaction():
+        cur = db.conn.cursor()
+        cur.execute("INSERT INTO barbers(name, active) VALUES(?, ?);", (name, int(active)))
+        catalog.invalidate()
     return cur.lastrowid
 
 
 def update_barber(barber_id: int, name: str, active: bool) -> None:
-    cur = db.conn.cursor()
-    cur.execute("UPDATE barbers SET name=?, active=? WHERE id=?;", (name, int(active), barber_id))
-    db.conn.commit()
+    with db.transaction():
+        cur = db.conn.cursor()
+        cur.execute("UPDATE barbers SET name=?, active=? WHERE id=?;", (name, int(active), barber_id))
+        catalog.invalidate()
+
+
+def delete_barber(barber_id: int) -> None:
+    with db.transaction():
+        cur = db.conn.cursor()
+        cur.execute("DELETE FROM barbers WHERE id=?;", (barber_id,))
+        catalog.invalidate()
 
 
 # SERVICIOS
-def list_services(include_inactive: bool = False) -> List[dict]:
-    cur = db.conn.cursor()
+def list_services(include_inactive: bool = False) -> List[Service]:
+    cur = _con_modelo(Service)
     if include_inactive:
-        cur.execute("SELECT * FROM services ORDER BY active DESC, id;")
+        cur.execute(f"SELECT {Service.columnas()} FROM services ORDER BY active DESC, id;")
     else:
-        cur.execute("SELECT * FROM services WHERE active=1 ORDER BY id;")
-    return [dict(r) for r in cur.fetchall()]
-
-
-def create_service(name: str, price: float, barber_earning: float, shop_liquidation: float, duration_min: int, active: bool = True) -> int:
-    cur = db.conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO services(name, price, barber_earning, shop_liquidation, duration_min, active)
-        VALUES(?,?,?,?,?,?);
-        """,
-        (name, price, barber_earning, shop_liquidation, duration_min, int(active)),
-    )
-    db.conn.commit()
+        cur.execute(f"SELECT {Service.columnas()} FROM services WHERE active=1 ORDER BY id;")
+    return cur.fetchall()
+
+
+def create_service(name: str, price: int, barber_earning: int, shop_liquidation: int, duration_min: int, active: bool = True) -> int:
+    with db.transaction():
+        cur = db.conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO services(name, price, barber_earning, shop_liquidation, duration_min, active)
+            VALUES(?,?,?,?,?,?);
+            """,
+            (name, to_pesos(price), to_pesos(barber_earning), to_pesos(shop_liquidation), duration_min, int(active)),
+        )
+        catalog.invalidate()
     return cur.lastrowid
 
 
-def update_service(service_id: int, name: str, price: float, barber_earning: float, shop_liquidation: float, duration_min: int, active: bool) -> None:
-    cur = db.conn.cursor()
-    cur.execute(
-        """
-        UPDATE services
-        SET name=?, price=?, barber_earning=?, shop_liquidation=?, duration_min=?, active=?
-        WHERE id=?;
-        """,
-        (name, price, barber_earning, shop_liquidation, duration_min, int(active), service_id),
-    )
-    db.conn.commit()
+def update_service(service_id: int, name: str, price: int, barber_earning: int, shop_liquidation: int, duration_min: int, active: bool) -> None:
+    with db.transaction():
+        cur = db.conn.cursor()
+        cur.execute(
+            """
+            UPDATE services
+            SET name=?, price=?, barber_earning=?, shop_liquidation=?, duration_min=?, active=?
+            WHERE id=?;
+            """,
+            (
+                name, to_pesos(price), to_pesos(barber_earning), to_pesos(shop_liquidation), duration_min, int(active),
+                service_id,
+            ),
+        )
+        catalog.invalidate()
 
 
 # CLIENTES
 def create_client(name: str, phone: Optional[str]) -> int:
-    cur = db.conn.cursor()
-    cur.execute("INSERT INTO clients(name, phone) VALUES(?,?);", (name, phone))
-    db.conn.commit()
+    with db.transaction():
+        cur = db.conn.cursor()
+        cur.execute(
+            "INSERT INTO clients(name, phone, phone_key) VALUES(?,?,?);", (name, phone, normalize_phone(phone))
+        )
     return cur.lastrowid
 
 
-def get_client(client_id: int) -> Optional[dict]:
-    cur = db.conn.cursor()
-    cur.execute("SELECT * FROM clients WHERE id=?;", (client_id,))
-    row = cur.fetchone()
-    return dict(row) if row else None
+def get_client(client_id: int) -> Optional[Client]:
+    cur = _con_modelo(Client)
+    cur.execute(f"SELECT {Client.columnas()} FROM clients WHERE id=?;", (client_id,))
+    return cur.fetchone()
 
 
 def get_or_create_client(name: str, phone: Optional[str]) -> int:
     cur = db.conn.cursor()
-    cur.execute("SELECT id FROM clients WHERE name=? AND (phone=? OR phone IS NULL);", (name, phone))
+    cur.execute(
+        "SELECT id FROM clients WHERE name=? AND (phone_key=? OR phone_key IS NULL) ORDER BY phone_key IS NULL LIMIT 1;",
+        (name, normalize_phone(phone)),
+    )
     row = cur.fetchone()
     if row:
         return row[0]
     return create_client(name, phone)
 
 
+def search_clients(text: str, limit: int = 10) -> List[Client]:
+    """Clientes cuyo teléfono empieza por los dígitos escritos o cuyo nombre tiene palabras con esos prefijos.
+
+    Los nombres se devuelven del más reciente al más antiguo: FTS5 recorre por rowid y
+    corta en el límite sin ordenar todas las coincidencias.
+    """
+    text = text.strip()
+    cur = _con_modelo(Client)
+    phone_key = normalize_phone(text)
+    if phone_key and not any(ch.isalpha() for ch in text):
+        # GLOB distingue mayúsculas y puede recorrer idx_clients_phone_key por prefijo
+        cur.execute(
+            f"SELECT {Client.columnas()} FROM clients WHERE phone_key GLOB ? ORDER BY phone_key LIMIT ?;",
+            (phone_key + "*", limit),
+        )
+        return cur.fetchall()
+    palabras = [p for p in text.split() if p]
+    if not palabras:
+        return []
+    if _clients_fts():
+        consulta = " ".join('"' + p.replace('"', '""') + '"*' for p in palabras)
+        cur.execute(
+            f"""
+            SELECT {Client.columnas("c")}
+            FROM clients_fts f JOIN clients c ON c.id = f.rowid
+            WHERE clients_fts MATCH ?
+            ORDER BY f.rowid DESC LIMIT ?;
+            """,
+            (consulta, limit),
+        )
+    else:
+        condiciones = " AND ".join("name LIKE ?" for _ in palabras)
+        cur.execute(
+            f"SELECT {Client.columnas()} FROM clients WHERE {condiciones} ORDER BY name LIMIT ?;",
+            tuple(f"%{p}%" for p in palabras) + (limit,),
+        )
+    return cur.fetchall()
+
+
+def _clients_fts() -> bool:
+    cur = db.conn.cursor()
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='clients_fts';")
+    return cur.fetchone() is not None
+
+
 # DESCANSOS
 def list_days_off(barber_id: int) -> List[dict]:
     cur = db.conn.cursor()
@@ -96,18 +168,27 @@ def list_days_off(barber_id: int) -> List[dict]:
 
 
 def add_day_off(barber_id: int, off_date: date, note: Optional[str] = None) -> None:
-    cur = db.conn.cursor()
-    cur.execute(
-        "INSERT OR IGNORE INTO barber_days_off(barber_id, off_date, note) VALUES(?,?,?);",
-        (barber_id, off_date.isoformat(), note),
-    )
-    db.conn.commit()
+    with db.transaction():
+        cur = db.conn.cursor()
+        cur.execute(
+            "INSERT OR IGNORE INTO barber_days_off(barber_id, off_date, note) VALUES(?,?,?);",
+            (barber_id, off_date.isoformat(), note),
+        )
+
+
+def add_days_off(barber_id: int, off_dates: List[date], note: Optional[str] = None) -> None:
+    with db.transaction():
+        cur = db.conn.cursor()
+        cur.executemany(
+            "INSERT OR IGNORE INTO barber_days_off(barber_id, off_date, note) VALUES(?,?,?);",
+            [(barber_id, d.isoformat(), note) for d in off_dates],
+        )
 
 
 def remove_day_off(barber_id: int, off_date: date) -> None:
-    cur = db.conn.cursor()
-    cur.execute("DELETE FROM barber_days_off WHERE barber_id=? AND off_date=?;", (barber_id, off_date.isoformat()))
-    db.conn.commit()
+    with db.transaction():
+        cur = db.conn.cursor()
+        cur.execute("DELETE FROM barber_days_off WHERE barber_id=? AND off_date=?;", (barber_id, off_date.isoformat()))
 
 
 def is_barber_off(barber_id: int, date_value: date) -> bool:
@@ -119,43 +200,109 @@ def is_barber_off(barber_id: int, date_value: date) -> bool:
     return cur.fetchone() is not None
 
 
-def remove_all_days_off() -> None:
+def days_off_between(barber_id: int, start_date: date, end_date: date) -> Set[str]:
+    """Fechas ISO de descanso del barbero entre start_date y end_date, ambos incluidos."""
     cur = db.conn.cursor()
-    cur.execute("DELETE FROM barber_days_off;")
-    db.conn.commit()
+    cur.execute(
+        "SELECT off_date FROM barber_days_off WHERE barber_id=? AND off_date BETWEEN ? AND ?;",
+        (barber_id, start_date.isoformat(), end_date.isoformat()),
+    )
+    return {r[0] for r in cur.fetchall()}
 
 
-# CITAS
-def list_appointments_by_range(start_iso: str, end_iso: str, barber_id: Optional[int] = None, status: Optional[str] = None) -> List[dict]:
+def barbers_off_on(date_value: date) -> Set[int]:
     cur = db.conn.cursor()
-    query = "SELECT * FROM appointments WHERE start_dt BETWEEN ? AND ?"
-    params: Tuple = (start_iso, end_iso)
+    cur.execute("SELECT barber_id FROM barber_days_off WHERE off_date=?;", (date_value.isoformat(),))
+    return {r[0] for r in cur.fetchall()}
+
+
+def remove_all_days_off() -> None:
+    with db.transaction():
+        cur = db.conn.cursor()
+        cur.execute("DELETE FROM barber_days_off;")
+
+
+# CITAS
+def list_appointments_by_range(start: datetime, end: datetime, barber_id: Optional[int] = None, status: Optional[str] = None) -> List[Appointment]:
+    cur = _con_modelo(Appointment)
+    query = f"SELECT {Appointment.columnas()} FROM appointments WHERE start_min BETWEEN ? AND ?"
+    params: Tuple = (to_epoch_min(start), to_epoch_min(end))
     if barber_id:
         query += " AND barber_id=?"
         params += (barber_id,)
     if status:
         query += " AND status=?"
         params += (status,)
-    query += " ORDER BY start_dt;"
+    query += " ORDER BY start_min;"
     cur.execute(query, params)
-    return [dict(r) for r in cur.fetchall()]
+    return cur.fetchall()
+
+
+def list_agenda_by_range(start: datetime, end: datetime, barber_id: Optional[int] = None, status: Optional[str] = None) -> List[AgendaItem]:
+    """Citas del rango ya unidas con nombre de barbero, cliente, teléfono y servicio (una sola consulta)."""
+    cur = _con_modelo(AgendaItem)
+    query = f"SELECT {AgendaItem.columnas()} FROM v_agenda WHERE start_min BETWEEN ? AND ?"
+    params: Tuple = (to_epoch_min(start), to_epoch_min(end))
+    if barber_id:
+        query += " AND barber_id=?"
+        params += (barber_id,)
+    if status:
+        query += " AND status=?"
+        params += (status,)
+    query += " ORDER BY start_min;"
+    cur.execute(query, params)
+    return cur.fetchall()
+
+
+def list_busy_intervals(start: datetime, end: datetime, barber_id: Optional[int] = None) -> List[Tuple[int, int, int]]:
+    """(barber_id, start_min, end_min) de las citas RESERVADA/ATENDIDA que empiezan en [start, end)."""
+    cur = db.conn.cursor()
+    cur.row_factory = None
+    query = """
+    SELECT barber_id, start_min, end_min FROM appointments
+    WHERE start_min >= ? AND start_min < ?
+    AND status IN ('RESERVADA', 'ATENDIDA')
+    """
+    params: Tuple = (to_epoch_min(start), to_epoch_min(end))
+    if barber_id:
+        query += " AND barber_id=?"
+        params += (barber_id,)
+    cur.execute(query, params)
+    return cur.fetchall()
 
 
 def count_appointments_for_barber_and_date(barber_id: int, date_str: str) -> int:
+    # Rango de minutos del día para usar idx_appointments_barber_start_min
+    day_start = to_day_number(date.fromisoformat(date_str)) * 1440
     cur = db.conn.cursor()
     cur.execute(
-        "SELECT COUNT(*) FROM appointments WHERE barber_id=? AND date(start_dt)=? AND status IN ('RESERVADA','ATENDIDA');",
-        (barber_id, date_str),
+        """
+        SELECT COUNT(*) FROM appointments
+        WHERE barber_id=? AND start_min >= ? AND start_min < ? AND status IN ('RESERVADA','ATENDIDA');
+        """,
+        (barber_id, day_start, day_start + 1440),
     )
     row = cur.fetchone()
     return row[0] if row else 0
 
 
-def get_appointment(appointment_id: int) -> Optional[dict]:
+def appointment_dates_between(barber_id: int, start_date: date, end_date: date) -> Set[date]:
+    """Fechas con citas RESERVADA/ATENDIDA del barbero entre start_date y end_date, ambos incluidos."""
     cur = db.conn.cursor()
-    cur.execute("SELECT * FROM appointments WHERE id=?;", (appointment_id,))
-    row = cur.fetchone()
-    return dict(row) if row else None
+    cur.execute(
+        """
+        SELECT DISTINCT start_day FROM appointments
+        WHERE barber_id=? AND start_min >= ? AND start_min < ? AND status IN ('RESERVADA','ATENDIDA');
+        """,
+        (barber_id, to_day_number(start_date) * 1440, (to_day_number(end_date) + 1) * 1440),
+    )
+    return {from_day_number(r[0]) for r in cur.fetchall()}
+
+
+def get_appointment(appointment_id: int) -> Optional[Appointment]:
+    cur = _con_modelo(Appointment)
+    cur.execute(f"SELECT {Appointment.columnas()} FROM appointments WHERE id=?;", (appointment_id,))
+    return cur.fetchone()
 
 
 def create_appointment(
@@ -167,27 +314,52 @@ def create_appointment(
     status: str,
     notes: Optional[str],
 ) -> int:
-    cur = db.conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO appointments(barber_id, primary_service_id, client_id, start_dt, end_dt, status, notes, created_at)
-        VALUES(?,?,?,?,?,?,?,?);
-        """,
-        (
-            barber_id,
-            primary_service_id,
-            client_id,
-            to_iso(start_dt),
-            to_iso(end_dt),
-            status,
-            notes,
-            datetime.utcnow().isoformat(),
-        ),
-    )
-    db.conn.commit()
+    with db.transaction():
+        cur = db.conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO appointments(barber_id, primary_service_id, client_id, start_dt, end_dt, status, notes, created_at)
+            VALUES(?,?,?,?,?,?,?,?);
+            """,
+            (
+                barber_id,
+                primary_service_id,
+                client_id,
+                to_iso(start_dt),
+                to_iso(end_dt),
+                status,
+                notes,
+                datetime.utcnow().isoformat(),
+            ),
+        )
     return cur.lastrowid
 
 
+def create_appointments(
+    barber_id: int,
+    primary_service_id: int,
+    client_id: Optional[int],
+    intervals: List[Tuple[datetime, datetime]],
+    status: str,
+    notes: Optional[str],
+) -> int:
+    """Inserta varias citas del mismo barbero y servicio con un solo executemany."""
+    created_at = datetime.utcnow().isoformat()
+    with db.transaction():
+        cur = db.conn.cursor()
+        cur.executemany(
+            """
+            INSERT INTO appointments(barber_id, primary_service_id, client_id, start_dt, end_dt, status, notes, created_at)
+            VALUES(?,?,?,?,?,?,?,?);
+            """,
+            [
+                (barber_id, primary_service_id, client_id, to_iso(start_dt), to_iso(end_dt), status, notes, created_at)
+                for start_dt, end_dt in intervals
+            ],
+        )
+    return len(intervals)
+
+
 def update_appointment(
     appointment_id: int,
     barber_id: int,
@@ -197,96 +369,158 @@ def update_appointment(
     notes: Optional[str],
     primary_service_id: Optional[int],
 ) -> None:
-    cur = db.conn.cursor()
-    cur.execute(
-        """
-        UPDATE appointments
-        SET barber_id=?, start_dt=?, end_dt=?, status=?, notes=?, primary_service_id=?
-        WHERE id=?;
-        """,
-        (barber_id, to_iso(start_dt), to_iso(end_dt), status, notes, primary_service_id, appointment_id),
-    )
-    db.conn.commit()
+    with db.transaction():
+        cur = db.conn.cursor()
+        # Si la cita ya está cobrada y cambia de barbero, el acumulado diario se mueve con ella
+        _apply_daily_totals(cur, appointment_id, -1)
+        cur.execute(
+            """
+            UPDATE appointments
+            SET barber_id=?, start_dt=?, end_dt=?, status=?, notes=?, primary_service_id=?
+            WHERE id=?;
+            """,
+            (barber_id, to_iso(start_dt), to_iso(end_dt), status, notes, primary_service_id, appointment_id),
+        )
+        _apply_daily_totals(cur, appointment_id, 1)
 
 
 def update_appointment_status(appointment_id: int, status: str) -> None:
-    cur = db.conn.cursor()
-    cur.execute("UPDATE appointments SET status=? WHERE id=?;", (status, appointment_id))
-    db.conn.commit()
+    with db.transaction():
+        cur = db.conn.cursor()
+        cur.execute("UPDATE appointments SET status=? WHERE id=?;", (status, appointment_id))
 
 
 def delete_appointment(appointment_id: int) -> None:
-    cur = db.conn.cursor()
-    cur.execute("DELETE FROM appointments WHERE id=?;", (appointment_id,))
-    db.conn.commit()
+    with db.transaction():
+        cur = db.conn.cursor()
+        cur.execute("DELETE FROM appointments WHERE id=?;", (appointment_id,))
 
 
 def has_overlap(barber_id: int, start_dt: datetime, end_dt: datetime, exclude_id: Optional[int] = None) -> bool:
+    # Las citas no cruzan de día: basta buscar las que empiezan entre la medianoche y
+    # end_dt, un rango acotado sobre idx_appointments_barber_start_min sin importar el histórico
     cur = db.conn.cursor()
     query = """
     SELECT 1 FROM appointments
     WHERE barber_id=?
+    AND start_min >= ? AND start_min < ?
+    AND end_min > ?
     AND status IN ('RESERVADA', 'ATENDIDA')
-    AND NOT(end_dt <= ? OR start_dt >= ?)
     """
-    params: Tuple = (barber_id, to_iso(start_dt), to_iso(end_dt))
+    start_min = to_epoch_min(start_dt)
+    params: Tuple = (barber_id, start_min - start_min % 1440, to_epoch_min(end_dt), start_min)
     if exclude_id:
         query += " AND id != ?"
         params += (exclude_id,)
-    cur.execute(query, params)
+    cur.execute(query + " LIMIT 1;", params)
     return cur.fetchone() is not None
 
 
 # PAGOS
 def create_payment(
     appointment_id: int,
-    total_amount: float,
-    barber_total: float,
-    shop_total: float,
+    total_amount: int,
+    barber_total: int,
+    shop_total: int,
     payment_method: str,
     paid_at: datetime,
-    lines: List[Tuple[int, int, float, float, float]],
+    lines: List[Tuple[int, int, int, int, int, int]],
 ) -> int:
-    cur = db.conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO payments(appointment_id, total_amount, barber_total, shop_total, payment_method, paid_at)
-        VALUES(?,?,?,?,?,?);
-        """,
-        (appointment_id, total_amount, barber_total, shop_total, payment_method, to_iso(paid_at)),
-    )
-    payment_id = cur.lastrowid
-    cur.executemany(
-        """
-        INSERT INTO appointment_service_lines(appointment_id, service_id, qty, unit_price_snapshot, barber_earning_snapshot, shop_liquidation_snapshot)
-        VALUES(?,?,?,?,?,?);
-        """,
-        lines,
-    )
-    db.conn.commit()
+    with db.transaction():
+        cur = db.conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO payments(appointment_id, total_amount, barber_total, shop_total, payment_method, paid_at)
+            VALUES(?,?,?,?,?,?);
+            """,
+            (appointment_id, total_amount, barber_total, shop_total, payment_method, to_iso(paid_at)),
+        )
+        payment_id = cur.lastrowid
+        cur.executemany(
+            """
+            INSERT INTO appointment_service_lines(appointment_id, service_id, qty, unit_price_snapshot, barber_earning_snapshot, shop_liquidation_snapshot)
+            VALUES(?,?,?,?,?,?);
+            """,
+            lines,
+        )
+        _apply_daily_totals(cur, appointment_id, 1)
     return payment_id
 
 
-def list_payments_by_range(start_iso: str, end_iso: str) -> List[dict]:
-    cur = db.conn.cursor()
-    cur.execute("SELECT * FROM payments WHERE paid_at BETWEEN ? AND ? ORDER BY paid_at;", (start_iso, end_iso))
-    return [dict(r) for r in cur.fetchall()]
+def list_payments_by_range(start: datetime, end: datetime) -> List[Payment]:
+    cur = _con_modelo(Payment)
+    cur.execute(
+        f"SELECT {Payment.columnas()} FROM payments WHERE paid_min BETWEEN ? AND ? ORDER BY paid_min;",
+        (to_epoch_min(start), to_epoch_min(end)),
+    )
+    return cur.fetchall()
 
 
-def get_payment_with_lines(appointment_id: int) -> Optional[Tuple[dict, List[dict]]]:
-    cur = db.conn.cursor()
-    cur.execute("SELECT * FROM payments WHERE appointment_id=?;", (appointment_id,))
+def get_payment_with_lines(appointment_id: int) -> Optional[Tuple[Payment, List[ServiceLine]]]:
+    cur = _con_modelo(Payment)
+    cur.execute(f"SELECT {Payment.columnas()} FROM payments WHERE appointment_id=?;", (appointment_id,))
     pay = cur.fetchone()
     if not pay:
         return None
-    cur.execute("SELECT * FROM appointment_service_lines WHERE appointment_id=?;", (appointment_id,))
-    lines = cur.fetchall()
-    return dict(pay), [dict(l) for l in lines]
+    cur = _con_modelo(ServiceLine)
+    cur.execute(
+        f"SELECT {ServiceLine.columnas()} FROM appointment_service_lines WHERE appointment_id=? ORDER BY id;",
+        (appointment_id,),
+    )
+    return pay, cur.fetchall()
 
 
-def delete_payment(appointment_id: int) -> None:
-    cur = db.conn.cursor()
-    cur.execute("DELETE FROM appointment_service_lines WHERE appointment_id=?;", (appointment_id,))
-    cur.execute("DELETE FROM payments WHERE appointment_id=?;", (appointment_id,))
-    db.conn.commit()
+def delete_payment(appointment_id: int) -> int:
+    """Borra el cobro de la cita y devuelve cuántos cobros se borraron (0 si no está en la base activa)."""
+    with db.transaction():
+        cur = db.conn.cursor()
+        _apply_daily_totals(cur, appointment_id, -1)
+        cur.execute("DELETE FROM appointment_service_lines WHERE appointment_id=?;", (appointment_id,))
+        cur.execute("DELETE FROM payments WHERE appointment_id=?;", (appointment_id,))
+        return cur.rowcount
+
+
+# ACUMULADOS DIARIOS
+def _apply_daily_totals(cur, appointment_id: int, sign: int) -> None:
+    """Suma (sign=1) o resta (sign=-1) el pago de la cita en daily_totals; debe ir dentro de una transacción."""
+    cur.execute(
+        """
+        INSERT INTO daily_totals(day, barber_id, payment_method, payments_count, total_amount, barber_total, shop_total)
+        SELECT p.paid_day, a.barber_id, p.payment_method, ?, ? * p.total_amount, ? * p.barber_total, ? * p.shop_total
+        FROM payments p
+        JOIN appointments a ON a.id = p.appointment_id
+        WHERE p.appointment_id = ?
+        ON CONFLICT(day, barber_id, payment_method) DO UPDATE SET
+            payments_count = payments_count + excluded.payments_count,
+            total_amount = total_amount + excluded.total_amount,
+            barber_total = barber_total + excluded.barber_total,
+            shop_total = shop_total + excluded.shop_total;
+        """,
+        (sign, sign, sign, sign, appointment_id),
+    )
+    if sign < 0:
+        cur.execute(
+            """
+            DELETE FROM daily_totals
+            WHERE payments_count <= 0
+            AND (day, barber_id, payment_method) IN (
+                SELECT p.paid_day, a.barber_id, p.payment_method
+                FROM payments p
+                JOIN appointments a ON a.id = p.appointment_id
+                WHERE p.appointment_id = ?
+            );
+            """,
+            (appointment_id,),
+        )
+
+
+def rebuild_daily_totals(database: Database = db) -> int:
+    """Recalcula daily_totals desde payments (bases existentes o tras reparaciones)."""
+    with database.transaction():
+        cur = database.conn.cursor()
+        for statement in REBUILD_DAILY_TOTALS_SQL.split(";"):
+            if statement.strip():
+                cur.execute(statement)
+        cur.execute("SELECT COUNT(*) FROM daily_totals;")
+        return cur.fetchone()[0]
 
@@ -1,8 +1,12 @@
-from datetime import datetime, timedelta
-from typing import List, Optional
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
 
 from .. import config, repositories
-from ..utils import add_minutes, is_within_schedule, overlaps
+from ..catalog import catalog
+from ..database import db
+from ..utils import add_minutes, is_within_schedule, overlaps, to_epoch_min
 
 
 class AgendaService:
@@ -26,18 +30,98 @@ class AgendaService:
         self._validar_horario(start_dt, end_dt)
         self._validar_choque(barber_id, start_dt, end_dt)
 
-        client_id = None
-        if client_name:
-            client_id = repositories.get_or_create_client(client_name, client_phone)
-        return repositories.create_appointment(
-            barber_id=barber_id,
-            primary_service_id=servicio_principal_id,
-            client_id=client_id,
-            start_dt=start_dt,
-            end_dt=end_dt,
-            status="RESERVADA",
-            notes=notas,
-        )
+        with db.transaction():
+            client_id = None
+            if client_name:
+                client_id = repositories.get_or_create_client(client_name, client_phone)
+            return repositories.create_appointment(
+                barber_id=barber_id,
+                primary_service_id=servicio_principal_id,
+                client_id=client_id,
+                start_dt=start_dt,
+                end_dt=end_dt,
+                status="RESERVADA",
+                notes=notas,
+            )
+
+    def crear_citas(
+        self,
+        barber_id: int,
+        client_name: Optional[str],
+        client_phone: Optional[str],
+        servicio_principal_id: int,
+        fechas: List[datetime],
+        notas: Optional[str] = None,
+    ) -> Dict[str, list]:
+        """Agenda varias citas del mismo cliente en una sola transacción.
+
+        Valida horario, descansos y choques de todo el lote contra una sola carga del
+        rango de fechas (incluidas las citas del propio lote) y crea las válidas con un
+        executemany. Devuelve {"creadas": [inicio, ...], "conflictos": [(inicio, motivo), ...]}.
+        """
+        servicio = self._get_servicio(servicio_principal_id)
+        self._validar_barbero_activo(barber_id)
+        duracion = timedelta(minutes=servicio["duration_min"])
+        fechas = sorted(set(fechas))
+        creadas: List[datetime] = []
+        conflictos: List[Tuple[datetime, str]] = []
+        if not fechas:
+            return {"creadas": creadas, "conflictos": conflictos}
+
+        desde, hasta = fechas[0].date(), fechas[-1].date()
+        with db.transaction():
+            descansos = repositories.days_off_between(barber_id, desde, hasta)
+            # Minutos ocupados (inicio, fin) por número de día
+            ocupadas: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+            for _b_id, inicio_min, fin_min in repositories.list_busy_intervals(
+                datetime.combine(desde, time.min), datetime.combine(hasta + timedelta(days=1), time.min), barber_id
+            ):
+                ocupadas[inicio_min // 1440].append((inicio_min, fin_min))
+
+            intervalos = []
+            for start_dt in fechas:
+                end_dt = start_dt + duracion
+                try:
+                    self._validar_horario(start_dt, end_dt)
+                except ValueError as exc:
+                    conflictos.append((start_dt, str(exc)))
+                    continue
+                if start_dt.date().isoformat() in descansos:
+                    conflictos.append((start_dt, f"El barbero descansa el {start_dt.strftime('%d/%m/%Y')}"))
+                    continue
+                inicio_min, fin_min = to_epoch_min(start_dt), to_epoch_min(end_dt)
+                del_dia = ocupadas[inicio_min // 1440]
+                if any(overlaps(inicio_min, fin_min, ini, fin) for ini, fin in del_dia):
+                    conflictos.append((start_dt, "Existe un choque de horario con otra cita para el mismo barbero"))
+                    continue
+                del_dia.append((inicio_min, fin_min))
+                intervalos.append((start_dt, end_dt))
+
+            if intervalos:
+                client_id = None
+                if client_name:
+                    client_id = repositories.get_or_create_client(client_name, client_phone)
+                repositories.create_appointments(
+                    barber_id, servicio_principal_id, client_id, intervalos, "RESERVADA", notas
+                )
+                creadas = [inicio for inicio, _fin in intervalos]
+        return {"creadas": creadas, "conflictos": conflictos}
+
+    def crear_citas_semanales(
+        self,
+        barber_id: int,
+        client_name: Optional[str],
+        client_phone: Optional[str],
+        servicio_principal_id: int,
+        fecha: datetime,
+        semanas: int,
+        notas: Optional[str] = None,
+    ) -> Dict[str, list]:
+        """Misma hora cada semana durante `semanas` semanas a partir de `fecha`."""
+        if semanas < 1:
+            raise ValueError("El número de semanas debe ser al menos 1")
+        fechas = [fecha + timedelta(weeks=i) for i in range(semanas)]
+        return self.crear_citas(barber_id, client_name, client_phone, servicio_principal_id, fechas, notas)
 
     def editar_cita(
         self,
@@ -81,12 +165,89 @@ class AgendaService:
         repositories.update_appointment_status(appointment_id, "NO ASISTIÓ")
 
     def listar_por_rango(self, inicio: datetime, fin: datetime, barber_id: Optional[int], estado: Optional[str]):
-        return repositories.list_appointments_by_range(inicio.isoformat(), fin.isoformat(), barber_id, estado)
+        return repositories.list_agenda_by_range(inicio, fin, barber_id, estado)
+
+    def horarios_disponibles(
+        self, fecha: date, servicio_id: int, barber_id: Optional[int] = None
+    ) -> Dict[int, List[datetime]]:
+        """Horas de inicio válidas por barbero para el servicio en la fecha dada.
+
+        Sin barber_id considera todos los barberos activos. Carga las citas del día con
+        una sola consulta, marca en memoria los minutos ocupados de cada barbero y, con
+        sumas acumuladas, descarta en O(1) cada inicio cuyo intervalo toque una cita.
+        Los barberos que descansan ese día quedan con lista vacía.
+        """
+        servicio = self._get_servicio(servicio_id)
+        duracion = servicio["duration_min"]
+        if barber_id:
+            self._validar_barbero_activo(barber_id)
+            barberos = [barber_id]
+        else:
+            barberos = [b["id"] for b in catalog.barbers(include_inactive=False)]
+
+        apertura = datetime.combine(fecha, time(*config.HORARIO_APERTURA))
+        cierre = datetime.combine(fecha, time(*config.HORARIO_CIERRE))
+        jornada = int((cierre - apertura).total_seconds() // 60)
+        ocupado = {b: bytearray(jornada) for b in barberos}
+        dia = datetime.combine(fecha, time.min)
+        apertura_min = to_epoch_min(apertura)
+        for b_id, inicio_min, fin_min in repositories.list_busy_intervals(dia, dia + timedelta(days=1), barber_id):
+            minutos = ocupado.get(b_id)
+            if minutos is None:
+                continue
+            desde = max(0, inicio_min - apertura_min)
+            hasta = min(jornada, fin_min - apertura_min)
+            if hasta > desde:
+                minutos[desde:hasta] = b"\x01" * (hasta - desde)
+
+        descansan = repositories.barbers_off_on(fecha)
+        disponibles: Dict[int, List[datetime]] = {}
+        for b_id in barberos:
+            if b_id in descansan:
+                disponibles[b_id] = []
+                continue
+            acumulado = [0, *accumulate(ocupado[b_id])]
+            disponibles[b_id] = [
+                apertura + timedelta(minutes=m)
+                for m in range(0, jornada - duracion + 1, config.INTERVALO_MINUTOS)
+                if acumulado[m + duracion] == acumulado[m]
+            ]
+        return disponibles
+
+    def marcar_descansos(
+        self,
+        barber_id: int,
+        desde: date,
+        hasta: date,
+        dias_semana: Optional[List[int]] = None,
+        nota: Optional[str] = None,
+    ) -> Dict[str, list]:
+        """Marca descanso en cada fecha de [desde, hasta] cuyo weekday() esté en dias_semana (todas si es None).
+
+        Consulta las citas del rango una sola vez; si alguna fecha tiene citas no marca
+        ninguna y devuelve esas fechas en "conflictos" para reprogramarlas primero.
+        """
+        if hasta < desde:
+            raise ValueError("La fecha final debe ser igual o posterior a la inicial")
+        fechas = [
+            desde + timedelta(days=i)
+            for i in range((hasta - desde).days + 1)
+            if dias_semana is None or (desde + timedelta(days=i)).weekday() in dias_semana
+        ]
+        if not fechas:
+            raise ValueError("Ninguna fecha del rango coincide con los días seleccionados")
+        with db.transaction():
+            con_citas = repositories.appointment_dates_between(barber_id, fechas[0], fechas[-1])
+            conflictos = [f for f in fechas if f in con_citas]
+            if conflictos:
+                return {"marcados": [], "conflictos": conflictos}
+            repositories.add_days_off(barber_id, fechas, nota)
+        return {"marcados": fechas, "conflictos": []}
 
     # Validaciones internas
     def _validar_barbero_activo(self, barber_id: int) -> None:
-        barberos = repositories.list_barbers()
-        if not any(b["id"] == barber_id and b["active"] for b in barberos):
+        barbero = catalog.barber(barber_id)
+        if not barbero or not barbero["active"]:
             raise ValueError("El barbero no está activo")
 
     def _validar_descanso(self, barber_id: int, start_dt: datetime) -> None:
@@ -107,11 +268,10 @@ class AgendaService:
             raise ValueError("Existe un choque de horario con otra cita para el mismo barbero")
 
     def _get_servicio(self, service_id: int) -> dict:
-        servicios = repositories.list_services(include_inactive=False)
-        for s in servicios:
-            if s["id"] == service_id:
-                return s
-        raise ValueError("Servicio no encontrado")
+        servicio = catalog.service(service_id)
+        if not servicio or not servicio["active"]:
+            raise ValueError("Servicio no encontrado")
+        return servicio
 
     def _infer_service_duration(self, cita: dict) -> dict:
         service_id = cita.get("primary_service_id")
@@ -0,0 +1,300 @@
+import sqlite3
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .. import config
+from ..database import Database, db
+from ..models import Appointment, Payment, ServiceLine
+from ..utils import from_epoch_min, to_day_number
+
+# Límite de bases adjuntas por conexión (SQLITE_MAX_ATTACHED por defecto)
+MAX_ADJUNTAS = 10
+
+# Tablas de un archivo anual, con las columnas de la base activa. Los barberos, servicios y
+# clientes siguen solo en la base activa; {esquema} es el nombre con el que se adjunta.
+SCHEMA_ARCHIVO = [
+    """
+    CREATE TABLE IF NOT EXISTS {esquema}.appointments(
+        id INTEGER PRIMARY KEY,
+        barber_id INTEGER NOT NULL,
+        primary_service_id INTEGER,
+        client_id INTEGER,
+        start_dt TEXT NOT NULL,
+        end_dt TEXT NOT NULL,
+        status TEXT NOT NULL,
+        notes TEXT,
+        created_at TEXT NOT NULL,
+        start_min INTEGER NOT NULL,
+        end_min INTEGER NOT NULL,
+        start_day INTEGER NOT NULL
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS {esquema}.payments(
+        id INTEGER PRIMARY KEY,
+        appointment_id INTEGER UNIQUE NOT NULL,
+        total_amount INTEGER NOT NULL,
+        barber_total INTEGER NOT NULL,
+        shop_total INTEGER NOT NULL,
+        payment_method TEXT NOT NULL,
+        paid_at TEXT NOT NULL,
+        paid_min INTEGER NOT NULL,
+        paid_day INTEGER NOT NULL,
+        FOREIGN KEY(appointment_id) REFERENCES appointments(id)
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS {esquema}.appointment_service_lines(
+        id INTEGER PRIMARY KEY,
+        appointment_id INTEGER NOT NULL,
+        service_id INTEGER NOT NULL,
+        qty INTEGER NOT NULL,
+        unit_price_snapshot INTEGER NOT NULL,
+        barber_earning_snapshot INTEGER NOT NULL,
+        shop_liquidation_snapshot INTEGER NOT NULL,
+        FOREIGN KEY(appointment_id) REFERENCES appointments(id)
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS {esquema}.daily_totals(
+        day INTEGER NOT NULL,
+        barber_id INTEGER NOT NULL,
+        payment_method TEXT NOT NULL,
+        payments_count INTEGER NOT NULL DEFAULT 0,
+        total_amount INTEGER NOT NULL DEFAULT 0,
+        barber_total INTEGER NOT NULL DEFAULT 0,
+        shop_total INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY(day, barber_id, payment_method)
+    ) WITHOUT ROWID;
+    """,
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_appointments_start_min ON appointments(start_min);",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_appointments_barber_start_min ON appointments(barber_id, start_min);",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_payments_paid_min ON payments(paid_min);",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_service_lines_appointment ON appointment_service_lines(appointment_id);",
+]
+
+# Citas del año a mover y días de cobro afectados. Se quedan las reservas (aún pueden cobrarse)
+# y las citas cuyo cobro es posterior al corte
+SELECCION_SQL = [
+    "CREATE TEMP TABLE IF NOT EXISTS archivar_citas(id INTEGER PRIMARY KEY);",
+    "CREATE TEMP TABLE IF NOT EXISTS archivar_dias(day INTEGER PRIMARY KEY);",
+    "DELETE FROM temp.archivar_citas;",
+    "DELETE FROM temp.archivar_dias;",
+]
+
+CANDIDATAS_SQL = """
+INSERT INTO temp.archivar_citas(id)
+SELECT a.id
+FROM main.appointments a
+LEFT JOIN main.payments p ON p.appointment_id = a.id
+WHERE a.start_min >= ? AND a.start_min < ? AND a.status != 'RESERVADA' AND (p.id IS NULL OR p.paid_day < ?);
+"""
+
+DIAS_SQL = """
+INSERT OR IGNORE INTO temp.archivar_dias(day)
+SELECT paid_day FROM main.payments WHERE appointment_id IN (SELECT id FROM temp.archivar_citas);
+"""
+
+BORRAR_SQL = [
+    "DELETE FROM main.appointment_service_lines WHERE appointment_id IN (SELECT id FROM temp.archivar_citas);",
+    "DELETE FROM main.payments WHERE appointment_id IN (SELECT id FROM temp.archivar_citas);",
+    "DELETE FROM main.appointments WHERE id IN (SELECT id FROM temp.archivar_citas);",
+]
+
+# daily_totals de los días tocados se recalcula en ambas bases desde sus propios cobros
+RECALCULAR_DIAS_SQL = [
+    "DELETE FROM {esquema}.daily_totals WHERE day IN (SELECT day FROM temp.archivar_dias);",
+    """
+    INSERT INTO {esquema}.daily_totals(day, barber_id, payment_method, payments_count, total_amount, barber_total, shop_total)
+    SELECT p.paid_day, a.barber_id, p.payment_method, COUNT(*),
+           SUM(p.total_amount), SUM(p.barber_total), SUM(p.shop_total)
+    FROM {esquema}.payments p
+    JOIN {esquema}.appointments a ON a.id = p.appointment_id
+    WHERE p.paid_day IN (SELECT day FROM temp.archivar_dias)
+    GROUP BY p.paid_day, a.barber_id, p.payment_method;
+    """,
+]
+
+REGISTRAR_SQL = [
+    """
+    INSERT INTO main.archives(year, path, first_day, last_day, archived_at)
+    SELECT ?, ?, MIN(d), MAX(d), ?
+    FROM (SELECT start_day AS d FROM {esquema}.appointments UNION ALL SELECT paid_day FROM {esquema}.payments)
+    WHERE 1
+    ON CONFLICT(year) DO UPDATE SET
+        path = excluded.path,
+        first_day = excluded.first_day,
+        last_day = excluded.last_day,
+        archived_at = excluded.archived_at;
+    """,
+    "INSERT OR IGNORE INTO main.archive_barbers(year, barber_id) SELECT DISTINCT ?, barber_id FROM {esquema}.appointments;",
+    """
+    INSERT OR IGNORE INTO main.archive_services(year, service_id)
+    SELECT ?, primary_service_id FROM {esquema}.appointments WHERE primary_service_id IS NOT NULL
+    UNION
+    SELECT ?, service_id FROM {esquema}.appointment_service_lines;
+    """,
+]
+
+
+def esquema_archivo(anio: int) -> str:
+    return f"archive_{anio}"
+
+
+def adjuntar_archivos(
+    database: Database, primer_dia: Optional[int] = None, ultimo_dia: Optional[int] = None
+) -> List[str]:
+    """Adjunta los archivos anuales que cubren los días dados y devuelve los esquemas a consultar.
+
+    La lista empieza siempre por "main"; sin días se adjuntan todos los archivos. Los
+    adjuntos quedan en la conexión para las siguientes consultas; solo se sueltan los que
+    sobran si se llega a MAX_ADJUNTAS.
+    """
+    filas = database.conn.execute(
+        "SELECT year, path FROM archives WHERE last_day >= ? AND first_day <= ? ORDER BY year;",
+        (-(1 << 62) if primer_dia is None else primer_dia, (1 << 62) if ultimo_dia is None else ultimo_dia),
+    ).fetchall()
+    if not filas:
+        return ["main"]
+    necesarios = {esquema_archivo(anio): path for anio, path in filas}
+    if len(necesarios) > MAX_ADJUNTAS:
+        raise ValueError(f"El rango abarca más de {MAX_ADJUNTAS} años archivados; consúltelo por partes")
+    adjuntos = database.attached()
+    faltantes = [e for e in necesarios if e not in adjuntos]
+    if len(adjuntos) + len(faltantes) > MAX_ADJUNTAS:
+        for esquema in adjuntos:
+            if esquema.startswith("archive_") and esquema not in necesarios:
+                database.detach(esquema)
+    base = Path(database.db_path).parent
+    for esquema in faltantes:
+        path = base / necesarios[esquema]
+        if not path.exists():
+            raise ValueError(f"No se encuentra el archivo {path}")
+        database.attach(esquema, path)
+    return ["main"] + list(necesarios)
+
+
+def por_fuente(plantilla: str, params: List, fuentes: List[str], **campos) -> Tuple[str, List]:
+    """Repite la consulta de una base ({esquema}) para cada fuente, unida con UNION ALL."""
+    sql = " UNION ALL ".join(plantilla.format(esquema=esquema, **campos) for esquema in fuentes)
+    return sql, params * len(fuentes)
+
+
+class ArchiveService:
+    """Mueve citas y cobros de periodos cerrados a una base por año (archivo/barberia_<año>.db).
+
+    Se archiva cada cita cerrada (no RESERVADA) que empezó antes del corte, con su cobro y sus
+    líneas, salvo que el cobro sea posterior al corte; va al archivo del año de la cita. El
+    corte no puede ser posterior al primer día del mes actual. Cada año se mueve en su
+    propia transacción. Reportes y exportaciones leen los archivos con ATTACH; la agenda y
+    los cobros solo ven la base activa.
+    """
+
+    def __init__(self, database: Database = db):
+        self.db = database
+
+    @staticmethod
+    def corte_por_meses(meses: int = config.ARCHIVO_MESES, hoy: Optional[date] = None) -> date:
+        """Primer día del mes de hace `meses` meses: se archivan solo meses completos."""
+        hoy = hoy or date.today()
+        total = hoy.year * 12 + hoy.month - 1 - meses
+        return date(total // 12, total % 12 + 1, 1)
+
+    def archivar(
+        self, antes_de: date, backup_dir: Optional[Path] = config.BACKUP_DIR, compactar: bool = True
+    ) -> Dict:
+        """Archiva todo lo anterior a `antes_de` y devuelve lo movido por año.
+
+        Con `backup_dir` se respalda la base activa antes de mover y cada archivo tocado
+        después. Con `compactar` se hace VACUUM para que el archivo de la base activa se reduzca.
+        """
+        from .backup_service import perform_backup
+
+        if antes_de > date.today().replace(day=1):
+            raise ValueError("Solo se pueden archivar meses cerrados: el corte debe ser a más tardar el primer día del mes")
+        corte = to_day_number(antes_de)
+        primero = self.db.conn.execute(
+            "SELECT MIN(start_min) FROM appointments WHERE start_min < ?;", (corte * 1440,)
+        ).fetchone()[0]
+        resultado = {"corte": antes_de.isoformat(), "backup": None, "anios": {}}
+        if primero is None:
+            return resultado
+        if backup_dir is not None:
+            resultado["backup"] = str(perform_backup(Path(self.db.db_path), backup_dir))
+
+        ultimo_anio = (antes_de - timedelta(days=1)).year
+        for anio in range(from_epoch_min(primero).year, ultimo_anio + 1):
+            movido = self._archivar_anio(anio, corte)
+            if movido is None:
+                continue
+            resultado["anios"][anio] = movido
+            if backup_dir is not None:
+                perform_backup(Path(movido["archivo"]), backup_dir, prefijo=f"archivo_{anio}")
+        if resultado["anios"] and compactar:
+            self.db.conn.execute("VACUUM;")
+        return resultado
+
+    def _archivar_anio(self, anio: int, corte: int) -> Optional[Dict]:
+        desde = to_day_number(date(anio, 1, 1))
+        hasta = min(corte, to_day_number(date(anio + 1, 1, 1)))
+        if desde >= hasta:
+            return None
+        conn = self.db.conn
+        if not conn.execute(
+            "SELECT 1 FROM appointments WHERE start_min >= ? AND start_min < ? LIMIT 1;", (desde * 1440, hasta * 1440)
+        ).fetchone():
+            return None
+
+        esquema = esquema_archivo(anio)
+        relativo = f"{config.ARCHIVO_CARPETA}/barberia_{anio}.db"
+        path = Path(self.db.db_path).parent / relativo
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db.attach(esquema, path)
+        try:
+            with self.db.transaction() as conn:
+                for sql in SCHEMA_ARCHIVO:
+                    conn.execute(sql.format(esquema=esquema))
+                for sql in SELECCION_SQL:
+                    conn.execute(sql)
+                conn.execute(CANDIDATAS_SQL, (desde * 1440, hasta * 1440, corte))
+                citas = conn.execute("SELECT COUNT(*) FROM temp.archivar_citas;").fetchone()[0]
+                if citas == 0:
+                    return None
+                conn.execute(DIAS_SQL)
+                cobros = self._copiar(conn, esquema)
+                for sql in BORRAR_SQL:
+                    conn.execute(sql)
+                for destino in ("main", esquema):
+                    for sql in RECALCULAR_DIAS_SQL:
+                        conn.execute(sql.format(esquema=destino))
+                ahora = datetime.now().isoformat(timespec="seconds")
+                conn.execute(REGISTRAR_SQL[0].format(esquema=esquema), (anio, relativo, ahora))
+                conn.execute(REGISTRAR_SQL[1].format(esquema=esquema), (anio,))
+                conn.execute(REGISTRAR_SQL[2].format(esquema=esquema), (anio, anio))
+                if conn.execute(f"PRAGMA {esquema}.foreign_key_check;").fetchone():
+                    raise sqlite3.IntegrityError(f"Referencias rotas en el archivo de {anio}")
+        finally:
+            self.db.detach(esquema)
+        return {"citas": citas, "cobros": cobros, "archivo": str(path)}
+
+    @staticmethod
+    def _copiar(conn: sqlite3.Connection, esquema: str) -> int:
+        seleccion = "SELECT id FROM temp.archivar_citas"
+        conn.execute(
+            f"INSERT INTO {esquema}.appointments({Appointment.columnas()}) "
+            f"SELECT {Appointment.columnas()} FROM main.appointments WHERE id IN ({seleccion});"
+        )
+        cur = conn.execute(
+            f"INSERT INTO {esquema}.payments({Payment.columnas()}) "
+            f"SELECT {Payment.columnas()} FROM main.payments WHERE appointment_id IN ({seleccion});"
+        )
+        cobros = cur.rowcount
+        conn.execute(
+            f"INSERT INTO {esquema}.appointment_service_lines({ServiceLine.columnas()}) "
+            f"SELECT {ServiceLine.columnas()} FROM main.appointment_service_lines WHERE appointment_id IN ({seleccion});"
+        )
+        return cobros
+
+
+archive_service = ArchiveService()
@@ -1,29 +1,130 @@
-import shutil
+import logging
+import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
+from typing import Callable, Optional
 
 from .. import config
+from ..database import Database
 
+logger = logging.getLogger(__name__)
 
-def perform_backup(db_path: Path = config.DB_PATH, backup_dir: Path = config.BACKUP_DIR, keep: int = 30) -> Path:
+# Páginas copiadas por paso; entre pasos otras conexiones pueden seguir escribiendo
+PAGES_PER_STEP = 256
+# Las copias periódicas rotan aparte para no desplazar las de inicio y cierre de sesión
+PREFIJO_PERIODICO = "periodico"
+PREFIJO_PREMIGRACION = "premigracion"
+
+_backup_lock = threading.Lock()
+
+
+def perform_backup(
+    db_path: Path = config.DB_PATH,
+    backup_dir: Path = config.BACKUP_DIR,
+    keep: int = config.BACKUP_KEEP,
+    pages: int = PAGES_PER_STEP,
+    prefijo: str = "barberia",
+) -> Path:
+    """Copia consistente de la base en uso (API de backup de SQLite) verificada con quick_check.
+
+    Se conservan las últimas `keep` copias con el mismo `prefijo` (p. ej. archivo_2024 para un archivo anual).
+    """
     backup_dir.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    target = backup_dir / f"barberia_{ts}.db"
-    shutil.copy(db_path, target)
-    _trim_backups(backup_dir, keep)
+    # Con microsegundos: una copia de cierre y una periódica simultáneas no comparten nombre
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    target = backup_dir / f"{prefijo}_{ts}.db"
+    tmp = target.with_name(target.name + ".tmp")
+    with _backup_lock:
+        source = sqlite3.connect(db_path)
+        try:
+            dest = sqlite3.connect(tmp)
+            try:
+                source.backup(dest, pages=pages)
+                resultado = dest.execute("PRAGMA quick_check;").fetchone()[0]
+            finally:
+                dest.close()
+        finally:
+            source.close()
+        if resultado != "ok":
+            tmp.unlink(missing_ok=True)
+            raise RuntimeError(f"El backup no pasó la verificación: {resultado}")
+        tmp.replace(target)
+        _trim_backups(backup_dir, keep, prefijo)
     return target
 
 
-def _trim_backups(backup_dir: Path, keep: int) -> None:
-    files = sorted(backup_dir.glob("barberia_*.db"), key=lambda p: p.stat().st_mtime, reverse=True)
-    for old in files[keep:]:
+def backup_before_migrations(database: Database, backup_dir: Path = config.BACKUP_DIR) -> Optional[Path]:
+    """Copia una base existente antes de aplicar migraciones pendientes (la 6 reconstruye tablas).
+
+    Devuelve None si la base es nueva o ya está al día.
+    """
+    path = Path(database.db_path)
+    if not path.exists() or path.stat().st_size == 0 or not database.pending_migrations():
+        return None
+    return perform_backup(path, backup_dir, prefijo=PREFIJO_PREMIGRACION)
+
+
+def perform_backup_async(
+    on_done: Optional[Callable[[Optional[Path], Optional[Exception]], None]] = None, **kwargs
+) -> threading.Thread:
+    """Ejecuta perform_backup en un hilo para no bloquear la interfaz."""
+
+    def run():
         try:
-            old.unlink()
-        except Exception:
-            pass
+            path = perform_backup(**kwargs)
+        except Exception as exc:
+            logger.exception("Falló el backup")
+            if on_done:
+                on_done(None, exc)
+            return
+        if on_done:
+            on_done(path, None)
+
+    # No daemon: si la app se cierra a mitad de copia, el backup termina antes de salir
+    thread = threading.Thread(target=run, name="backup")
+    thread.start()
+    return thread
+
+
+class BackupScheduler:
+    """Lanza un backup en segundo plano cada `interval_s` segundos hasta stop().
+
+    Salvo que se indique otra cosa, las copias llevan PREFIJO_PERIODICO y conservan
+    BACKUP_PERIODICO_KEEP, separadas de las de inicio y cierre.
+    """
 
+    def __init__(self, interval_s: float, **backup_kwargs):
+        self.interval_s = interval_s
+        backup_kwargs.setdefault("prefijo", PREFIJO_PERIODICO)
+        backup_kwargs.setdefault("keep", config.BACKUP_PERIODICO_KEEP)
+        self.backup_kwargs = backup_kwargs
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
 
+    def start(self) -> None:
+        if self._thread is not None or self.interval_s <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="backup-scheduler", daemon=True)
+        self._thread.start()
 
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
 
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                perform_backup(**self.backup_kwargs)
+            except Exception:
+                logger.exception("Falló el backup periódico")
 
 
+def _trim_backups(backup_dir: Path, keep: int, prefijo: str = "barberia") -> None:
+    files = sorted(backup_dir.glob(f"{prefijo}_*.db"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in files[keep:]:
+        try:
+            old.unlink()
+        except Exception:
+            pass
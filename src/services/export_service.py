@@ -0,0 +1,215 @@
+import csv
+import json
+import os
+from datetime import datetime
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..database import Database, db
+from ..utils import to_day_number, to_epoch_min
+from .archive_service import adjuntar_archivos, por_fuente
+
+FORMATOS = ("csv", "jsonl")
+
+# Cada conjunto: consulta de una base ({esquema}) con {filtro}, columna de minutos para
+# --desde/--hasta, columnas CSV y orden final. Citas y cobros se leen también de los
+# archivos anuales. El id autoincremental sirve de marca para exportar solo lo nuevo.
+CONJUNTOS: Dict[str, Dict] = {
+    "citas": {
+        "sql": """
+            SELECT a.id, a.start_dt, a.end_dt, a.status, a.barber_id, b.name AS barber_name, a.client_id,
+                   c.name AS client_name, c.phone AS client_phone, a.primary_service_id, s.name AS service_name,
+                   a.notes, a.created_at
+            FROM {esquema}.appointments a
+            LEFT JOIN barbers b ON b.id = a.barber_id
+            LEFT JOIN clients c ON c.id = a.client_id
+            LEFT JOIN services s ON s.id = a.primary_service_id
+            WHERE {filtro}
+        """,
+        "id": "a.id",
+        "fecha": "a.start_min",
+        "orden": "id",
+        "archivo": True,
+        "columnas": [
+            "id", "start_dt", "end_dt", "status", "barber_id", "barber_name", "client_id", "client_name",
+            "client_phone", "primary_service_id", "service_name", "notes", "created_at",
+        ],
+    },
+    "cobros": {
+        "sql": """
+            SELECT p.id, p.appointment_id, p.paid_at, p.payment_method, p.total_amount, p.barber_total, p.shop_total,
+                   a.barber_id, b.name AS barber_name, a.client_id,
+                   l.service_id, s.name AS service_name, l.qty, l.unit_price_snapshot,
+                   l.barber_earning_snapshot, l.shop_liquidation_snapshot, l.id AS line_id
+            FROM {esquema}.payments p
+            JOIN {esquema}.appointments a ON a.id = p.appointment_id
+            LEFT JOIN barbers b ON b.id = a.barber_id
+            LEFT JOIN {esquema}.appointment_service_lines l ON l.appointment_id = p.appointment_id
+            LEFT JOIN services s ON s.id = l.service_id
+            WHERE {filtro}
+        """,
+        "id": "p.id",
+        "fecha": "p.paid_min",
+        "orden": "id, line_id",
+        "archivo": True,
+        "columnas": [
+            "id", "appointment_id", "paid_at", "payment_method", "total_amount", "barber_total", "shop_total",
+            "barber_id", "barber_name", "client_id", "service_id", "service_name", "qty", "unit_price_snapshot",
+            "barber_earning_snapshot", "shop_liquidation_snapshot",
+        ],
+    },
+    "clientes": {
+        "sql": "SELECT id, name, phone, phone_key FROM clients WHERE {filtro}",
+        "id": "id",
+        "fecha": None,
+        "orden": "id",
+        "archivo": False,
+        "columnas": ["id", "name", "phone", "phone_key"],
+    },
+}
+
+COLUMNAS_LINEA = [
+    "service_id", "service_name", "qty", "unit_price_snapshot", "barber_earning_snapshot", "shop_liquidation_snapshot",
+]
+
+
+class ExportService:
+    """Exporta citas, cobros y clientes a CSV o JSON Lines sin cargar el rango completo en memoria.
+
+    Las filas se leen con fetchmany y se escriben a medida que llegan. En CSV cada línea
+    de servicio de un cobro es una fila (los datos del cobro se repiten); en JSON Lines
+    cada cobro es un objeto con su lista "lineas". Citas y cobros incluyen los archivos
+    anuales que cubre el rango (todos si no hay fechas).
+    """
+
+    def __init__(self, database: Database = db, tamano_lote: int = 1000):
+        self.db = database
+        self.tamano_lote = tamano_lote
+
+    def iter_filas(
+        self,
+        conjunto: str,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        despues_de_id: int = 0,
+    ) -> Iterator[Dict]:
+        spec = self._spec(conjunto)
+        condiciones = [f"{spec['id']} > ?"]
+        params: List = [despues_de_id]
+        if spec["fecha"] and desde:
+            condiciones.append(f"{spec['fecha']} >= ?")
+            params.append(to_epoch_min(desde))
+        if spec["fecha"] and hasta:
+            condiciones.append(f"{spec['fecha']} <= ?")
+            params.append(to_epoch_min(hasta))
+        fuentes = ["main"]
+        if spec["archivo"]:
+            fuentes = adjuntar_archivos(
+                self.db, to_day_number(desde.date()) if desde else None, to_day_number(hasta.date()) if hasta else None
+            )
+        sql, params = por_fuente(spec["sql"], params, fuentes, filtro=" AND ".join(condiciones))
+        cur = self.db.conn.cursor()
+        cur.execute(f"SELECT {', '.join(spec['columnas'])} FROM ({sql}) ORDER BY {spec['orden']}", params)
+        while True:
+            filas = cur.fetchmany(self.tamano_lote)
+            if not filas:
+                break
+            for fila in filas:
+                yield dict(fila)
+
+    def iter_cobros(self, **filtros) -> Iterator[Dict]:
+        """Un dict por cobro con sus líneas de servicio en "lineas" (agrupa filas consecutivas)."""
+        for _pago_id, filas in groupby(self.iter_filas("cobros", **filtros), key=lambda f: f["id"]):
+            primera = next(filas)
+            lineas = [primera] + list(filas)
+            cobro = {k: v for k, v in primera.items() if k not in COLUMNAS_LINEA}
+            cobro["lineas"] = [{k: l[k] for k in COLUMNAS_LINEA} for l in lineas if l["service_id"] is not None]
+            yield cobro
+
+    def exportar(
+        self,
+        conjunto: str,
+        formato: str,
+        destino: Path,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        incremental: bool = False,
+        estado_path: Optional[Path] = None,
+    ) -> Dict:
+        """Escribe el conjunto en `destino` y devuelve {"filas", "ultimo_id", "path"}.
+
+        Con `incremental` solo incluye registros con id mayor al de la última exportación
+        incremental del mismo conjunto y actualiza esa marca al terminar bien; no admite
+        `desde`/`hasta`, que dejarían la marca por encima de registros sin exportar. Las marcas se
+        guardan en estado_path (por defecto exportaciones.json junto a la base). En citas cuenta la creación: los cambios de estado de citas ya
+        exportadas no se vuelven a exportar.
+        """
+        self._spec(conjunto)
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato no soportado: {formato}")
+        if incremental and (desde or hasta):
+            raise ValueError("La exportación incremental no admite rango de fechas")
+        estado_path = estado_path or Path(self.db.db_path).with_name("exportaciones.json")
+        estado = self._leer_estado(estado_path) if incremental else {}
+        despues_de_id = estado.get(conjunto, {}).get("ultimo_id", 0)
+        filtros = {"desde": desde, "hasta": hasta, "despues_de_id": despues_de_id}
+
+        tmp = destino.with_name(destino.name + ".tmp")
+        try:
+            with open(tmp, "w", newline="", encoding="utf-8") as archivo:
+                if formato == "csv":
+                    filas, ultimo_id = self._escribir_csv(archivo, conjunto, filtros)
+                else:
+                    filas, ultimo_id = self._escribir_jsonl(archivo, conjunto, filtros)
+            os.replace(tmp, destino)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+        ultimo_id = max(ultimo_id, despues_de_id)
+        if incremental:
+            estado[conjunto] = {"ultimo_id": ultimo_id, "fecha": datetime.now().isoformat(timespec="seconds")}
+            self._guardar_estado(estado_path, estado)
+        return {"filas": filas, "ultimo_id": ultimo_id, "path": destino}
+
+    def _escribir_csv(self, archivo, conjunto: str, filtros: Dict) -> Tuple[int, int]:
+        columnas = CONJUNTOS[conjunto]["columnas"]
+        writer = csv.writer(archivo)
+        writer.writerow(columnas)
+        filas = ultimo_id = 0
+        for fila in self.iter_filas(conjunto, **filtros):
+            writer.writerow([fila[c] for c in columnas])
+            filas += 1
+            ultimo_id = fila["id"]
+        return filas, ultimo_id
+
+    def _escribir_jsonl(self, archivo, conjunto: str, filtros: Dict) -> Tuple[int, int]:
+        registros = self.iter_cobros(**filtros) if conjunto == "cobros" else self.iter_filas(conjunto, **filtros)
+        filas = ultimo_id = 0
+        for registro in registros:
+            archivo.write(json.dumps(registro, ensure_ascii=False, default=str))
+            archivo.write("\n")
+            filas += 1
+            ultimo_id = registro["id"]
+        return filas, ultimo_id
+
+    def _spec(self, conjunto: str) -> Dict:
+        if conjunto not in CONJUNTOS:
+            raise ValueError(f"Conjunto no soportado: {conjunto}")
+        return CONJUNTOS[conjunto]
+
+    @staticmethod
+    def _leer_estado(path: Path) -> Dict:
+        if not path.exists():
+            return {}
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    @staticmethod
+    def _guardar_estado(path: Path, estado: Dict) -> None:
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(estado, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+export_service = ExportService()
@@ -0,0 +1,103 @@
+import argparse
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict
+
+from .. import config
+from ..database import Database
+
+logger = logging.getLogger(__name__)
+
+
+def run_maintenance(db_path: Path = config.DB_PATH) -> None:
+    """Mantenimiento liviano en su propia conexión: actualiza estadísticas del planificador."""
+    database = Database(db_path)
+    try:
+        database.conn.execute("PRAGMA optimize;")
+    finally:
+        database.close()
+
+
+def run_maintenance_async(db_path: Path = config.DB_PATH) -> threading.Thread:
+    def run():
+        try:
+            run_maintenance(db_path)
+        except Exception:
+            logger.exception("Falló el mantenimiento de la base de datos")
+
+    thread = threading.Thread(target=run, name="mantenimiento", daemon=True)
+    thread.start()
+    return thread
+
+
+def rebuild_daily_totals(db_path: Path = config.DB_PATH) -> int:
+    """Aplica migraciones pendientes y recalcula los acumulados diarios, en una conexión propia."""
+    from .. import repositories
+
+    database = Database(db_path)
+    try:
+        database.migrate()
+        return repositories.rebuild_daily_totals(database)
+    finally:
+        database.close()
+
+
+TOTALES_MONTOS_SQL = """
+SELECT (SELECT COUNT(*) FROM payments),
+       (SELECT COALESCE(SUM(total_amount), 0) FROM payments),
+       (SELECT COALESCE(SUM(barber_total), 0) FROM payments),
+       (SELECT COALESCE(SUM(shop_total), 0) FROM payments),
+       (SELECT COALESCE(SUM(qty * unit_price_snapshot), 0) FROM appointment_service_lines);
+"""
+
+
+def convert_amounts_to_pesos(db_path: Path = config.DB_PATH, backup_dir: Path = config.BACKUP_DIR) -> Dict:
+    """Pasa una base existente a montos en pesos enteros (migración 6) con un backup previo.
+
+    Aplica solo hasta la migración 6; las posteriores quedan para la próxima apertura.
+    Devuelve los totales antes y después para cuadrar la conversión; la diferencia es
+    solo el redondeo de fracciones de peso.
+    """
+    from .backup_service import perform_backup
+
+    database = Database(db_path)
+    try:
+        version = database.schema_version()
+        if version >= 6:
+            return {"convertida": False, "version": version}
+        backup = perform_backup(db_path, backup_dir)
+        antes = database.conn.execute(TOTALES_MONTOS_SQL).fetchone()
+        version = database.migrate(hasta=6)
+        despues = database.conn.execute(TOTALES_MONTOS_SQL).fetchone()
+    finally:
+        database.close()
+    claves = ["cobros", "ventas", "barberos", "barberia", "lineas"]
+    return {
+        "convertida": True,
+        "version": version,
+        "backup": str(backup),
+        "antes": dict(zip(claves, antes)),
+        "despues": dict(zip(claves, despues)),
+        "diferencia": {k: round(despues[i] - antes[i], 2) for i, k in enumerate(claves)},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mantenimiento de la base de datos de la barbería")
+    parser.add_argument("comando", choices=["optimize", "rebuild-rollups", "convert-amounts"])
+    parser.add_argument("--db", type=Path, default=config.DB_PATH, help="ruta de barberia.db")
+    args = parser.parse_args()
+    if args.comando == "optimize":
+        run_maintenance(args.db)
+        print("PRAGMA optimize aplicado")
+    elif args.comando == "convert-amounts":
+        print(json.dumps(convert_amounts_to_pesos(args.db), indent=2, ensure_ascii=False))
+    else:
+        filas = rebuild_daily_totals(args.db)
+        print(f"Acumulados diarios recalculados: {filas} filas")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import List, Dict
+from typing import Any, List, Dict
 
 from .. import repositories
+from ..catalog import catalog
+from ..database import db
 from ..utils import format_currency
 
 
@@ -11,7 +13,7 @@ class PaymentService:
         appointment_id: int,
         servicios: List[Dict[str, int]],
         metodo_pago: str,
-    ) -> Dict[str, float]:
+    ) -> Dict[str, Any]:
         cita = repositories.get_appointment(appointment_id)
         if not cita:
             raise ValueError("Cita no encontrada")
@@ -20,15 +22,15 @@ class PaymentService:
         if existing:
             raise ValueError("La cita ya fue cobrada")
 
-        servicios_catalogo = {s["id"]: s for s in repositories.list_services(include_inactive=True)}
         lines = []
-        total = 0.0
-        total_barbero = 0.0
-        total_tienda = 0.0
+        # Pesos enteros: las sumas son exactas
+        total = 0
+        total_barbero = 0
+        total_tienda = 0
         for item in servicios:
             servicio_id = item["service_id"]
             qty = int(item.get("qty", 1))
-            servicio = servicios_catalogo.get(servicio_id)
+            servicio = catalog.service(servicio_id)
             if not servicio:
                 raise ValueError("Servicio no encontrado")
             line_total = servicio["price"] * qty
@@ -46,16 +48,18 @@ class PaymentService:
                 )
             )
 
-        repositories.create_payment(
-            appointment_id=appointment_id,
-            total_amount=total,
-            barber_total=total_barbero,
-            shop_total=total_tienda,
-            payment_method=metodo_pago,
-            paid_at=datetime.now(),
-            lines=lines,
-        )
-        repositories.update_appointment_status(appointment_id, "ATENDIDA")
+        # Pago y cambio de estado en un solo COMMIT
+        with db.transaction():
+            repositories.create_payment(
+                appointment_id=appointment_id,
+                total_amount=total,
+                barber_total=total_barbero,
+                shop_total=total_tienda,
+                payment_method=metodo_pago,
+                paid_at=datetime.now(),
+                lines=lines,
+            )
+            repositories.update_appointment_status(appointment_id, "ATENDIDA")
         return {
             "total": total,
             "barbero": total_barbero,
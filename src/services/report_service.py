@@ -1,119 +1,437 @@
-from collections import defaultdict
-from datetime import datetime
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, Iterator, List, Tuple, Optional
 
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from ..database import Database, db
+from ..models import PaymentDetail
+from ..utils import format_currency, from_day_number, to_day_number, to_epoch_min
+from .archive_service import adjuntar_archivos, por_fuente
+from .. import config, repositories
 
-from ..database import db
-from ..utils import format_currency
-from .. import repositories
+# Detalle de cobros de una base ({esquema}) con sus servicios agregados por nombre; {filtro}
+# se arma con _filtro_pagos. _detalle_sql une las bases del rango y ordena por paid_min. Fecha y
+# hora salen de paid_day/paid_min (como format_minutes_12h), no del texto de paid_at.
+DETALLE_PAGOS_SQL = """
+    SELECT p.appointment_id, b.name AS barber, p.total_amount AS total,
+           date(p.paid_day * 86400, 'unixepoch') AS fecha,
+           printf('%02d:%02d', p.paid_min % 1440 / 60, p.paid_min % 60) AS hora,
+           p.payment_method AS metodo_pago, p.paid_min,
+           COALESCE((
+               SELECT group_concat(t.service_name || ' x' || t.qty, ', ')
+               FROM (
+                   SELECT s.name AS service_name, SUM(l.qty) AS qty
+                   FROM {esquema}.appointment_service_lines l
+                   JOIN services s ON s.id = l.service_id
+                   WHERE l.appointment_id = p.appointment_id
+                   GROUP BY s.name
+                   ORDER BY MIN(l.id)
+               ) t
+           ), '') AS servicios
+    FROM {esquema}.payments p
+    JOIN {esquema}.appointments a ON p.appointment_id = a.id
+    JOIN barbers b ON a.barber_id = b.id
+    WHERE {filtro}
+"""
+
+
+class OperacionCancelada(Exception):
+    """El usuario canceló un cálculo en curso."""
+
+
+class ExportacionCancelada(OperacionCancelada):
+    """El usuario canceló una exportación en curso."""
+
+
+def formatear_servicios(servicios: Dict[str, int]) -> str:
+    """Texto 'Servicio xN, ...' a partir del mapa agregado nombre -> cantidad."""
+    return ", ".join(f"{nombre} x{qty}" for nombre, qty in servicios.items())
+
+
+class ReportCache:
+    """Resúmenes recientes en orden LRU, válidos mientras no haya nuevas escrituras.
+
+    La generación de datos combina el contador de COMMIT de la conexión principal
+    con PRAGMA data_version leído en una conexión propia de la caché, que cambia con
+    cada COMMIT de cualquier otra conexión o proceso (CLI, mantenimiento, otra
+    instancia); al cambiar se descarta todo lo guardado. La generación se lee antes
+    de calcular; si cambió mientras tanto el resultado no se guarda. Los resultados
+    son compartidos: no deben modificarse.
+    """
+
+    def __init__(self, max_items: int = config.REPORT_CACHE_SIZE, database: Database = db):
+        self.max_items = max_items
+        self.database = database
+        self._items: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._generacion: Optional[tuple] = None
+        self._lock = threading.Lock()
+        # Conexión solo para data_version: se usa desde los hilos de reportes, protegida por su lock
+        self._conn_version: Optional[sqlite3.Connection] = None
+        self._ruta_version: Optional[str] = None
+        self._lock_version = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def generacion(self) -> tuple:
+        return (self.database.commit_count, self._data_version())
+
+    def _data_version(self) -> int:
+        ruta = str(self.database.db_path)
+        with self._lock_version:
+            if self._conn_version is None or self._ruta_version != ruta:
+                self._cerrar_version()
+                self._conn_version = sqlite3.connect(ruta, check_same_thread=False)
+                self._ruta_version = ruta
+            return self._conn_version.execute("PRAGMA data_version;").fetchone()[0]
+
+    def _cerrar_version(self) -> None:
+        if self._conn_version is not None:
+            self._conn_version.close()
+            self._conn_version = None
+            self._ruta_version = None
+
+    def cerrar(self) -> None:
+        """Descarta lo guardado y cierra la conexión de data_version."""
+        self.invalidar()
+        with self._lock_version:
+            self._cerrar_version()
+
+    def obtener(self, clave: tuple) -> Optional[Dict]:
+        with self._lock:
+            self._vigente()
+            valor = self._items.get(clave)
+            if valor is None:
+                self.fallos += 1
+                return None
+            self._items.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave: tuple, valor: Dict, generacion: tuple) -> None:
+        with self._lock:
+            self._vigente()
+            if generacion != self._generacion:
+                return
+            self._items[clave] = valor
+            self._items.move_to_end(clave)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def invalidar(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def _vigente(self) -> None:
+        generacion = self.generacion()
+        if generacion != self._generacion:
+            self._items.clear()
+            self._generacion = generacion
+
+
+report_cache = ReportCache()
 
 
 class ReportService:
-    def resumen(self, inicio: datetime, fin: datetime, barber_id: Optional[int] = None) -> Dict:
-        conn = db.conn
-        cur = conn.cursor()
+    def __init__(self, database: Database = db, cache: Optional[ReportCache] = report_cache):
+        self.db = database
+        self.cache = cache
+
+    def resumen(
+        self,
+        inicio: datetime,
+        fin: datetime,
+        barber_id: Optional[int] = None,
+        incluir_detalle: bool = True,
+        progreso: Optional[Callable[[int, int], None]] = None,
+        cancelado: Optional[Callable[[], bool]] = None,
+    ) -> Dict:
+        """Resumen del rango, reutilizando el último cálculo si los datos no cambiaron.
+
+        Un resumen guardado con detalle también sirve para pedidos sin detalle. Con
+        `cancelado` la consulta en curso se interrumpe desde SQLite y se lanza
+        OperacionCancelada; `progreso(paso, total)` avisa al terminar cada consulta.
+        """
+        if self.cache is None:
+            return self._calcular_cancelable(inicio, fin, barber_id, incluir_detalle, progreso, cancelado)
+        base = (str(self.db.db_path), inicio, fin, barber_id)
+        guardado = self.cache.obtener(base + (incluir_detalle,))
+        if guardado is None and not incluir_detalle:
+            con_detalle = self.cache.obtener(base + (True,))
+            if con_detalle is not None:
+                guardado = dict(con_detalle, pagos_detalle=[])
+        if guardado is not None:
+            return guardado
+        generacion = self.cache.generacion()
+        data = self._calcular_cancelable(inicio, fin, barber_id, incluir_detalle, progreso, cancelado)
+        self.cache.guardar(base + (incluir_detalle,), data, generacion)
+        return data
+
+    def _calcular_cancelable(self, inicio, fin, barber_id, incluir_detalle, progreso, cancelado) -> Dict:
+        if cancelado is None:
+            return self._calcular_resumen(inicio, fin, barber_id, incluir_detalle, progreso)
+        conn = self.db.conn
+        # SQLite consulta el handler cada N instrucciones de la VM; devolver 1 interrumpe la sentencia
+        conn.set_progress_handler(lambda: 1 if cancelado() else 0, 10_000)
+        try:
+            return self._calcular_resumen(inicio, fin, barber_id, incluir_detalle, progreso, cancelado)
+        except sqlite3.OperationalError as exc:
+            if cancelado():
+                raise OperacionCancelada() from exc
+            raise
+        finally:
+            conn.set_progress_handler(None, 0)
+
+    def _calcular_resumen(
+        self,
+        inicio: datetime,
+        fin: datetime,
+        barber_id: Optional[int],
+        incluir_detalle: bool,
+        progreso: Optional[Callable[[int, int], None]] = None,
+        cancelado: Optional[Callable[[], bool]] = None,
+    ) -> Dict:
+        """Resumen del rango con agregados finales calculados en SQL.
+
+        Totales, por barbero y por día salen de daily_totals para los días completos
+        y de payments solo para los bordes parciales; los servicios por barbero se
+        devuelven como mapa nombre -> cantidad.
+        """
+        pasos = 6 if incluir_detalle else 5
+        hechos = 0
+
+        def avanzar():
+            nonlocal hechos
+            if cancelado is not None and cancelado():
+                raise OperacionCancelada()
+            hechos += 1
+            if progreso is not None:
+                progreso(hechos, pasos)
+
+        fuentes = self._fuentes(inicio, fin)
+        cur = self.db.conn.cursor()
+        diario_sql, diario_params = self._fuente_diaria(inicio, fin, barber_id, fuentes)
+
         cur.execute(
-            """
-            SELECT p.*, a.barber_id, b.name as barber_name
-            FROM payments p
-            JOIN appointments a ON p.appointment_id = a.id
-            JOIN barbers b ON a.barber_id = b.id
-            WHERE p.paid_at BETWEEN ? AND ?
-            {barber_filter}
-            ORDER BY p.paid_at;
-            """.format(barber_filter="AND a.barber_id=?" if barber_id else ""),
-            (inicio.isoformat(), fin.isoformat()) + ((barber_id,) if barber_id else ()),
+            f"""
+            WITH diario AS ({diario_sql})
+            SELECT COALESCE(SUM(ventas), 0) AS ventas,
+                   COALESCE(SUM(barbero), 0) AS barberos,
+                   COALESCE(SUM(barberia), 0) AS barberia
+            FROM diario;
+            """,
+            diario_params,
+        )
+        totales = dict(cur.fetchone())
+        avanzar()
+
+        cur.execute(
+            f"""
+            WITH diario AS ({diario_sql})
+            SELECT b.name AS barber_name, SUM(d.ventas) AS ventas, SUM(d.barbero) AS barbero, SUM(d.barberia) AS barberia
+            FROM diario d
+            JOIN barbers b ON b.id = d.barber_id
+            GROUP BY b.name
+            ORDER BY MIN(d.day), MIN(d.barber_id);
+            """,
+            diario_params,
         )
-        pagos = cur.fetchall()
-
-        totales = {"ventas": 0.0, "barberos": 0.0, "barberia": 0.0}
-        por_barbero = defaultdict(lambda: {"ventas": 0.0, "barbero": 0.0, "barberia": 0.0, "servicios": []})
-        por_dia = defaultdict(lambda: {"ventas": 0.0, "barbero": 0.0, "barberia": 0.0})
-        servicios_por_pago = defaultdict(list)
-
-        for p in pagos:
-            totales["ventas"] += p["total_amount"]
-            totales["barberos"] += p["barber_total"]
-            totales["barberia"] += p["shop_total"]
-            dia = p["paid_at"][:10]
-            por_barbero[p["barber_name"]]["ventas"] += p["total_amount"]
-            por_barbero[p["barber_name"]]["barbero"] += p["barber_total"]
-            por_barbero[p["barber_name"]]["barberia"] += p["shop_total"]
-            por_dia[dia]["ventas"] += p["total_amount"]
-            por_dia[dia]["barbero"] += p["barber_total"]
-            por_dia[dia]["barberia"] += p["shop_total"]
-
-        # Traer líneas de servicios por pago para agregar nombres y qty y agrupar por barbero
+        por_barbero = {
+            r["barber_name"]: {"ventas": r["ventas"], "barbero": r["barbero"], "barberia": r["barberia"], "servicios": {}}
+            for r in cur.fetchall()
+        }
+        avanzar()
+
         cur.execute(
+            f"""
+            WITH diario AS ({diario_sql})
+            SELECT day, SUM(ventas) AS ventas, SUM(barbero) AS barbero, SUM(barberia) AS barberia
+            FROM diario
+            GROUP BY day
+            ORDER BY day;
+            """,
+            diario_params,
+        )
+        por_dia = {
+            from_day_number(r["day"]).isoformat(): {"ventas": r["ventas"], "barbero": r["barbero"], "barberia": r["barberia"]}
+            for r in cur.fetchall()
+        }
+        avanzar()
+
+        pagos_filtro, pagos_params = self._filtro_pagos(inicio, fin, barber_id)
+        lineas_sql, lineas_params = por_fuente(
             """
-            SELECT p.appointment_id, a.barber_id, b.name as barber_name, l.qty, s.name as service_name
-            FROM payments p
-            JOIN appointments a ON p.appointment_id = a.id
-            JOIN barbers b ON a.barber_id = b.id
-            JOIN appointment_service_lines l ON l.appointment_id = p.appointment_id
+            SELECT a.barber_id, l.service_id, l.qty, l.id
+            FROM {esquema}.payments p
+            JOIN {esquema}.appointments a ON p.appointment_id = a.id
+            JOIN {esquema}.appointment_service_lines l ON l.appointment_id = p.appointment_id
+            WHERE {filtro}
+            """,
+            pagos_params,
+            fuentes,
+            filtro=pagos_filtro,
+        )
+        cur.execute(
+            f"""
+            WITH lineas AS ({lineas_sql})
+            SELECT b.name AS barber_name, s.name AS service_name, SUM(l.qty) AS qty
+            FROM lineas l
+            JOIN barbers b ON l.barber_id = b.id
             JOIN services s ON s.id = l.service_id
-            WHERE p.paid_at BETWEEN ? AND ?
-            {barber_filter};
-            """.format(barber_filter="AND a.barber_id=?" if barber_id else ""),
-            (inicio.isoformat(), fin.isoformat()) + ((barber_id,) if barber_id else ()),
+            GROUP BY b.name, s.name
+            ORDER BY b.name, MIN(l.id);
+            """,
+            lineas_params,
         )
         for row in cur.fetchall():
-            etiqueta = f"{row['service_name']} x{row['qty']}"
-            servicios_por_pago[row["appointment_id"]].append((row["service_name"], row["qty"]))
-            por_barbero[row["barber_name"]]["servicios"].append((row["service_name"], row["qty"]))
+            if row["barber_name"] in por_barbero:
+                por_barbero[row["barber_name"]]["servicios"][row["service_name"]] = row["qty"]
+        avanzar()
 
-        citas_totales = self._contar_citas(inicio, fin, barber_id)
         pagos_detalle = []
-        for p in pagos:
-            # agrupar servicios por pago
-            items = servicios_por_pago.get(p["appointment_id"], [])
-            agregados = defaultdict(int)
-            for nombre, qty in items:
-                agregados[nombre] += qty
-            servicios_txt = ", ".join([f"{n} x{q}" for n, q in agregados.items()])
-            pagos_detalle.append(
-                {
-                    "appointment_id": p["appointment_id"],
-                    "barber": p["barber_name"],
-                    "total": p["total_amount"],
-                    "servicios": servicios_txt,
-                    "fecha": p["paid_at"][:10],
-                    "metodo_pago": p["payment_method"],
-                }
-            )
+        if incluir_detalle:
+            cur.row_factory = PaymentDetail.fila
+            cur.execute(*self._detalle_sql(pagos_filtro, pagos_params, fuentes))
+            pagos_detalle = cur.fetchall()
+            avanzar()
+
+        citas = self._contar_citas(inicio, fin, barber_id, fuentes)
+        avanzar()
         return {
-            "pagos": [dict(p) for p in pagos],
             "totales": totales,
             "por_barbero": por_barbero,
             "por_dia": por_dia,
-            "citas": citas_totales,
+            "citas": citas,
             "pagos_detalle": pagos_detalle,
         }
 
-    def _contar_citas(self, inicio: datetime, fin: datetime, barber_id: Optional[int]) -> Dict[str, int]:
-        cur = db.conn.cursor()
+    def contar_pagos(self, inicio: datetime, fin: datetime, barber_id: Optional[int] = None) -> int:
+        filtro, params = self._filtro_pagos(inicio, fin, barber_id)
+        conteos, params = por_fuente(
+            "SELECT COUNT(*) AS n FROM {esquema}.payments p JOIN {esquema}.appointments a ON p.appointment_id = a.id "
+            "WHERE {filtro}",
+            params,
+            self._fuentes(inicio, fin),
+            filtro=filtro,
+        )
+        cur = self.db.conn.cursor()
+        cur.execute(f"SELECT SUM(n) FROM ({conteos});", params)
+        return cur.fetchone()[0]
+
+    def iter_detalle_pagos(
+        self, inicio: datetime, fin: datetime, barber_id: Optional[int] = None, tamano_lote: int = 500
+    ) -> Iterator[PaymentDetail]:
+        """Recorre el detalle de cobros por lotes (fetchmany) sin materializar el rango completo."""
+        filtro, params = self._filtro_pagos(inicio, fin, barber_id)
+        cur = self.db.conn.cursor()
+        cur.row_factory = PaymentDetail.fila
+        cur.execute(*self._detalle_sql(filtro, params, self._fuentes(inicio, fin)))
+        while True:
+            filas = cur.fetchmany(tamano_lote)
+            if not filas:
+                break
+            yield from filas
+
+    def _fuentes(self, inicio: datetime, fin: datetime) -> List[str]:
+        """Esquemas con datos del rango: main y los archivos anuales que lo cubren (adjuntos con ATTACH)."""
+        return adjuntar_archivos(self.db, to_day_number(inicio.date()), to_day_number(fin.date()))
+
+    def _detalle_sql(self, filtro: str, params: List, fuentes: List[str]) -> Tuple[str, List]:
+        sql, params = por_fuente(DETALLE_PAGOS_SQL, params, fuentes, filtro=filtro)
+        return f"SELECT {PaymentDetail.columnas()} FROM ({sql}) ORDER BY paid_min", params
+
+    def _filtro_pagos(self, inicio: datetime, fin: datetime, barber_id: Optional[int]) -> Tuple[str, List]:
+        filtro = "p.paid_min BETWEEN ? AND ?"
+        params: List = [to_epoch_min(inicio), to_epoch_min(fin)]
+        if barber_id:
+            filtro += " AND a.barber_id = ?"
+            params.append(barber_id)
+        return filtro, params
+
+    def _fuente_diaria(
+        self, inicio: datetime, fin: datetime, barber_id: Optional[int], fuentes: List[str]
+    ) -> Tuple[str, List]:
+        """SELECT (day, barber_id, ventas, barbero, barberia): daily_totals para días completos y pagos en los bordes."""
+        primero = inicio.date() if inicio.time() == time.min else inicio.date() + timedelta(days=1)
+        ultimo = fin.date() if fin.time() == time.max else fin.date() - timedelta(days=1)
+        # Minutos [inicio, fin] del rango; el minuto de `fin` entra completo
+        inicio_min = to_epoch_min(inicio)
+        fin_exclusivo = to_epoch_min(fin) + 1
+        partes: List[str] = []
+        params: List = []
+
+        def agregar(plantilla: str, valores: List, columna_barbero: str) -> None:
+            if barber_id:
+                plantilla += f" AND {columna_barbero} = ?"
+                valores.append(barber_id)
+            sql, valores = por_fuente(plantilla, valores, fuentes)
+            partes.append(sql)
+            params.extend(valores)
+
+        def pagos(desde: int, hasta: int) -> None:
+            agregar(
+                """
+                SELECT p.paid_day AS day, a.barber_id,
+                       p.total_amount AS ventas, p.barber_total AS barbero, p.shop_total AS barberia
+                FROM {esquema}.payments p
+                JOIN {esquema}.appointments a ON p.appointment_id = a.id
+                WHERE p.paid_min >= ? AND p.paid_min < ?
+                """,
+                [desde, hasta],
+                "a.barber_id",
+            )
+
+        if primero > ultimo:
+            pagos(inicio_min, fin_exclusivo)
+            return " UNION ALL ".join(partes), params
+
+        inicio_completo = to_day_number(primero) * 1440
+        fin_completo = (to_day_number(ultimo) + 1) * 1440
+        if inicio_min < inicio_completo:
+            pagos(inicio_min, inicio_completo)
+        agregar(
+            """
+            SELECT day, barber_id, total_amount AS ventas, barber_total AS barbero, shop_total AS barberia
+            FROM {esquema}.daily_totals
+            WHERE day BETWEEN ? AND ?
+            """,
+            [to_day_number(primero), to_day_number(ultimo)],
+            "barber_id",
+        )
+        if fin_completo < fin_exclusivo:
+            pagos(fin_completo, fin_exclusivo)
+        return " UNION ALL ".join(partes), params
+
+    def _contar_citas(
+        self, inicio: datetime, fin: datetime, barber_id: Optional[int], fuentes: List[str]
+    ) -> Dict[str, int]:
+        cur = self.db.conn.cursor()
         query = """
             SELECT status, COUNT(*) as total
-            FROM appointments
-            WHERE start_dt BETWEEN ? AND ?
+            FROM {esquema}.appointments
+            WHERE start_min BETWEEN ? AND ?
         """
-        params = [inicio.isoformat(), fin.isoformat()]
+        params = [to_epoch_min(inicio), to_epoch_min(fin)]
         if barber_id:
             query += " AND barber_id=?"
             params.append(barber_id)
-        query += " GROUP BY status;"
-        cur.execute(query, params)
+        query += " GROUP BY status"
+        conteos, params = por_fuente(query, params, fuentes)
+        cur.execute(f"SELECT status, SUM(total) AS total FROM ({conteos}) GROUP BY status;", params)
         resumen = {"ATENDIDA": 0, "CANCELADA": 0, "NO ASISTIÓ": 0, "RESERVADA": 0}
         for row in cur.fetchall():
             resumen[row["status"]] = row["total"]
         return resumen
 
     def exportar_pdf(self, path: Path, data: Dict, titulo: str, rango: Tuple[datetime, datetime]) -> Path:
+        # reportlab se importa solo al exportar para no retrasar el arranque
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter, landscape
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
         doc = SimpleDocTemplate(str(path), pagesize=landscape(letter))
         styles = getSampleStyleSheet()
         story = []
@@ -129,20 +447,11 @@ class ReportService:
         )
         story.append(Spacer(1, 12))
 
-        # Tabla por barbero (agrupar servicios si vienen como tuplas)
+        # Tabla por barbero
         if data["por_barbero"]:
             tabla_data = [["Nombre Barbero", "Ventas", "Total Barbero", "Barbería", "Servicios"]]
             for barber, valores in data["por_barbero"].items():
-                servicios_raw = valores.get("servicios", [])
-                servicios_txt = ""
-                if servicios_raw:
-                    if isinstance(servicios_raw[0], tuple):
-                        agregados = {}
-                        for nombre, qty in servicios_raw:
-                            agregados[nombre] = agregados.get(nombre, 0) + qty
-                        servicios_txt = ", ".join([f"{n} x{q}" for n, q in agregados.items()])
-                    else:
-                        servicios_txt = ", ".join(servicios_raw)
+                servicios_txt = formatear_servicios(valores.get("servicios", {}))
                 tabla_data.append(
                     [
                         barber,
@@ -169,9 +478,191 @@ class ReportService:
         doc.build(story)
         return path
 
+    def exportar_pdf_detallado(
+        self,
+        path: Path,
+        inicio: datetime,
+        fin: datetime,
+        barber_id: Optional[int] = None,
+        titulo: str = "Reporte Barbería",
+        progreso: Optional[Callable[[int, int], None]] = None,
+        cancelado: Optional[Callable[[], bool]] = None,
+    ) -> Path:
+        """PDF con resumen y detalle de cada cobro, dibujado página a página desde el cursor.
+
+        No arma una historia de platypus: cada lote de filas se dibuja y se descarta, así un
+        año completo de cobros no crece en memoria. Lanza ExportacionCancelada si
+        `cancelado()` devuelve True; en ese caso no queda archivo a medias.
+        """
+        from reportlab.lib.pagesizes import letter, landscape
+        from reportlab.pdfgen import canvas
+
+        data = self.resumen(inicio, fin, barber_id, incluir_detalle=False)
+        total = self.contar_pagos(inicio, fin, barber_id)
+        tmp = path.with_name(path.name + ".tmp")
+        pagina = landscape(letter)
+        pdf = _PaginadorPdf(canvas.Canvas(str(tmp), pagesize=pagina, pageCompression=1), pagina, titulo)
+        pdf.texto(f"Rango: {inicio.strftime('%d/%m/%Y')} - {fin.strftime('%d/%m/%Y')}")
+        tot = data["totales"]
+        pdf.texto(
+            f"Total ventas: {format_currency(tot['ventas'])} | Ganancia barberos: {format_currency(tot['barberos'])} | "
+            f"Liquidación barbería: {format_currency(tot['barberia'])} | Cobros: {total}"
+        )
+        pdf.espacio()
+        if data["por_barbero"]:
+            pdf.tabla(
+                "Detalle por barbero",
+                [("Nombre Barbero", 150, False), ("Ventas", 90, True), ("Total Barbero", 90, True), ("Barbería", 90, True), ("Servicios", 300, False)],
+                (
+                    [
+                        barber,
+                        format_currency(valores["ventas"]),
+                        format_currency(valores["barbero"]),
+                        format_currency(valores["barberia"]),
+                        formatear_servicios(valores["servicios"]),
+                    ]
+                    for barber, valores in data["por_barbero"].items()
+                ),
+            )
+            pdf.espacio()
+
+        def filas_detalle():
+            for hechos, pago in enumerate(self.iter_detalle_pagos(inicio, fin, barber_id), start=1):
+                yield [
+                    str(pago["appointment_id"]),
+                    pago["fecha"],
+                    pago["hora"],
+                    pago["barber"],
+                    pago["metodo_pago"],
+                    format_currency(pago["total"]),
+                    pago["servicios"],
+                ]
+                if hechos % 200 == 0 or hechos == total:
+                    if cancelado and cancelado():
+                        raise ExportacionCancelada()
+                    if progreso:
+                        progreso(hechos, total)
+
+        try:
+            pdf.tabla(
+                "Cobros realizados",
+                [("ID Cita", 50, False), ("Fecha", 65, False), ("Hora", 40, False), ("Barbero", 120, False),
+                 ("Método", 80, False), ("Total", 75, True), ("Servicios", 290, False)],
+                filas_detalle(),
+            )
+            pdf.guardar()
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        tmp.replace(path)
+        return path
+
     def borrar_cobro(self, appointment_id: int) -> None:
-        repositories.delete_payment(appointment_id)
-        repositories.update_appointment_status(appointment_id, "RESERVADA")
+        with db.transaction():
+            if not repositories.delete_payment(appointment_id):
+                if repositories.get_appointment(appointment_id) is None:
+                    raise ValueError("El cobro está archivado y no se puede borrar")
+                raise ValueError("La cita no tiene cobro")
+            repositories.update_appointment_status(appointment_id, "RESERVADA")
+
+
+class _PaginadorPdf:
+    """Dibuja texto y tablas sobre un canvas de reportlab, saltando de página según haga falta."""
+
+    MARGEN = 36
+    ALTO_FILA = 12
+
+    def __init__(self, canvas, pagina: Tuple[float, float], titulo: str):
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+
+        self.c = canvas
+        self.titulo = titulo
+        self.ancho, self.alto = pagina
+        self.pagina = 1
+        self._string_width = stringWidth
+        self.y = self.alto - self.MARGEN
+        self.c.setFont("Helvetica-Bold", 16)
+        self.c.drawString(self.MARGEN, self.y - 16, titulo)
+        self.y -= 30
+
+    def texto(self, texto: str) -> None:
+        self._asegurar_espacio(self.ALTO_FILA + 2)
+        self.c.setFont("Helvetica", 9)
+        self.c.drawString(self.MARGEN, self.y - 10, texto)
+        self.y -= self.ALTO_FILA + 2
+
+    def espacio(self, alto: int = 12) -> None:
+        self.y -= alto
+
+    def tabla(self, titulo: str, columnas: List[Tuple[str, int, bool]], filas) -> None:
+        self._asegurar_espacio(3 * self.ALTO_FILA + 6)
+        self.c.setFont("Helvetica-Bold", 11)
+        self.c.drawString(self.MARGEN, self.y - 12, titulo)
+        self.y -= 18
+        self._encabezado(columnas)
+        for fila in filas:
+            if self.y - self.ALTO_FILA < self.MARGEN + 14:
+                self._nueva_pagina()
+                self._encabezado(columnas)
+            self._fila(columnas, fila, "Helvetica", None)
+
+    def guardar(self) -> None:
+        self._pie()
+        self.c.save()
+
+    def _encabezado(self, columnas) -> None:
+        self._fila(columnas, [c[0] for c in columnas], "Helvetica-Bold", (0.83, 0.83, 0.83))
+
+    def _fila(self, columnas, valores, fuente: str, fondo) -> None:
+        x = self.MARGEN
+        ancho_total = sum(c[1] for c in columnas)
+        base = self.y - self.ALTO_FILA
+        if fondo:
+            self.c.setFillColorRGB(*fondo)
+            self.c.rect(x, base, ancho_total, self.ALTO_FILA, stroke=0, fill=1)
+            self.c.setFillColorRGB(0, 0, 0)
+        self.c.setFont(fuente, 8)
+        for (_, ancho, derecha), valor in zip(columnas, valores):
+            texto = self._recortar(str(valor), ancho - 6, fuente)
+            if derecha:
+                self.c.drawRightString(x + ancho - 3, base + 3, texto)
+            else:
+                self.c.drawString(x + 3, base + 3, texto)
+            x += ancho
+        self.c.setStrokeColorRGB(0.6, 0.6, 0.6)
+        self.c.line(self.MARGEN, base, self.MARGEN + ancho_total, base)
+        self.y = base
+
+    def _recortar(self, texto: str, ancho: float, fuente: str) -> str:
+        if self._string_width(texto, fuente, 8) <= ancho:
+            return texto
+        while texto and self._string_width(texto + "…", fuente, 8) > ancho:
+            texto = texto[:-1]
+        return texto + "…"
+
+    def _asegurar_espacio(self, alto: float) -> None:
+        if self.y - alto < self.MARGEN + 14:
+            self._nueva_pagina()
+
+    def _nueva_pagina(self) -> None:
+        self._pie()
+        self.c.showPage()
+        self.pagina += 1
+        self.y = self.alto - self.MARGEN
+
+    def _pie(self) -> None:
+        self.c.setFont("Helvetica", 7)
+        self.c.drawRightString(self.ancho - self.MARGEN, self.MARGEN - 12, f"{self.titulo} - Página {self.pagina}")
+
+
+@contextmanager
+def servicio_en_conexion_propia(db_path: Optional[Path] = None) -> Iterator[ReportService]:
+    """ReportService con su propia conexión de lectura, para usarlo desde un hilo de trabajo."""
+    database = Database(db_path or db.db_path, tracer=db.tracer)
+    try:
+        yield ReportService(database)
+    finally:
+        database.close()
 
 
 report_service = ReportService()
@@ -0,0 +1,181 @@
+"""Instrumentación opcional de consultas SQLite: conteos, latencias y bitácora de lentas."""
+
+import json
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, List, Optional
+
+_ESPACIOS = re.compile(r"\s+")
+# El trace callback recibe la sentencia con los parámetros ya expandidos
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|\bNULL\b")
+_ESTE_ARCHIVO = Path(__file__).name
+# Marcos que no cuentan como "quien llama": la capa de conexión y este módulo
+_MODULOS_INTERNOS = {"database.py", _ESTE_ARCHIVO, "contextlib.py"}
+
+
+def _normalizar(sql: str) -> str:
+    return _ESPACIOS.sub(" ", sql).strip()
+
+
+def _llamador() -> str:
+    frame = sys._getframe(1)
+    while frame is not None:
+        nombre = Path(frame.f_code.co_filename).name
+        if nombre not in _MODULOS_INTERNOS:
+            modulo = frame.f_globals.get("__name__", nombre)
+            return f"{modulo}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+class QueryTracer:
+    """Acumula estadísticas por (sentencia, función que la llamó).
+
+    Las latencias incluyen execute y los fetch posteriores del mismo cursor. Las
+    sentencias que superan `slow_ms` se escriben en un log rotativo. Puede compartirse
+    entre varias conexiones (p. ej. las de hilos de trabajo).
+    """
+
+    def __init__(self, slow_ms: float = 100.0, log_path: Optional[Path] = None):
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self._stats: Dict[tuple, dict] = {}
+        self._ejecutadas: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._logger = None
+        if log_path is not None:
+            self._logger = logging.getLogger(f"{__name__}.lentas.{log_path}")
+            self._logger.propagate = False
+            self._logger.setLevel(logging.WARNING)
+            if not self._logger.handlers:
+                handler = RotatingFileHandler(log_path, maxBytes=1_000_000, backupCount=3, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                self._logger.addHandler(handler)
+
+    def record(self, sql: str, caller: str, elapsed_ms: float, params=None) -> None:
+        clave = (_normalizar(sql), caller)
+        with self._lock:
+            stat = self._stats.get(clave)
+            if stat is None:
+                stat = self._stats[clave] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+            stat["count"] += 1
+            stat["total_ms"] += elapsed_ms
+            stat["max_ms"] = max(stat["max_ms"], elapsed_ms)
+        if elapsed_ms >= self.slow_ms:
+            self._log_lenta(clave, elapsed_ms, params)
+
+    def add_time(self, sql: str, caller: str, extra_ms: float, call_ms: float, params=None) -> None:
+        """Suma tiempo de fetch a una sentencia ya contada; call_ms es el acumulado de esa ejecución."""
+        clave = (_normalizar(sql), caller)
+        with self._lock:
+            stat = self._stats.get(clave)
+            if stat is not None:
+                stat["total_ms"] += extra_ms
+                stat["max_ms"] = max(stat["max_ms"], call_ms)
+        # Se registra una sola vez, cuando el acumulado cruza el umbral
+        if call_ms - extra_ms < self.slow_ms <= call_ms:
+            self._log_lenta(clave, call_ms, params)
+
+    def _log_lenta(self, clave: tuple, elapsed_ms: float, params) -> None:
+        if self._logger is not None:
+            self._logger.warning("%.1f ms | %s | %s | %r", elapsed_ms, clave[1], clave[0], params)
+
+    def trace_callback(self, sql: str) -> None:
+        """Para Connection.set_trace_callback: cuenta cada sentencia que SQLite ejecuta, incluidas BEGIN/COMMIT."""
+        clave = _LITERALES.sub("?", _normalizar(sql))
+        with self._lock:
+            self._ejecutadas[clave] = self._ejecutadas.get(clave, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._ejecutadas.clear()
+
+    def summary(self, limit: Optional[int] = 20) -> Dict[str, List[dict]]:
+        with self._lock:
+            filas = [
+                {
+                    "sql": sql,
+                    "caller": caller,
+                    "count": s["count"],
+                    "total_ms": round(s["total_ms"], 3),
+                    "max_ms": round(s["max_ms"], 3),
+                    "avg_ms": round(s["total_ms"] / s["count"], 3),
+                }
+                for (sql, caller), s in self._stats.items()
+            ]
+            ejecutadas = [{"sql": sql, "count": n} for sql, n in self._ejecutadas.items()]
+        filas.sort(key=lambda f: f["total_ms"], reverse=True)
+        ejecutadas.sort(key=lambda f: f["count"], reverse=True)
+        return {"statements": filas[:limit], "executed": ejecutadas[:limit]}
+
+    def dump(self, path: Path, limit: Optional[int] = None) -> Path:
+        path.write_text(json.dumps(self.summary(limit), indent=2, ensure_ascii=False), encoding="utf-8")
+        return path
+
+
+class TracedCursor(sqlite3.Cursor):
+    def _medir(self, metodo, sql, params, *args):
+        caller = _llamador()
+        t0 = time.perf_counter()
+        try:
+            return metodo(sql, *args)
+        finally:
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            # [sql, llamador, ms acumulados, parámetros] de la última sentencia, para sumarle los fetch
+            self._ultima = [sql, caller, elapsed_ms, params]
+            self.connection.tracer.record(sql, caller, elapsed_ms, params)
+
+    def execute(self, sql, parameters=()):
+        return self._medir(super().execute, sql, parameters, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._medir(super().executemany, sql, None, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self._medir(super().executescript, sql_script, None)
+
+    def _fetch(self, metodo, *args):
+        t0 = time.perf_counter()
+        try:
+            return metodo(*args)
+        finally:
+            ultima = getattr(self, "_ultima", None)
+            if ultima is not None:
+                extra_ms = (time.perf_counter() - t0) * 1000
+                ultima[2] += extra_ms
+                self.connection.tracer.add_time(ultima[0], ultima[1], extra_ms, ultima[2], ultima[3])
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+
+class TracedConnection(sqlite3.Connection):
+    """Conexión cuyos cursores miden cada sentencia; se crea con sqlite3.connect(factory=...)."""
+
+    tracer: QueryTracer = None
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    # Connection.execute* no pasa por cursor(); se redirigen para medirlas igual
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
@@ -1,6 +1,7 @@
 from datetime import datetime, time
 
-from PySide6.QtCore import QDate, Qt, QTime
+from PySide6.QtCore import QDate, QModelIndex, Qt
+from PySide6.QtGui import QStandardItem, QStandardItemModel
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -8,10 +9,7 @@ from PySide6.QtWidgets import (
     QLabel,
     QComboBox,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
     QDateEdit,
-    QTimeEdit,
     QLineEdit,
     QMessageBox,
     QTextEdit,
@@ -19,11 +17,19 @@ from PySide6.QtWidgets import (
     QFormLayout,
     QDialogButtonBox,
     QHeaderView,
+    QSpinBox,
+    QCompleter,
 )
 
 from .. import repositories
+from ..catalog import catalog
 from ..services.agenda_service import agenda_service
-from ..utils import format_currency, format_time_12h
+from ..utils import format_currency, format_minutes_12h, to_epoch_min
+from .table_model import Column, RecordTableModel
+from .widgets import fila_actual, tabla_modelo
+
+ROL_NOMBRE = Qt.UserRole
+ROL_TELEFONO = Qt.UserRole + 1
 
 
 class AgendaTab(QWidget):
@@ -61,15 +67,24 @@ class AgendaTab(QWidget):
         filtros.addStretch()
         layout.addLayout(filtros)
 
-        self.tabla = QTableWidget(0, 9)
-        self.tabla.setHorizontalHeaderLabels(
-            ["ID", "Inicio", "Fin", "Barbero", "Cliente", "Servicio", "Estado", "Teléfono", "Notas"]
+        self.modelo = RecordTableModel(
+            [
+                Column("ID", "id", align=Qt.AlignCenter),
+                Column("Inicio", "start_min", format_minutes_12h, Qt.AlignCenter),
+                Column("Fin", "end_min", format_minutes_12h, Qt.AlignCenter),
+                Column("Barbero", "barber_name", align=Qt.AlignCenter),
+                Column("Cliente", "client_name", align=Qt.AlignCenter),
+                Column("Servicio", "service_name", align=Qt.AlignCenter),
+                Column("Estado", "status", align=Qt.AlignCenter),
+                Column("Teléfono", "client_phone", align=Qt.AlignCenter),
+                Column("Notas", "notes"),
+            ]
         )
+        self.tabla = tabla_modelo(self.modelo)
         header = self.tabla.horizontalHeader()
         header.setStretchLastSection(True)
         header.setSectionResizeMode(QHeaderView.Stretch)
         header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        self._estilizar_tabla(self.tabla)
         layout.addWidget(self.tabla)
 
         acciones = QHBoxLayout()
@@ -91,9 +106,8 @@ class AgendaTab(QWidget):
     def _load_comboboxes(self):
         self.barbero_filtro.clear()
         self.barbero_filtro.addItem("Todos", None)
-        for b in repositories.list_barbers():
-            if b["active"]:
-                self.barbero_filtro.addItem(b["name"], b["id"])
+        for b in catalog.barbers(include_inactive=False):
+            self.barbero_filtro.addItem(b["name"], b["id"])
 
     def _cargar_citas(self):
         fecha = self.fecha_filtro.date().toPython()
@@ -101,36 +115,13 @@ class AgendaTab(QWidget):
         fin = datetime.combine(fecha, time(23, 59))
         barber_id = self.barbero_filtro.currentData()
         estado = None if self.estado_filtro.currentText() == "Todos" else self.estado_filtro.currentText()
-        citas = repositories.list_appointments_by_range(inicio.isoformat(), fin.isoformat(), barber_id, estado)
-        barberos = {b["id"]: b["name"] for b in repositories.list_barbers()}
-        servicios = {s["id"]: s["name"] for s in repositories.list_services(True)}
-        self.tabla.setRowCount(0)
-        for row, cita in enumerate(citas):
-            self.tabla.insertRow(row)
-            self._set_cell(self.tabla, row, 0, str(cita["id"]))
-            self._set_cell(self.tabla, row, 1, format_time_12h(cita["start_dt"]))
-            self._set_cell(self.tabla, row, 2, format_time_12h(cita["end_dt"]))
-            self._set_cell(self.tabla, row, 3, barberos.get(cita["barber_id"], ""))
-            cliente_nombre = ""
-            if cita.get("client_id"):
-                cliente = repositories.get_client(cita["client_id"])
-                if cliente:
-                    cliente_nombre = cliente["name"]
-            self._set_cell(self.tabla, row, 4, cliente_nombre, Qt.AlignCenter)
-            self._set_cell(self.tabla, row, 5, servicios.get(cita.get("primary_service_id"), ""))
-            self._set_cell(self.tabla, row, 6, cita["status"])
-            telefono = ""
-            if cita.get("client_id") and cliente and cliente.get("phone"):
-                telefono = cliente["phone"]
-            self._set_cell(self.tabla, row, 7, telefono, Qt.AlignCenter)
-            self._set_cell(self.tabla, row, 8, cita.get("notes") or "", Qt.AlignLeft | Qt.AlignVCenter)
+        self.modelo.set_rows(agenda_service.listar_por_rango(inicio, fin, barber_id, estado))
 
     def _selected_id(self) -> int:
-        row = self.tabla.currentRow()
+        row = fila_actual(self.tabla)
         if row < 0:
             return 0
-        item = self.tabla.item(row, 0)
-        return int(item.text()) if item else 0
+        return self.modelo.value(row, "id")
 
     def _cancelar(self):
         cid = self._selected_id()
@@ -166,15 +157,31 @@ class AgendaTab(QWidget):
         lbl.setStyleSheet("font-size:16px; font-weight:bold;")
         return lbl
 
-    def _estilizar_tabla(self, tabla: QTableWidget):
-        tabla.horizontalHeader().setStyleSheet(
-            "QHeaderView::section {background-color:#e3f2fd; font-weight:bold;}"
-        )
+    def _autocompletar_clientes(self, le_cliente: QLineEdit, le_tel: QLineEdit) -> None:
+        """Sugiere clientes existentes por nombre o teléfono mientras se escribe."""
+        modelo = QStandardItemModel(self)
+        completer = QCompleter(modelo, le_cliente)
+        completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        completer.setCompletionRole(ROL_NOMBRE)
+        le_cliente.setCompleter(completer)
+
+        def buscar(texto: str):
+            modelo.clear()
+            if len(texto.strip()) < 2:
+                return
+            for cliente in repositories.search_clients(texto):
+                item = QStandardItem(f"{cliente['name']} · {cliente['phone']}" if cliente["phone"] else cliente["name"])
+                item.setData(cliente["name"], ROL_NOMBRE)
+                item.setData(cliente["phone"], ROL_TELEFONO)
+                modelo.appendRow(item)
+            completer.complete()
+
+        def elegir(index):
+            le_cliente.setText(index.data(ROL_NOMBRE))
+            le_tel.setText(index.data(ROL_TELEFONO) or "")
 
-    def _set_cell(self, tabla: QTableWidget, row: int, col: int, text: str, align=Qt.AlignCenter):
-        item = QTableWidgetItem(text)
-        item.setTextAlignment(align)
-        tabla.setItem(row, col, item)
+        le_cliente.textEdited.connect(buscar)
+        completer.activated[QModelIndex].connect(elegir)
 
     def _abrir_dialogo_cita(self):
         dialog = QDialog(self)
@@ -183,22 +190,24 @@ class AgendaTab(QWidget):
         form = QFormLayout()
 
         cb_barbero = QComboBox()
-        for b in repositories.list_barbers():
+        for b in catalog.barbers():
             cb_barbero.addItem(b["name"], b["id"])
 
         cb_servicio = QComboBox()
-        for s in repositories.list_services():
+        for s in catalog.services():
             cb_servicio.addItem(f"{s['name']} ({format_currency(s['price'])})", s["id"])
 
         de_fecha = QDateEdit(QDate.currentDate())
         de_fecha.setCalendarPopup(True)
-        te_hora = QTimeEdit()
-        te_hora.setDisplayFormat("hh:mm ap")
-        te_hora.setTime(QTime(9, 30))
+        cb_hora = QComboBox()
+        sp_semanas = QSpinBox()
+        sp_semanas.setRange(1, 52)
+        sp_semanas.setSuffix(" semana(s)")
         le_cliente = QLineEdit()
         le_cliente.setPlaceholderText("Nombre cliente")
         le_tel = QLineEdit()
         le_tel.setPlaceholderText("Teléfono (opcional)")
+        self._autocompletar_clientes(le_cliente, le_tel)
         te_notas = QTextEdit()
         te_notas.setPlaceholderText("Notas")
         te_notas.setFixedHeight(60)
@@ -206,7 +215,8 @@ class AgendaTab(QWidget):
         form.addRow("Barbero", cb_barbero)
         form.addRow("Servicio", cb_servicio)
         form.addRow("Fecha", de_fecha)
-        form.addRow("Hora", te_hora)
+        form.addRow("Hora", cb_hora)
+        form.addRow("Repetir", sp_semanas)
         form.addRow("Cliente", le_cliente)
         form.addRow("Teléfono", le_tel)
         form.addRow("Notas", te_notas)
@@ -215,26 +225,68 @@ class AgendaTab(QWidget):
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         layout.addWidget(buttons)
 
+        def cargar_horas():
+            cb_hora.clear()
+            barber_id = cb_barbero.currentData()
+            servicio_id = cb_servicio.currentData()
+            if barber_id is None or servicio_id is None:
+                return
+            try:
+                horas = agenda_service.horarios_disponibles(de_fecha.date().toPython(), servicio_id, barber_id)[barber_id]
+            except ValueError as exc:
+                cb_hora.addItem(str(exc), None)
+                return
+            for inicio in horas:
+                cb_hora.addItem(format_minutes_12h(to_epoch_min(inicio)), inicio)
+            if not horas:
+                cb_hora.addItem("Sin horarios disponibles", None)
+
+        cb_barbero.currentIndexChanged.connect(cargar_horas)
+        cb_servicio.currentIndexChanged.connect(cargar_horas)
+        de_fecha.dateChanged.connect(cargar_horas)
+        cargar_horas()
+
         def crear_cita():
             try:
                 barber_id = cb_barbero.currentData()
                 servicio_id = cb_servicio.currentData()
-                fecha = de_fecha.date().toPython()
-                hora = te_hora.time().toPython()
-                inicio = datetime.combine(fecha, hora)
-                agenda_service.crear_cita(
-                    barber_id=barber_id,
-                    client_name=le_cliente.text().strip() or None,
-                    client_phone=le_tel.text().strip() or None,
-                    servicio_principal_id=servicio_id,
-                    fecha=inicio,
-                    notas=te_notas.toPlainText().strip() or None,
-                )
-                QMessageBox.information(self, "Éxito", "Cita creada")
+                inicio = cb_hora.currentData()
+                if inicio is None:
+                    QMessageBox.warning(self, "Sin horario", "Seleccione una hora disponible")
+                    return
+                if sp_semanas.value() == 1:
+                    agenda_service.crear_cita(
+                        barber_id=barber_id,
+                        client_name=le_cliente.text().strip() or None,
+                        client_phone=le_tel.text().strip() or None,
+                        servicio_principal_id=servicio_id,
+                        fecha=inicio,
+                        notas=te_notas.toPlainText().strip() or None,
+                    )
+                    QMessageBox.information(self, "Éxito", "Cita creada")
+                else:
+                    resultado = agenda_service.crear_citas_semanales(
+                        barber_id=barber_id,
+                        client_name=le_cliente.text().strip() or None,
+                        client_phone=le_tel.text().strip() or None,
+                        servicio_principal_id=servicio_id,
+                        fecha=inicio,
+                        semanas=sp_semanas.value(),
+                        notas=te_notas.toPlainText().strip() or None,
+                    )
+                    mensaje = f"Citas creadas: {len(resultado['creadas'])}"
+                    if resultado["conflictos"]:
+                        detalle = "\n".join(
+                            f"{fecha.strftime('%d/%m/%Y')} {format_minutes_12h(to_epoch_min(fecha))}: {motivo}"
+                            for fecha, motivo in resultado["conflictos"]
+                        )
+                        mensaje += f"\nNo agendadas:\n{detalle}"
+                    QMessageBox.information(self, "Citas semanales", mensaje)
                 dialog.accept()
                 self._cargar_citas()
             except Exception as exc:
                 QMessageBox.warning(self, "Error", str(exc))
+                cargar_horas()
 
         buttons.accepted.connect(crear_cita)
         buttons.rejected.connect(dialog.reject)
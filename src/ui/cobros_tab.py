@@ -8,8 +8,6 @@ from PySide6.QtWidgets import (
     QLabel,
     QComboBox,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
     QDateEdit,
     QSpinBox,
     QMessageBox,
@@ -18,9 +16,13 @@ from PySide6.QtWidgets import (
 )
 
 from .. import repositories, config
+from ..catalog import catalog
 from ..services.payment_service import payment_service
-from ..utils import format_currency, format_time_12h
-from .widgets import titulo_label, estilizar_tabla
+from ..utils import format_currency, format_minutes_12h
+from .table_model import Column, RecordTableModel
+from .widgets import titulo_label, tabla_modelo, fila_actual
+
+
 class CobrosTab(QWidget):
     def __init__(self):
         super().__init__()
@@ -44,13 +46,21 @@ class CobrosTab(QWidget):
         filtros.addStretch()
         layout.addLayout(filtros)
 
-        self.tabla = QTableWidget(0, 6)
-        self.tabla.setHorizontalHeaderLabels(["ID", "Hora", "Barbero", "Cliente", "Estado", "Notas"])
+        self.modelo = RecordTableModel(
+            [
+                Column("ID", "id", align=Qt.AlignCenter),
+                Column("Hora", "start_min", format_minutes_12h, Qt.AlignCenter),
+                Column("Barbero", "barber_name", align=Qt.AlignCenter),
+                Column("Cliente", "client_name", align=Qt.AlignCenter),
+                Column("Estado", "status", align=Qt.AlignCenter),
+                Column("Notas", "notes"),
+            ]
+        )
+        self.tabla = tabla_modelo(self.modelo)
         header = self.tabla.horizontalHeader()
         header.setStretchLastSection(True)
         header.setSectionResizeMode(QHeaderView.Stretch)
-        self.tabla.itemSelectionChanged.connect(self._prefill_servicio_principal)
-        estilizar_tabla(self.tabla)
+        self.tabla.selectionModel().selectionChanged.connect(self._prefill_servicio_principal)
         layout.addWidget(self.tabla)
 
         form = QHBoxLayout()
@@ -69,12 +79,18 @@ class CobrosTab(QWidget):
 
         layout.addWidget(titulo_label("Servicios realizados"))
 
-        self.lines_table = QTableWidget(0, 3)
-        self.lines_table.setHorizontalHeaderLabels(["Servicio", "Cant.", "Subtotal"])
+        self.lines_model = RecordTableModel(
+            [
+                Column("Servicio", "name", align=Qt.AlignCenter),
+                Column("Cant.", "qty", align=Qt.AlignCenter),
+                Column("Subtotal", "subtotal", format_currency, Qt.AlignCenter),
+            ],
+            hidden=("service_id",),
+        )
+        self.lines_table = tabla_modelo(self.lines_model)
         header2 = self.lines_table.horizontalHeader()
         header2.setStretchLastSection(True)
         header2.setSectionResizeMode(QHeaderView.Stretch)
-        estilizar_tabla(self.lines_table)
         layout.addWidget(self.lines_table)
 
         acciones_lineas = QHBoxLayout()
@@ -96,7 +112,7 @@ class CobrosTab(QWidget):
 
     def _load_comboboxes(self):
         self.servicio_combo.clear()
-        for s in repositories.list_services():
+        for s in catalog.services():
             self.servicio_combo.addItem(f"{s['name']} ({format_currency(s['price'])})", s["id"])
         self.metodo_pago.clear()
         for m in config.METODOS_PAGO:
@@ -108,82 +124,54 @@ class CobrosTab(QWidget):
         fecha = self.fecha.date().toPython()
         inicio = datetime.combine(fecha, time(0, 0))
         fin = datetime.combine(fecha, time(23, 59))
-        citas = repositories.list_appointments_by_range(inicio.isoformat(), fin.isoformat(), None, "RESERVADA")
-        barberos = {b["id"]: b["name"] for b in repositories.list_barbers()}
-        clientes_cache = {}
-        self.tabla.setRowCount(0)
-        for row, cita in enumerate(citas):
-            self.tabla.insertRow(row)
-            self._set_cell(self.tabla, row, 0, str(cita["id"]))
-            self._set_cell(self.tabla, row, 1, format_time_12h(cita["start_dt"]))
-            self._set_cell(self.tabla, row, 2, barberos.get(cita["barber_id"], ""))
-            cliente_nombre = ""
-            if cita.get("client_id"):
-                if cita["client_id"] not in clientes_cache:
-                    clientes_cache[cita["client_id"]] = repositories.get_client(cita["client_id"])
-                cdata = clientes_cache[cita["client_id"]]
-                if cdata:
-                    cliente_nombre = cdata["name"]
-            self._set_cell(self.tabla, row, 3, cliente_nombre, Qt.AlignCenter)
-            self._set_cell(self.tabla, row, 4, cita["status"])
-            self._set_cell(self.tabla, row, 5, cita.get("notes") or "", Qt.AlignLeft | Qt.AlignVCenter)
-        self.lines_table.setRowCount(0)
+        citas = repositories.list_agenda_by_range(inicio, fin, None, "RESERVADA")
+        self.modelo.set_rows(citas)
+        self.lines_model.clear()
 
     def _selected_appointment_id(self) -> int:
-        row = self.tabla.currentRow()
+        row = fila_actual(self.tabla)
         if row < 0:
             return 0
-        item = self.tabla.item(row, 0)
-        return int(item.text()) if item else 0
+        return self.modelo.value(row, "id")
 
     def _prefill_servicio_principal(self):
         cita_id = self._selected_appointment_id()
         if not cita_id:
             return
         cita = repositories.get_appointment(cita_id)
-        self.lines_table.setRowCount(0)
+        self.lines_model.clear()
         if cita and cita.get("primary_service_id"):
-            servicio = next((s for s in repositories.list_services(True) if s["id"] == cita["primary_service_id"]), None)
+            servicio = catalog.service(cita["primary_service_id"])
             if servicio:
                 self._add_line(servicio, 1)
 
     def _agregar_servicio(self):
         servicio_id = self.servicio_combo.currentData()
-        servicio = next((s for s in repositories.list_services(True) if s["id"] == servicio_id), None)
+        servicio = catalog.service(servicio_id)
         if not servicio:
             return
         qty = self.qty_spin.value()
         self._add_line(servicio, qty)
 
     def _add_line(self, servicio: dict, qty: int):
-        row = self.lines_table.rowCount()
-        self.lines_table.insertRow(row)
-        self._set_cell(self.lines_table, row, 0, servicio["name"], Qt.AlignCenter)
-        self._set_cell(self.lines_table, row, 1, str(qty))
-        subtotal = servicio["price"] * qty
-        self._set_cell(self.lines_table, row, 2, format_currency(subtotal))
+        self.lines_model.append_row(
+            {"service_id": servicio["id"], "name": servicio["name"], "qty": qty, "subtotal": servicio["price"] * qty}
+        )
         self.lines_table.resizeColumnsToContents()
 
     def _build_payload(self):
         servicios = []
-        for row in range(self.lines_table.rowCount()):
-            nombre = self.lines_table.item(row, 0).text()
-            qty = int(self.lines_table.item(row, 1).text())
-            servicio = next((s for s in repositories.list_services(True) if s["name"] == nombre), None)
-            if servicio:
-                servicios.append({"service_id": servicio["id"], "qty": qty})
+        for row in range(self.lines_model.total_rows()):
+            servicios.append(
+                {"service_id": self.lines_model.value(row, "service_id"), "qty": self.lines_model.value(row, "qty")}
+            )
         return servicios
 
     def _eliminar_linea(self):
-        row = self.lines_table.currentRow()
+        row = fila_actual(self.lines_table)
         if row < 0:
             return
-        self.lines_table.removeRow(row)
-
-    def _set_cell(self, tabla: QTableWidget, row: int, col: int, text: str, align=Qt.AlignCenter):
-        item = QTableWidgetItem(text)
-        item.setTextAlignment(align)
-        tabla.setItem(row, col, item)
+        self.lines_model.remove_row(row)
 
     def _cobrar(self):
         cita_id = self._selected_appointment_id()
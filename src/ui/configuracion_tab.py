@@ -7,7 +7,6 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QLineEdit,
-    QDoubleSpinBox,
     QSpinBox,
     QPushButton,
     QTableWidget,
@@ -22,8 +21,11 @@ from PySide6.QtWidgets import (
 )
 
 from .. import repositories, config
+from ..catalog import catalog
+from ..services.agenda_service import agenda_service
 from ..utils import format_currency
-from .widgets import titulo_label, estilizar_tabla
+from .table_model import Column, RecordTableModel
+from .widgets import titulo_label, estilizar_tabla, tabla_modelo
 
 
 class ConfiguracionTab(QWidget):
@@ -72,13 +74,14 @@ class ConfiguracionTab(QWidget):
         form_serv = QHBoxLayout()
         self.input_nombre_serv = QLineEdit()
         self.input_nombre_serv.setPlaceholderText("Nombre servicio")
-        self.precio_spin = QDoubleSpinBox()
+        # Montos en pesos enteros
+        self.precio_spin = QSpinBox()
         self.precio_spin.setMaximum(10_000_000)
         self.precio_spin.setSingleStep(1000)
-        self.gan_barbero_spin = QDoubleSpinBox()
+        self.gan_barbero_spin = QSpinBox()
         self.gan_barbero_spin.setMaximum(10_000_000)
         self.gan_barbero_spin.setSingleStep(1000)
-        self.gan_barberia_spin = QDoubleSpinBox()
+        self.gan_barberia_spin = QSpinBox()
         self.gan_barberia_spin.setMaximum(10_000_000)
         self.gan_barberia_spin.setSingleStep(1000)
         self.duracion_spin = QSpinBox()
@@ -110,6 +113,11 @@ class ConfiguracionTab(QWidget):
         self.fecha_descanso = QDateEdit(QDate.currentDate())
         self.fecha_descanso.setCalendarPopup(True)
         self.fecha_descanso.setMinimumWidth(130)
+        self.fecha_descanso_hasta = QDateEdit(QDate.currentDate())
+        self.fecha_descanso_hasta.setCalendarPopup(True)
+        self.fecha_descanso_hasta.setMinimumWidth(130)
+        self.fecha_descanso.dateChanged.connect(self._ajustar_hasta_descanso)
+        self.checks_dias_descanso = [QCheckBox(d) for d in ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"]]
         self.nota_descanso = QLineEdit()
         self.nota_descanso.setPlaceholderText("Nota (opcional)")
         self.btn_agregar_descanso = QPushButton("Marcar descanso")
@@ -130,12 +138,28 @@ class ConfiguracionTab(QWidget):
         descanso.addStretch()
         layout.addLayout(descanso)
 
-        self.tabla_descansos = QTableWidget(0, 3)
-        self.tabla_descansos.setHorizontalHeaderLabels(["Barbero", "Fecha", "Nota"])
+        # Rango y días de la semana (sin marcar = todos los días del rango)
+        patron = QHBoxLayout()
+        patron.addWidget(QLabel("Hasta"))
+        patron.addWidget(self.fecha_descanso_hasta)
+        patron.addWidget(QLabel("Solo"))
+        for check in self.checks_dias_descanso:
+            patron.addWidget(check)
+        patron.addStretch()
+        layout.addLayout(patron)
+
+        self.modelo_descansos = RecordTableModel(
+            [
+                Column("Barbero", "barber_id", catalog.barber_name),
+                Column("Fecha", "off_date"),
+                Column("Nota", "note"),
+            ]
+        )
+        self.tabla_descansos = tabla_modelo(self.modelo_descansos)
         layout.addWidget(self.tabla_descansos)
 
     def _cargar_barberos(self):
-        barberos = repositories.list_barbers(include_inactive=True)
+        barberos = catalog.barbers(include_inactive=True)
         self.tabla_barberos.setRowCount(0)
         self.combo_descanso_barbero.clear()
         for idx, b in enumerate(barberos):
@@ -174,9 +198,7 @@ class ConfiguracionTab(QWidget):
             return
         try:
             # Nota: si hay FK de citas, esto puede fallar; aquí asumimos borrado simple
-            cur = repositories.db.conn.cursor()
-            cur.execute("DELETE FROM barbers WHERE id=?;", (barber_id,))
-            repositories.db.conn.commit()
+            repositories.delete_barber(barber_id)
             self.input_barbero.clear()
             self.check_barbero_activo.setChecked(True)
             self._cargar_barberos()
@@ -192,7 +214,7 @@ class ConfiguracionTab(QWidget):
         self.check_barbero_activo.setChecked(activo_text.lower().startswith("s"))
 
     def _cargar_servicios(self):
-        servicios = repositories.list_services(include_inactive=True)
+        servicios = catalog.services(include_inactive=True)
         self.tabla_servicios.setRowCount(0)
         self.current_service_id = None
         for idx, s in enumerate(servicios):
@@ -227,13 +249,12 @@ class ConfiguracionTab(QWidget):
         self.current_service_id = int(self.tabla_servicios.item(row, 0).text())
         self.input_nombre_serv.setText(self.tabla_servicios.item(row, 1).text())
         # valores mostrados están formateados, se requiere mapear al repo
-        servicios = {s["id"]: s for s in repositories.list_services(include_inactive=True)}
-        srv = servicios.get(self.current_service_id)
+        srv = catalog.service(self.current_service_id)
         if not srv:
             return
-        self.precio_spin.setValue(float(srv["price"]))
-        self.gan_barbero_spin.setValue(float(srv["barber_earning"]))
-        self.gan_barberia_spin.setValue(float(srv["shop_liquidation"]))
+        self.precio_spin.setValue(int(srv["price"]))
+        self.gan_barbero_spin.setValue(int(srv["barber_earning"]))
+        self.gan_barberia_spin.setValue(int(srv["shop_liquidation"]))
         self.duracion_spin.setValue(int(srv["duration_min"]))
 
     def _actualizar_servicio(self):
@@ -264,29 +285,33 @@ class ConfiguracionTab(QWidget):
             barber_id = self.combo_descanso_barbero.itemData(0)
         if barber_id is None:
             return
-        descansos = repositories.list_days_off(barber_id)
-        self.tabla_descansos.setRowCount(0)
-        barberos_map = {b["id"]: b["name"] for b in repositories.list_barbers(include_inactive=True)}
-        for idx, d in enumerate(descansos):
-            self.tabla_descansos.insertRow(idx)
-            self.tabla_descansos.setItem(idx, 0, QTableWidgetItem(barberos_map.get(d["barber_id"], "")))
-            self.tabla_descansos.setItem(idx, 1, QTableWidgetItem(d["off_date"]))
-            self.tabla_descansos.setItem(idx, 2, QTableWidgetItem(d.get("note") or ""))
+        self.modelo_descansos.set_rows(repositories.list_days_off(barber_id))
+
+    def _ajustar_hasta_descanso(self, fecha: QDate):
+        if self.fecha_descanso_hasta.date() < fecha:
+            self.fecha_descanso_hasta.setDate(fecha)
 
     def _agregar_descanso(self):
         barber_id = self.combo_descanso_barbero.currentData()
-        fecha = self.fecha_descanso.date().toPython()
-        citas = repositories.count_appointments_for_barber_and_date(barber_id, fecha.isoformat())
-        if citas > 0:
-            QMessageBox.warning(self, "No permitido", "Hay citas en esa fecha. Reprograme o cancele antes de marcar descanso.")
-            return
+        desde = self.fecha_descanso.date().toPython()
+        hasta = self.fecha_descanso_hasta.date().toPython()
+        dias = [i for i, check in enumerate(self.checks_dias_descanso) if check.isChecked()] or None
         try:
             nota = self.nota_descanso.text().strip() or None
-            repositories.add_day_off(barber_id, fecha, nota)
-            self.nota_descanso.clear()
-            self._cargar_descansos()
+            resultado = agenda_service.marcar_descansos(barber_id, desde, hasta, dias, nota)
         except Exception as exc:
             QMessageBox.warning(self, "Error", str(exc))
+            return
+        if resultado["conflictos"]:
+            fechas = ", ".join(f.strftime("%d/%m/%Y") for f in resultado["conflictos"])
+            QMessageBox.warning(
+                self,
+                "No permitido",
+                f"Hay citas en estas fechas: {fechas}. Reprograme o cancele antes de marcar descanso.",
+            )
+            return
+        self.nota_descanso.clear()
+        self._cargar_descansos()
 
     def _eliminar_descanso(self):
         barber_id = self.combo_descanso_barbero.currentData()
@@ -7,9 +7,17 @@ from .reportes_tab import ReportesTab
 from .configuracion_tab import ConfiguracionTab
 from .. import config
 
+# Cada pestaña se construye (y consulta la base) la primera vez que se activa
+PESTANAS = [
+    ("Agenda", AgendaTab),
+    ("Cobros", CobrosTab),
+    ("Reportes", ReportesTab),
+    ("Configuración", ConfiguracionTab),
+]
+
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, construir_pestanas: bool = True):
         super().__init__()
         self.setWindowTitle("Barberia Kignston Town")
         self.resize(1100, 720)
@@ -17,15 +25,39 @@ class MainWindow(QMainWindow):
         self._set_icon()
 
         self.tabs = QTabWidget()
-        self.tabs.addTab(AgendaTab(), "Agenda")
-        self.tabs.addTab(CobrosTab(), "Cobros")
-        self.tabs.addTab(ReportesTab(), "Reportes")
-        self.tabs.addTab(ConfiguracionTab(), "Configuración")
+        self._contenedores = []
+        self._pestanas = {}
+        for titulo, _cls in PESTANAS:
+            contenedor = QWidget()
+            QVBoxLayout(contenedor).setContentsMargins(0, 0, 0, 0)
+            self._contenedores.append(contenedor)
+            self.tabs.addTab(contenedor, titulo)
+        self._construccion_habilitada = construir_pestanas
+        self.tabs.currentChanged.connect(self._asegurar_pestana)
 
         container = QWidget()
         layout = QVBoxLayout(container)
         layout.addWidget(self.tabs)
         self.setCentralWidget(container)
+        if construir_pestanas:
+            self._asegurar_pestana(self.tabs.currentIndex())
+
+    def habilitar_pestanas(self) -> None:
+        """Permite construir pestañas (una vez lista la base) y construye la visible."""
+        self._construccion_habilitada = True
+        self._asegurar_pestana(self.tabs.currentIndex())
+
+    def pestana(self, index: int) -> QWidget:
+        """Devuelve la pestaña real del índice, construyéndola si aún no existe."""
+        self._asegurar_pestana(index)
+        return self._pestanas[index]
+
+    def _asegurar_pestana(self, index: int) -> None:
+        if not self._construccion_habilitada or index < 0 or index in self._pestanas:
+            return
+        widget = PESTANAS[index][1]()
+        self._pestanas[index] = widget
+        self._contenedores[index].layout().addWidget(widget)
 
     def _apply_global_styles(self):
         self.setStyleSheet(
@@ -38,12 +70,12 @@ class MainWindow(QMainWindow):
             }
             QPushButton:hover { background-color: #1565c0; }
             QHeaderView::section { background-color: #e3f2fd; font-weight: bold; }
-            QTableWidget {
+            QTableWidget, QTableView {
                 background-color: #ffffff;
                 color: #000000;
                 gridline-color: #cccccc;
             }
-            QTableWidget::item:selected { background-color: #e0f2ff; color: #000000; }
+            QTableWidget::item:selected, QTableView::item:selected { background-color: #e0f2ff; color: #000000; }
             QLineEdit, QComboBox, QDateEdit, QTimeEdit, QSpinBox, QDoubleSpinBox, QTextEdit {
                 background-color: #ffffff;
                 color: #000000;
@@ -56,5 +88,3 @@ class MainWindow(QMainWindow):
     def _set_icon(self):
         if config.LOGO_PATH.exists():
             self.setWindowIcon(QIcon(str(config.LOGO_PATH)))
-
-
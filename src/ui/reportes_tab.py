@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
 from pathlib import Path
 
-from PySide6.QtCore import QDate
+from PySide6.QtCore import QDate, QSignalBlocker, Qt
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -10,23 +10,34 @@ from PySide6.QtWidgets import (
     QPushButton,
     QComboBox,
     QDateEdit,
-    QTableWidget,
-    QTableWidgetItem,
     QMessageBox,
     QInputDialog,
     QLineEdit,
     QHeaderView,
+    QProgressDialog,
+    QProgressBar,
 )
 
-from ..services.report_service import report_service
+from ..services.report_service import (
+    ExportacionCancelada,
+    OperacionCancelada,
+    formatear_servicios,
+    report_service,
+    servicio_en_conexion_propia,
+)
 from ..utils import format_currency
-from .. import config, repositories
-from .widgets import titulo_label, estilizar_tabla
+from .. import config
+from ..catalog import catalog
+from .table_model import Column, RecordTableModel
+from .widgets import titulo_label, tabla_modelo, fila_actual
+from .workers import Tarea
 
 
 class ReportesTab(QWidget):
     def __init__(self):
         super().__init__()
+        self._tarea_reporte = None
+        self._token_reporte = 0
         self._build_ui()
         self._aplicar_rango_rapido("Hoy")
         self._cargar_barberos()
@@ -58,33 +69,66 @@ class ReportesTab(QWidget):
         self.btn_pdf = QPushButton("Exportar PDF")
         self.btn_pdf.clicked.connect(self._exportar_pdf)
         controles.addWidget(self.btn_pdf)
+        self.progreso_reporte = QProgressBar()
+        self.progreso_reporte.setMaximumWidth(160)
+        self.progreso_reporte.hide()
+        controles.addWidget(self.progreso_reporte)
+        self.btn_cancelar_reporte = QPushButton("Cancelar")
+        self.btn_cancelar_reporte.clicked.connect(self._cancelar_reporte)
+        self.btn_cancelar_reporte.hide()
+        controles.addWidget(self.btn_cancelar_reporte)
         controles.addStretch()
         layout.addLayout(controles)
+        # Si cambian los filtros con un cálculo en curso, se descarta y se recalcula
+        self.fecha_inicio.dateChanged.connect(self._reiniciar_si_en_curso)
+        self.fecha_fin.dateChanged.connect(self._reiniciar_si_en_curso)
+        self.barbero_combo.currentIndexChanged.connect(self._reiniciar_si_en_curso)
 
         self.resumen_label = QLabel("Totales")
         layout.addWidget(self.resumen_label)
 
         layout.addWidget(titulo_label("Detalle por servicio"))
-        self.tabla_barbero = QTableWidget(0, 5)
-        self.tabla_barbero.setHorizontalHeaderLabels(["Nombre Barbero", "Ventas", "Total Barbero", "Barbería", "Servicios"])
+        self.modelo_barbero = RecordTableModel(
+            [
+                Column("Nombre Barbero", "clave"),
+                Column("Ventas", "ventas", format_currency),
+                Column("Total Barbero", "barbero", format_currency),
+                Column("Barbería", "barberia", format_currency),
+                Column("Servicios", "servicios"),
+            ]
+        )
+        self.tabla_barbero = tabla_modelo(self.modelo_barbero)
         self.tabla_barbero.horizontalHeader().setStretchLastSection(True)
-        estilizar_tabla(self.tabla_barbero)
         layout.addWidget(self.tabla_barbero)
 
         layout.addWidget(titulo_label("Totales generales"))
-        self.tabla_dias = QTableWidget(0, 4)
-        self.tabla_dias.setHorizontalHeaderLabels(["Fecha", "Ventas", "Ganancia Total Barberos", "Ganancia Total Barbería"])
+        self.modelo_dias = RecordTableModel(
+            [
+                Column("Fecha", "clave"),
+                Column("Ventas", "ventas", format_currency),
+                Column("Ganancia Total Barberos", "barbero", format_currency),
+                Column("Ganancia Total Barbería", "barberia", format_currency),
+            ]
+        )
+        self.tabla_dias = tabla_modelo(self.modelo_dias)
         header_totales = self.tabla_dias.horizontalHeader()
         header_totales.setStretchLastSection(True)
         header_totales.setSectionResizeMode(QHeaderView.Stretch)
-        estilizar_tabla(self.tabla_dias)
         layout.addWidget(self.tabla_dias)
 
         layout.addWidget(titulo_label("Cobros realizados"))
-        self.tabla_cobros = QTableWidget(0, 6)
-        self.tabla_cobros.setHorizontalHeaderLabels(["ID Cita", "Fecha", "Barbero", "Total", "Método de pago", "Servicios"])
+        self.modelo_cobros = RecordTableModel(
+            [
+                Column("ID Cita", "appointment_id"),
+                Column("Fecha", "fecha"),
+                Column("Barbero", "barber"),
+                Column("Total", "total", format_currency),
+                Column("Método de pago", "metodo_pago"),
+                Column("Servicios", "servicios"),
+            ]
+        )
+        self.tabla_cobros = tabla_modelo(self.modelo_cobros)
         self.tabla_cobros.horizontalHeader().setStretchLastSection(True)
-        estilizar_tabla(self.tabla_cobros)
         layout.addWidget(self.tabla_cobros)
 
         acciones = QHBoxLayout()
@@ -110,78 +154,147 @@ class ReportesTab(QWidget):
             fin = (inicio + timedelta(days=32)).replace(day=1) - timedelta(days=1)
         else:
             inicio = fin = hoy
-        self.fecha_inicio.setDate(QDate(inicio.year, inicio.month, inicio.day))
-        self.fecha_fin.setDate(QDate(fin.year, fin.month, fin.day))
+        # Las dos fechas cambian juntas: un solo recálculo en vez de uno por cada dateChanged
+        with QSignalBlocker(self.fecha_inicio), QSignalBlocker(self.fecha_fin):
+            self.fecha_inicio.setDate(QDate(inicio.year, inicio.month, inicio.day))
+            self.fecha_fin.setDate(QDate(fin.year, fin.month, fin.day))
+        self._reiniciar_si_en_curso()
 
     def _generar(self):
+        """Calcula el resumen en un hilo de trabajo; las tablas actuales quedan hasta que llegan los nuevos datos."""
         inicio_dt = datetime.combine(self.fecha_inicio.date().toPython(), datetime.min.time())
         fin_dt = datetime.combine(self.fecha_fin.date().toPython(), datetime.max.time())
         barber_id = self.barbero_combo.currentData()
-        data = report_service.resumen(inicio_dt, fin_dt, barber_id)
+        if self._tarea_reporte is not None:
+            self._tarea_reporte.cancelar()
+        self._token_reporte += 1
+        token = self._token_reporte
+
+        def calcular(progreso, cancelado):
+            with servicio_en_conexion_propia() as servicio:
+                return servicio.resumen(inicio_dt, fin_dt, barber_id, progreso=progreso, cancelado=cancelado)
+
+        tarea = Tarea(calcular, OperacionCancelada)
+        tarea.senales.progreso.connect(lambda hechos, total: self._progreso_reporte(token, hechos, total))
+        tarea.senales.terminado.connect(lambda data: self._aplicar_resumen(token, (inicio_dt, fin_dt, barber_id), data))
+        tarea.senales.error.connect(lambda msg: self._fin_reporte(token, msg))
+        tarea.senales.cancelado.connect(lambda: self._fin_reporte(token))
+        self._tarea_reporte = tarea
+        self.progreso_reporte.setRange(0, 0)
+        self.progreso_reporte.show()
+        self.btn_cancelar_reporte.show()
+        tarea.iniciar()
+
+    def _reiniciar_si_en_curso(self, *_):
+        if self._tarea_reporte is not None:
+            self._generar()
+
+    def _cancelar_reporte(self):
+        if self._tarea_reporte is not None:
+            self._tarea_reporte.cancelar()
+
+    def _progreso_reporte(self, token: int, hechos: int, total: int):
+        if token != self._token_reporte:
+            return
+        self.progreso_reporte.setRange(0, total)
+        self.progreso_reporte.setValue(hechos)
+
+    def _fin_reporte(self, token: int, error: str = None):
+        # Resultados de un cálculo reemplazado por otro más nuevo se ignoran
+        if token != self._token_reporte:
+            return
+        self._tarea_reporte = None
+        self.progreso_reporte.hide()
+        self.btn_cancelar_reporte.hide()
+        if error:
+            QMessageBox.critical(self, "Error al generar reporte", error)
+
+    def _aplicar_resumen(self, token: int, filtros: tuple, data):
+        if token != self._token_reporte:
+            return
+        self._fin_reporte(token)
+        inicio_dt, fin_dt, barber_id = filtros
         tot = data["totales"]
         self.resumen_label.setText(
             f"Ventas: {format_currency(tot['ventas'])} | Barberos: {format_currency(tot['barberos'])} | Barbería: {format_currency(tot['barberia'])}"
         )
-        self._llenar_tabla(self.tabla_barbero, data["por_barbero"], True)
-        self._llenar_tabla(self.tabla_dias, data["por_dia"], False)
+        self._llenar_tabla(self.modelo_barbero, data["por_barbero"], True)
+        self._llenar_tabla(self.modelo_dias, data["por_dia"], False)
         self._llenar_cobros(data.get("pagos_detalle", []))
         self._ultimo_resumen = (inicio_dt, fin_dt, data, barber_id)
 
-    def _llenar_tabla(self, tabla: QTableWidget, data_map, incluir_servicios: bool):
-        tabla.setRowCount(0)
-        for idx, (key, valores) in enumerate(data_map.items()):
-            tabla.insertRow(idx)
-            tabla.setItem(idx, 0, QTableWidgetItem(str(key)))
-            tabla.setItem(idx, 1, QTableWidgetItem(format_currency(valores["ventas"])))
-            tabla.setItem(idx, 2, QTableWidgetItem(format_currency(valores["barbero"])))
-            tabla.setItem(idx, 3, QTableWidgetItem(format_currency(valores["barberia"])))
+    def _llenar_tabla(self, modelo: RecordTableModel, data_map, incluir_servicios: bool):
+        filas = []
+        for key, valores in data_map.items():
+            fila = {"clave": str(key), "ventas": valores["ventas"], "barbero": valores["barbero"], "barberia": valores["barberia"]}
             if incluir_servicios:
-                servicios_raw = valores.get("servicios", [])
-                if servicios_raw and isinstance(servicios_raw[0], tuple):
-                    agregados = {}
-                    for nombre, qty in servicios_raw:
-                        agregados[nombre] = agregados.get(nombre, 0) + qty
-                    servicios_txt = ", ".join([f"{n} x{q}" for n, q in agregados.items()])
-                else:
-                    servicios_txt = ", ".join(servicios_raw)
-                tabla.setItem(idx, 4, QTableWidgetItem(servicios_txt))
+                fila["servicios"] = formatear_servicios(valores.get("servicios", {}))
+            filas.append(fila)
+        modelo.set_rows(filas)
 
     def _exportar_pdf(self):
         if not hasattr(self, "_ultimo_resumen"):
             QMessageBox.warning(self, "Sin datos", "Genere un reporte primero")
             return
-        inicio, fin, data, _ = self._ultimo_resumen
+        if getattr(self, "_tarea_pdf", None) is not None:
+            return
+        inicio, fin, _, barber_id = self._ultimo_resumen
         try:
             config.REPORTS_DIR.mkdir(parents=True, exist_ok=True)
-            nombre = f"reporte_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            path = config.REPORTS_DIR / nombre
-            report_service.exportar_pdf(path, data, "Reporte Barbería", (inicio, fin))
-            QMessageBox.information(self, "PDF generado", f"Archivo: {path}")
-        except Exception as exc:
+        except OSError as exc:
             QMessageBox.critical(self, "Error al exportar PDF", str(exc))
+            return
+        nombre = f"reporte_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        path = config.REPORTS_DIR / nombre
+
+        def exportar(progreso, cancelado):
+            # conexión propia: la de la UI no se comparte entre hilos
+            with servicio_en_conexion_propia() as servicio:
+                return servicio.exportar_pdf_detallado(
+                    path, inicio, fin, barber_id, "Reporte Barbería", progreso=progreso, cancelado=cancelado
+                )
+
+        tarea = Tarea(exportar, ExportacionCancelada)
+        dialogo = QProgressDialog("Generando PDF...", "Cancelar", 0, 0, self)
+        dialogo.setWindowTitle("Exportar PDF")
+        dialogo.setWindowModality(Qt.WindowModal)
+        dialogo.setMinimumDuration(300)
+        dialogo.canceled.connect(tarea.cancelar)
+        tarea.senales.progreso.connect(lambda hechos, total: self._progreso_pdf(dialogo, hechos, total))
+        tarea.senales.terminado.connect(lambda ruta: self._fin_pdf(dialogo, "ok", ruta))
+        tarea.senales.error.connect(lambda msg: self._fin_pdf(dialogo, "error", msg))
+        tarea.senales.cancelado.connect(lambda: self._fin_pdf(dialogo, "cancelado", None))
+        self._tarea_pdf = tarea
+        self.btn_pdf.setEnabled(False)
+        tarea.iniciar()
+
+    def _progreso_pdf(self, dialogo: QProgressDialog, hechos: int, total: int):
+        if dialogo.wasCanceled():
+            return
+        dialogo.setMaximum(max(total, 1))
+        dialogo.setValue(min(hechos, total))
+
+    def _fin_pdf(self, dialogo: QProgressDialog, resultado: str, valor):
+        self._tarea_pdf = None
+        self.btn_pdf.setEnabled(True)
+        dialogo.canceled.disconnect()
+        dialogo.close()
+        if resultado == "ok":
+            QMessageBox.information(self, "PDF generado", f"Archivo: {valor}")
+        elif resultado == "error":
+            QMessageBox.critical(self, "Error al exportar PDF", valor)
 
     def _llenar_cobros(self, pagos_detalle):
-        self.tabla_cobros.setRowCount(0)
-        for idx, pago in enumerate(pagos_detalle):
-            self.tabla_cobros.insertRow(idx)
-            self.tabla_cobros.setItem(idx, 0, QTableWidgetItem(str(pago["appointment_id"])))
-            self.tabla_cobros.setItem(idx, 1, QTableWidgetItem(pago["fecha"]))
-            self.tabla_cobros.setItem(idx, 2, QTableWidgetItem(pago["barber"]))
-            self.tabla_cobros.setItem(idx, 3, QTableWidgetItem(format_currency(pago["total"])))
-            self.tabla_cobros.setItem(idx, 4, QTableWidgetItem(pago.get("metodo_pago", "")))
-            self.tabla_cobros.setItem(idx, 5, QTableWidgetItem(pago.get("servicios", "")))
+        self.modelo_cobros.set_rows(pagos_detalle)
 
     def _borrar_cobro(self):
-        if not self.tabla_cobros.rowCount():
+        if not self.modelo_cobros.rowCount():
             return
-        row = self.tabla_cobros.currentRow()
+        row = fila_actual(self.tabla_cobros)
         if row < 0:
             QMessageBox.warning(self, "Seleccione", "Seleccione un cobro de la lista")
             return
-        cid_item = self.tabla_cobros.item(row, 0)
-        if not cid_item:
-            return
-        appointment_id = int(cid_item.text())
+        appointment_id = self.modelo_cobros.value(row, "appointment_id")
         pwd, ok = QInputDialog.getText(self, "Contraseña requerida", "Ingrese contraseña para borrar:", QLineEdit.Password)
         if not ok:
             return
@@ -199,7 +312,7 @@ class ReportesTab(QWidget):
     def _cargar_barberos(self):
         self.barbero_combo.clear()
         self.barbero_combo.addItem("Todos", None)
-        for b in repositories.list_barbers():
+        for b in catalog.barbers():
             self.barbero_combo.addItem(b["name"], b["id"])
 
 
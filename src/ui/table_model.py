@@ -0,0 +1,127 @@
+from typing import Any, Callable, Iterable, List, Mapping, Optional, Sequence
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+class Column:
+    """Definición de columna: encabezado, clave del registro, formateador y alineación."""
+
+    __slots__ = ("header", "key", "fmt", "align")
+
+    def __init__(
+        self,
+        header: str,
+        key: str,
+        fmt: Optional[Callable[[Any], str]] = None,
+        align=Qt.AlignLeft | Qt.AlignVCenter,
+    ):
+        self.header = header
+        self.key = key
+        self.fmt = fmt
+        self.align = align
+
+
+class RecordTableModel(QAbstractTableModel):
+    """Modelo de solo lectura respaldado por un arreglo de valores por columna.
+
+    Los textos se formatean en data() solo para las celdas visibles y las filas se
+    exponen por lotes con canFetchMore/fetchMore, así miles de cobros no congelan la vista.
+    """
+
+    BATCH_SIZE = 200
+
+    def __init__(self, columns: Sequence[Column], hidden: Sequence[str] = (), parent=None):
+        super().__init__(parent)
+        self._columns = list(columns)
+        # Claves guardadas: primero las visibles (mismo índice que la columna) y luego las ocultas
+        self._keys = [c.key for c in self._columns] + [k for k in hidden if k not in {c.key for c in self._columns}]
+        self._key_index = {k: i for i, k in enumerate(self._keys)}
+        self._values: List[list] = [[] for _ in self._keys]
+        self._total = 0
+        self._loaded = 0
+
+    # Carga de datos
+    def set_rows(self, rows: Iterable[Mapping]) -> None:
+        self.beginResetModel()
+        values = [[] for _ in self._keys]
+        appenders = [(col.append, key) for col, key in zip(values, self._keys)]
+        for row in rows:
+            for append, key in appenders:
+                append(row[key])
+        self._values = values
+        self._total = len(values[0]) if values else 0
+        self._loaded = min(self._total, self.BATCH_SIZE)
+        self.endResetModel()
+
+    def clear(self) -> None:
+        self.set_rows([])
+
+    def append_row(self, row: Mapping) -> None:
+        self._fetch_all()
+        position = self._total
+        self.beginInsertRows(QModelIndex(), position, position)
+        for col, key in zip(self._values, self._keys):
+            col.append(row[key])
+        self._total += 1
+        self._loaded = self._total
+        self.endInsertRows()
+
+    def remove_row(self, row: int) -> None:
+        if not 0 <= row < self._loaded:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        for col in self._values:
+            del col[row]
+        self._total -= 1
+        self._loaded -= 1
+        self.endRemoveRows()
+
+    def value(self, row: int, key: str) -> Any:
+        """Valor crudo (sin formatear) de la fila para la clave indicada."""
+        return self._values[self._key_index[key]][row]
+
+    def total_rows(self) -> int:
+        return self._total
+
+    def _fetch_all(self) -> None:
+        if self._loaded < self._total:
+            self.fetchMore(QModelIndex())
+
+    # API de QAbstractTableModel
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._columns)
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and self._loaded < self._total
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if parent.isValid():
+            return
+        remaining = self._total - self._loaded
+        if remaining <= 0:
+            return
+        count = min(self.BATCH_SIZE, remaining)
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = self._columns[index.column()]
+        if role == Qt.DisplayRole:
+            value = self._values[index.column()][index.row()]
+            if column.fmt is not None:
+                return column.fmt(value)
+            return "" if value is None else str(value)
+        if role == Qt.TextAlignmentRole:
+            return column.align
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self._columns[section].header
+        return super().headerData(section, orientation, role)
@@ -1,5 +1,7 @@
 from PySide6.QtCore import Qt
-from PySide6.QtWidgets import QLabel, QTableWidget
+from PySide6.QtWidgets import QAbstractItemView, QLabel, QTableView
+
+from .table_model import RecordTableModel
 
 
 def titulo_label(texto: str) -> QLabel:
@@ -9,12 +11,23 @@ def titulo_label(texto: str) -> QLabel:
     return lbl
 
 
-def estilizar_tabla(tabla: QTableWidget) -> None:
+def estilizar_tabla(tabla: QTableView) -> None:
     tabla.horizontalHeader().setStyleSheet(
         "QHeaderView::section {background-color:#e3f2fd; font-weight:bold;}"
     )
 
 
+def tabla_modelo(modelo: RecordTableModel) -> QTableView:
+    """Vista de tabla de solo lectura con selección por fila para un RecordTableModel."""
+    tabla = QTableView()
+    tabla.setModel(modelo)
+    tabla.setSelectionBehavior(QAbstractItemView.SelectRows)
+    tabla.setSelectionMode(QAbstractItemView.SingleSelection)
+    tabla.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    estilizar_tabla(tabla)
+    return tabla
 
 
-
+def fila_actual(tabla: QTableView) -> int:
+    index = tabla.currentIndex()
+    return index.row() if index.isValid() else -1
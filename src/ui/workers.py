@@ -0,0 +1,57 @@
+import threading
+from typing import Any, Callable
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class SenalesTarea(QObject):
+    progreso = Signal(int, int)
+    terminado = Signal(object)
+    error = Signal(str)
+    cancelado = Signal()
+
+
+class Tarea(QRunnable):
+    """Ejecuta `funcion(progreso, cancelado)` en el QThreadPool y avisa por señales.
+
+    Las señales cruzan al hilo de la UI por conexión en cola, así los widgets solo se
+    tocan desde el hilo principal. `cancelacion` es el tipo de excepción con el que la
+    función indica que se detuvo a pedido del usuario.
+    """
+
+    def __init__(self, funcion: Callable[[Callable[[int, int], None], Callable[[], bool]], Any], cancelacion=()):
+        super().__init__()
+        self.funcion = funcion
+        self.cancelacion = cancelacion
+        self.senales = SenalesTarea()
+        self._cancelar = threading.Event()
+        self.setAutoDelete(False)
+
+    # Tareas en ejecución: la referencia evita que Python libere una tarea cancelada
+    # que la UI ya reemplazó mientras sigue corriendo en el pool
+    _activas = set()
+
+    def iniciar(self, pool: QThreadPool = None) -> None:
+        Tarea._activas.add(self)
+        for senal in (self.senales.terminado, self.senales.error, self.senales.cancelado):
+            senal.connect(self._liberar)
+        (pool or QThreadPool.globalInstance()).start(self)
+
+    def _liberar(self, *_):
+        Tarea._activas.discard(self)
+
+    def cancelar(self):
+        self._cancelar.set()
+
+    def esta_cancelada(self) -> bool:
+        return self._cancelar.is_set()
+
+    def run(self):
+        try:
+            resultado = self.funcion(self.senales.progreso.emit, self.esta_cancelada)
+        except self.cancelacion:
+            self.senales.cancelado.emit()
+        except Exception as exc:
+            self.senales.error.emit(str(exc))
+        else:
+            self.senales.terminado.emit(resultado)
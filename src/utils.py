@@ -1,18 +1,23 @@
-from datetime import datetime, time, timedelta
-from typing import Tuple
+from datetime import date, datetime, time, timedelta
+from typing import Optional, Tuple
 
 from . import config
 
 
-def format_currency(value: float) -> str:
-    """Formatea número a COP con separador de miles usando punto."""
+def format_currency(value: int) -> str:
+    """Formatea pesos a COP con separador de miles usando punto."""
     try:
-        formatted = f"${value:,.0f}"
+        formatted = f"${round(value):,}"
     except Exception:
         formatted = "$0"
     return formatted.replace(",", ".")
 
 
+def to_pesos(value) -> int:
+    """Monto en pesos enteros (los montos se guardan como INTEGER)."""
+    return int(round(value))
+
+
 def clamp_time_to_schedule(dt: datetime) -> datetime:
     """Ajusta un datetime al rango permitido del día."""
     start = dt.replace(
@@ -62,6 +67,45 @@ def to_iso(dt: datetime) -> str:
     return dt.isoformat()
 
 
+# Minutos y días desde 1970-01-01 de la hora local, igual que las columnas *_min y *_day
+_EPOCA = datetime(1970, 1, 1)
+_EPOCA_ORDINAL = _EPOCA.toordinal()
+
+
+def to_epoch_min(dt: datetime) -> int:
+    return (dt.toordinal() - _EPOCA_ORDINAL) * 1440 + dt.hour * 60 + dt.minute
+
+
+def from_epoch_min(minutos: int) -> datetime:
+    return _EPOCA + timedelta(minutes=minutos)
+
+
+def to_day_number(value: date) -> int:
+    return value.toordinal() - _EPOCA_ORDINAL
+
+
+def from_day_number(dia: int) -> date:
+    return date.fromordinal(_EPOCA_ORDINAL + dia)
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Clave de teléfono: solo dígitos y sin el indicativo 57 de números completos."""
+    if not phone:
+        return None
+    digitos = "".join(ch for ch in phone if ch.isdigit())
+    if len(digitos) == 12 and digitos.startswith("57"):
+        digitos = digitos[2:]
+    return digitos or None
+
+
+def format_minutes_12h(minutos: Optional[int]) -> str:
+    """Hora 12h con am/pm a partir de minutos desde 1970 (start_min, end_min), sin parsear texto."""
+    if minutos is None:
+        return ""
+    hora, minuto = divmod(minutos % 1440, 60)
+    return f"{(hora - 1) % 12 + 1}:{minuto:02d} {'am' if hora < 12 else 'pm'}"
+
+
 def format_time_12h(iso_dt: str) -> str:
     """Convierte un datetime ISO a formato 12h con am/pm."""
     try:
@@ -0,0 +1,22 @@
+from datetime import date
+
+import pytest
+
+from benchmarks.datagen import generar
+from src.catalog import catalog
+from src.database import db
+from src.services.report_service import report_cache
+
+# Fecha fija: los datos sintéticos no dependen del día en que se corren las pruebas
+HASTA = date(2025, 6, 14)
+
+
+@pytest.fixture(scope="module")
+def base(tmp_path_factory):
+    """Base sintética de un año y medio con el singleton `db` apuntando a ella."""
+    path = tmp_path_factory.mktemp("datos") / "barberia.db"
+    datos = generar(path, anios=1.5, barberos=3, clientes=300, citas_por_dia=6, hasta=HASTA)
+    yield datos
+    db.close()
+    catalog.invalidate()
+    report_cache.cerrar()
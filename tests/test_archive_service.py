@@ -0,0 +1,99 @@
+"""Archivo anual: reportes y exportaciones dan lo mismo antes y después de archivar."""
+
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from src.database import db
+from src.services.archive_service import ArchiveService, adjuntar_archivos
+from src.services.export_service import ExportService
+from src.services.report_service import ReportService
+
+from .conftest import HASTA
+
+CORTE = date(2025, 1, 1)
+RANGOS = [
+    (datetime(2024, 3, 1, 10, 30), datetime(2024, 5, 20, 16, 0), None),
+    (datetime(2024, 12, 20), datetime(2025, 1, 15, 23, 59, 59), 2),
+    (datetime(2023, 1, 1), datetime.combine(HASTA, time.max), None),
+]
+
+
+def _reportes():
+    servicio = ReportService(cache=None)
+    salida = []
+    for inicio, fin, barber_id in RANGOS:
+        data = servicio.resumen(inicio, fin, barber_id)
+        salida.append((
+            data["totales"], data["por_barbero"], data["por_dia"], data["citas"], list(data["pagos_detalle"]),
+            servicio.contar_pagos(inicio, fin, barber_id), list(servicio.iter_detalle_pagos(inicio, fin, barber_id)),
+        ))
+    return salida
+
+
+def _exportaciones(carpeta):
+    servicio = ExportService()
+    salida = []
+    for conjunto in ("citas", "cobros"):
+        for formato in ("csv", "jsonl"):
+            for desde, hasta in ((None, None), (datetime(2024, 11, 1), datetime(2025, 2, 1))):
+                destino = carpeta / f"{conjunto}.{formato}"
+                resultado = servicio.exportar(conjunto, formato, destino, desde, hasta)
+                salida.append((resultado["filas"], resultado["ultimo_id"], destino.read_text(encoding="utf-8")))
+    return salida
+
+
+@pytest.fixture(scope="module")
+def archivada(base, tmp_path_factory):
+    carpeta = tmp_path_factory.mktemp("exportes")
+    antes = {"reportes": _reportes(), "exportes": _exportaciones(carpeta)}
+    resultado = ArchiveService(db).archivar(CORTE, backup_dir=tmp_path_factory.mktemp("backups"))
+    return {"antes": antes, "resultado": resultado, "carpeta": carpeta}
+
+
+def test_archiva_por_anio(archivada):
+    assert sorted(archivada["resultado"]["anios"]) == [2023, 2024]
+    minimo = db.conn.execute("SELECT MIN(start_dt) FROM appointments WHERE status != 'RESERVADA';").fetchone()[0]
+    assert minimo >= CORTE.isoformat()
+    assert db.conn.execute("PRAGMA foreign_key_check;").fetchall() == []
+
+
+def test_reportes_iguales_tras_archivar(archivada):
+    assert _reportes() == archivada["antes"]["reportes"]
+
+
+def test_exportaciones_iguales_tras_archivar(archivada):
+    assert _exportaciones(archivada["carpeta"]) == archivada["antes"]["exportes"]
+
+
+def test_borrar_cobro_archivado_falla(archivada):
+    adjuntar_archivos(db)
+    archivado = db.conn.execute(
+        "SELECT appointment_id FROM archive_2024.payments ORDER BY id LIMIT 1;"
+    ).fetchone()[0]
+    with pytest.raises(ValueError, match="archivado"):
+        ReportService(cache=None).borrar_cobro(archivado)
+    assert db.conn.execute("SELECT COUNT(*) FROM archive_2024.payments WHERE appointment_id=?;", (archivado,)).fetchone()[0] == 1
+
+
+def test_borrar_cobro_activo(archivada):
+    activo = db.conn.execute("SELECT appointment_id FROM main.payments ORDER BY id DESC LIMIT 1;").fetchone()[0]
+    ReportService(cache=None).borrar_cobro(activo)
+    assert db.conn.execute("SELECT status FROM appointments WHERE id=?;", (activo,)).fetchone()[0] == "RESERVADA"
+    with pytest.raises(ValueError, match="no tiene cobro"):
+        ReportService(cache=None).borrar_cobro(activo)
+
+
+def test_reservas_quedan_en_la_base_activa(archivada):
+    adjuntar_archivos(db)
+    reservas = db.conn.execute(
+        "SELECT COUNT(*) FROM main.appointments WHERE status = 'RESERVADA' AND start_dt < ?;", (CORTE.isoformat(),)
+    ).fetchone()[0]
+    assert reservas > 0
+    for anio in archivada["resultado"]["anios"]:
+        assert db.conn.execute(f"SELECT COUNT(*) FROM archive_{anio}.appointments WHERE status = 'RESERVADA';").fetchone()[0] == 0
+
+
+def test_corte_del_mes_en_curso_falla(base):
+    with pytest.raises(ValueError, match="meses cerrados"):
+        ArchiveService(db).archivar(date.today(), backup_dir=None)
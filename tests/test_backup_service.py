@@ -0,0 +1,40 @@
+"""Rotación de backups: las copias periódicas no desplazan las de inicio y cierre."""
+
+import sqlite3
+
+from src import config
+from src.services.backup_service import PREFIJO_PERIODICO, BackupScheduler, perform_backup
+
+
+def _base(tmp_path):
+    path = tmp_path / "barberia.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t(x);")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_copias_seguidas_no_se_pisan(tmp_path):
+    db_path = _base(tmp_path)
+    destino = tmp_path / "backups"
+    copias = {perform_backup(db_path, destino) for _ in range(3)}
+    assert len(copias) == 3
+    assert all(p.exists() for p in copias)
+
+
+def test_periodicas_rotan_aparte(tmp_path):
+    db_path = _base(tmp_path)
+    destino = tmp_path / "backups"
+    sesion = [perform_backup(db_path, destino, keep=3) for _ in range(2)]
+    for _ in range(5):
+        perform_backup(db_path, destino, keep=2, prefijo=PREFIJO_PERIODICO)
+    assert all(p.exists() for p in sesion)
+    assert len(list(destino.glob(f"{PREFIJO_PERIODICO}_*.db"))) == 2
+    assert len(list(destino.glob("barberia_*.db"))) == 2
+
+
+def test_scheduler_usa_prefijo_y_retencion_propios():
+    scheduler = BackupScheduler(60)
+    assert scheduler.backup_kwargs["prefijo"] == PREFIJO_PERIODICO
+    assert scheduler.backup_kwargs["keep"] == config.BACKUP_PERIODICO_KEEP
@@ -0,0 +1,61 @@
+"""Línea de comandos: los comandos de lectura no migran y backup respeta --db."""
+
+import sqlite3
+
+import pytest
+
+from src import config
+from src.__main__ import main
+from src.database import MIGRATIONS, Database, db
+
+
+@pytest.fixture(autouse=True)
+def _restaurar_db(monkeypatch):
+    monkeypatch.setattr(config, "DB_PATH", config.DB_PATH)
+    monkeypatch.setattr(db, "db_path", db.db_path)
+    yield
+    db.close()
+
+
+def _base(path, hasta=None):
+    database = Database(path)
+    database.migrate(hasta)
+    database.close()
+    return path
+
+
+def _version(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA user_version;").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_lectura_no_migra_base_atrasada(tmp_path, capsys):
+    path = _base(tmp_path / "barberia.db", hasta=5)
+    assert main(["--db", str(path), "resumen"]) == 1
+    assert "migraciones" in capsys.readouterr().err
+    assert _version(path) == 5
+
+
+def test_lectura_en_base_al_dia(tmp_path, capsys):
+    path = _base(tmp_path / "barberia.db")
+    assert main(["--db", str(path), "resumen", "--json"]) == 0
+    assert '"totales"' in capsys.readouterr().out
+    assert _version(path) == MIGRATIONS[-1][0]
+
+
+def test_archivar_respalda_y_migra(tmp_path):
+    path = _base(tmp_path / "barberia.db", hasta=5)
+    assert main(["--db", str(path), "archivar", "--sin-compactar"]) == 0
+    assert _version(path) == MIGRATIONS[-1][0]
+    assert list((tmp_path / "backups").glob("premigracion_*.db"))
+
+
+def test_backup_junto_a_la_base_elegida(tmp_path, capsys):
+    path = _base(tmp_path / "barberia.db", hasta=5)
+    assert main(["--db", str(path), "backup"]) == 0
+    copia = capsys.readouterr().out.strip()
+    assert copia.startswith(str(tmp_path.resolve() / "backups"))
+    assert _version(path) == 5
@@ -0,0 +1,28 @@
+"""Exportación incremental de ExportService."""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from src.database import db
+from src.services.export_service import ExportService
+
+
+def test_incremental_no_admite_fechas(base, tmp_path):
+    with pytest.raises(ValueError, match="incremental"):
+        ExportService().exportar(
+            "cobros", "csv", tmp_path / "c.csv", desde=datetime(2025, 1, 1), incremental=True, estado_path=tmp_path / "e.json"
+        )
+    assert not (tmp_path / "e.json").exists()
+
+
+def test_incremental_exporta_solo_lo_nuevo(base, tmp_path):
+    servicio = ExportService(tamano_lote=50)
+    estado = tmp_path / "estado.json"
+    primera = servicio.exportar("citas", "jsonl", tmp_path / "1.jsonl", incremental=True, estado_path=estado)
+    total = db.conn.execute("SELECT COUNT(*), MAX(id) FROM appointments;").fetchone()
+    assert (primera["filas"], primera["ultimo_id"]) == tuple(total)
+    segunda = servicio.exportar("citas", "jsonl", tmp_path / "2.jsonl", incremental=True, estado_path=estado)
+    assert segunda["filas"] == 0
+    assert json.loads(estado.read_text(encoding="utf-8"))["citas"]["ultimo_id"] == total[1]
@@ -0,0 +1,51 @@
+"""Herramientas de mantenimiento: trabajan en su propia conexión y respaldan antes de migrar."""
+
+from src.database import MIGRATIONS, Database, db
+from src.services.backup_service import backup_before_migrations
+from src.services.maintenance_service import convert_amounts_to_pesos, rebuild_daily_totals
+
+
+def _base_v5(path):
+    database = Database(path)
+    database.migrate(hasta=5)
+    database.conn.execute("INSERT INTO barbers(name) VALUES('A');")
+    database.conn.execute(
+        "INSERT INTO appointments(barber_id, start_dt, end_dt, status, created_at) "
+        "VALUES(1, '2024-01-02T10:00:00', '2024-01-02T10:30:00', 'ATENDIDA', '2024-01-01T00:00:00');"
+    )
+    database.conn.execute(
+        "INSERT INTO payments(appointment_id, total_amount, barber_total, shop_total, payment_method, paid_at) "
+        "VALUES(1, 20000.4, 10000.2, 10000.2, 'Efectivo', '2024-01-02T10:31:00');"
+    )
+    database.close()
+
+
+def test_convert_amounts_solo_hasta_la_migracion_6(tmp_path):
+    path = tmp_path / "barberia.db"
+    _base_v5(path)
+    resultado = convert_amounts_to_pesos(path, tmp_path / "backups")
+    assert resultado["version"] == 6
+    assert resultado["despues"]["ventas"] == 20000
+    assert Database(path).schema_version() == 6
+
+
+def test_rebuild_daily_totals_no_cambia_la_base_global(tmp_path):
+    path = tmp_path / "barberia.db"
+    _base_v5(path)
+    antes = db.db_path
+    assert rebuild_daily_totals(path) == 1
+    assert db.db_path == antes
+    assert Database(path).schema_version() == MIGRATIONS[-1][0]
+
+
+def test_backup_antes_de_migrar(tmp_path):
+    path = tmp_path / "barberia.db"
+    _base_v5(path)
+    database = Database(path)
+    copia = backup_before_migrations(database, tmp_path / "backups")
+    assert copia is not None and copia.name.startswith("premigracion_")
+    assert Database(copia).schema_version() == 5
+    database.migrate()
+    assert backup_before_migrations(database, tmp_path / "backups") is None
+    database.close()
+    assert backup_before_migrations(Database(tmp_path / "nueva.db"), tmp_path / "backups") is None
@@ -0,0 +1,105 @@
+"""EXPLAIN QUERY PLAN de las consultas de repositories y ReportService: ninguna recorre
+completas las tablas grandes (citas, cobros y líneas de servicio)."""
+
+import re
+from datetime import datetime, time, timedelta
+
+import pytest
+
+from src import repositories
+from src.database import db
+from src.services.report_service import ReportService
+
+from .conftest import HASTA
+
+TABLAS_GRANDES = ("appointments", "payments", "appointment_service_lines")
+_ALIAS = re.compile(
+    r"\b(?:\w+\.)?(appointments|payments|appointment_service_lines)\b(?:\s+(?:AS\s+)?(?!(?:WHERE|JOIN|ON|LEFT|INNER|ORDER"
+    r"|GROUP|SET|LIMIT|UNION|VALUES)\b)(\w+))?",
+    re.IGNORECASE,
+)
+_SCAN = re.compile(r"^SCAN (\w+)")
+
+
+def _nombres_de_tablas_grandes(sql: str) -> set:
+    nombres = set()
+    for tabla, alias in _ALIAS.findall(sql):
+        nombres.add(tabla)
+        if alias:
+            nombres.add(alias)
+    if "v_agenda" in sql:
+        nombres.add("a")  # alias de appointments dentro de la vista
+    return nombres
+
+
+def _recorridos_completos(sql: str) -> list:
+    nombres = _nombres_de_tablas_grandes(sql)
+    plan = db.conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    malos = []
+    for fila in plan:
+        detalle = fila[3]
+        m = _SCAN.match(detalle)
+        if m and m.group(1) in nombres and "INDEX" not in detalle:
+            malos.append(detalle)
+    return malos
+
+
+def _capturar(llamada, cita: int) -> list:
+    """Sentencias (con parámetros expandidos) que ejecuta `llamada(cita)`."""
+    sentencias = []
+    db.conn.set_trace_callback(sentencias.append)
+    try:
+        llamada(cita)
+    finally:
+        db.conn.set_trace_callback(None)
+    return [
+        s for s in sentencias
+        if re.match(r"\s*(SELECT|WITH|UPDATE|DELETE|INSERT)\b", s, re.IGNORECASE) and not s.lstrip().startswith("--")
+    ]
+
+
+DIA = datetime.combine(HASTA - timedelta(days=20), time.min)
+FIN_DIA = datetime.combine(DIA.date(), time.max)
+MES = (DIA - timedelta(days=30), FIN_DIA)
+
+
+def _cita_cobrada():
+    return db.conn.execute("SELECT appointment_id FROM payments ORDER BY id DESC LIMIT 1;").fetchone()[0]
+
+
+LLAMADAS = [
+    ("list_appointments_by_range", lambda cita: repositories.list_appointments_by_range(DIA, FIN_DIA, 1, "ATENDIDA")),
+    ("list_appointments_by_range sin barbero", lambda cita: repositories.list_appointments_by_range(*MES)),
+    ("list_agenda_by_range", lambda cita: repositories.list_agenda_by_range(DIA, FIN_DIA, 1)),
+    ("list_agenda_by_range sin barbero", lambda cita: repositories.list_agenda_by_range(*MES)),
+    ("list_busy_intervals", lambda cita: repositories.list_busy_intervals(DIA, FIN_DIA, 1)),
+    ("list_busy_intervals sin barbero", lambda cita: repositories.list_busy_intervals(DIA, FIN_DIA)),
+    ("count_appointments_for_barber_and_date", lambda cita: repositories.count_appointments_for_barber_and_date(1, DIA.date().isoformat())),
+    ("appointment_dates_between", lambda cita: repositories.appointment_dates_between(1, MES[0].date(), MES[1].date())),
+    ("get_appointment", lambda cita: repositories.get_appointment(cita)),
+    ("has_overlap", lambda cita: repositories.has_overlap(1, DIA.replace(hour=10), DIA.replace(hour=11), exclude_id=5)),
+    ("list_payments_by_range", lambda cita: repositories.list_payments_by_range(*MES)),
+    ("get_payment_with_lines", lambda cita: repositories.get_payment_with_lines(cita)),
+    ("resumen", lambda cita: ReportService(cache=None).resumen(MES[0] + timedelta(hours=13), MES[1])),
+    ("resumen por barbero", lambda cita: ReportService(cache=None).resumen(*MES, barber_id=2)),
+    ("contar_pagos", lambda cita: ReportService(cache=None).contar_pagos(*MES, barber_id=1)),
+    ("iter_detalle_pagos", lambda cita: list(ReportService(cache=None).iter_detalle_pagos(*MES))),
+    # Escrituras al final: modifican la base del módulo
+    ("update_appointment_status", lambda cita: repositories.update_appointment_status(cita, "ATENDIDA")),
+    ("delete_payment", lambda cita: repositories.delete_payment(cita)),
+]
+
+
+@pytest.mark.parametrize("nombre,llamada", LLAMADAS, ids=[n for n, _ in LLAMADAS])
+def test_consultas_usan_indices(base, nombre, llamada):
+    sentencias = _capturar(llamada, _cita_cobrada())
+    assert sentencias, f"{nombre} no ejecutó consultas"
+    for sql in sentencias:
+        if not any(t in sql for t in TABLAS_GRANDES + ("v_agenda",)):
+            continue
+        assert _recorridos_completos(sql) == [], sql
+
+
+def test_detecta_recorrido_completo(base):
+    """Control: una consulta sin índice sí se reporta."""
+    assert _recorridos_completos("SELECT * FROM payments p WHERE p.payment_method = 'Efectivo'") != []
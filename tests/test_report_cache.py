@@ -0,0 +1,35 @@
+"""La caché de resúmenes se descarta con escrituras de otras conexiones o procesos."""
+
+import sqlite3
+from datetime import datetime, time, timedelta
+
+from src.database import db
+from src.services.report_service import ReportService, report_cache
+
+from .conftest import HASTA
+
+INICIO = datetime.combine(HASTA - timedelta(days=30), time.min)
+FIN = datetime.combine(HASTA, time.max)
+
+
+def test_reutiliza_sin_escrituras(base):
+    servicio = ReportService(cache=report_cache)
+    primero = servicio.resumen(INICIO, FIN)
+    assert servicio.resumen(INICIO, FIN) is primero
+
+
+def test_escritura_externa_invalida(base):
+    servicio = ReportService(cache=report_cache)
+    antes = servicio.resumen(INICIO, FIN)
+    externa = sqlite3.connect(str(db.db_path))
+    try:
+        with externa:
+            externa.execute(
+                "UPDATE payments SET payment_method = 'Externo' WHERE appointment_id = ?;",
+                (antes["pagos_detalle"][-1]["appointment_id"],),
+            )
+    finally:
+        externa.close()
+    despues = servicio.resumen(INICIO, FIN)
+    assert despues is not antes
+    assert despues["pagos_detalle"][-1]["metodo_pago"] == "Externo"
@@ -0,0 +1,120 @@
+"""ReportService.resumen contra una agregación en Python sobre los cobros crudos."""
+
+import random
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+import pytest
+
+from src.database import db
+from src.services.report_service import ReportService
+
+from .conftest import HASTA
+
+
+def _a_minuto(dt: datetime) -> datetime:
+    return dt.replace(second=0, microsecond=0)
+
+
+def _esperado(inicio: datetime, fin: datetime, barber_id):
+    pagos = db.conn.execute(
+        """
+        SELECT p.appointment_id, p.total_amount, p.barber_total, p.shop_total, p.payment_method, p.paid_at,
+               a.barber_id, b.name AS barber
+        FROM payments p
+        JOIN appointments a ON a.id = p.appointment_id
+        JOIN barbers b ON b.id = a.barber_id;
+        """
+    ).fetchall()
+    lineas = defaultdict(list)
+    for l in db.conn.execute(
+        "SELECT l.id, l.appointment_id, l.qty, s.name FROM appointment_service_lines l JOIN services s ON s.id = l.service_id ORDER BY l.id;"
+    ):
+        lineas[l["appointment_id"]].append((l["name"], l["qty"]))
+
+    totales = {"ventas": 0, "barberos": 0, "barberia": 0}
+    por_barbero = {}
+    por_dia = {}
+    detalle = []
+    for p in pagos:
+        pagado = datetime.fromisoformat(p["paid_at"])
+        if not (_a_minuto(inicio) <= _a_minuto(pagado) <= _a_minuto(fin)):
+            continue
+        if barber_id and p["barber_id"] != barber_id:
+            continue
+        totales["ventas"] += p["total_amount"]
+        totales["barberos"] += p["barber_total"]
+        totales["barberia"] += p["shop_total"]
+        b = por_barbero.setdefault(p["barber"], {"ventas": 0, "barbero": 0, "barberia": 0, "servicios": {}})
+        b["ventas"] += p["total_amount"]
+        b["barbero"] += p["barber_total"]
+        b["barberia"] += p["shop_total"]
+        d = por_dia.setdefault(pagado.date().isoformat(), {"ventas": 0, "barbero": 0, "barberia": 0})
+        d["ventas"] += p["total_amount"]
+        d["barbero"] += p["barber_total"]
+        d["barberia"] += p["shop_total"]
+        servicios = {}
+        for nombre, qty in lineas[p["appointment_id"]]:
+            servicios[nombre] = servicios.get(nombre, 0) + qty
+            b["servicios"][nombre] = b["servicios"].get(nombre, 0) + qty
+        detalle.append((
+            p["appointment_id"], p["barber"], p["total_amount"], pagado.date().isoformat(), pagado.strftime("%H:%M"),
+            p["payment_method"], ", ".join(f"{n} x{q}" for n, q in servicios.items()),
+        ))
+
+    citas = {"ATENDIDA": 0, "CANCELADA": 0, "NO ASISTIÓ": 0, "RESERVADA": 0}
+    for c in db.conn.execute("SELECT barber_id, start_dt, status FROM appointments;"):
+        inicio_cita = datetime.fromisoformat(c["start_dt"])
+        if _a_minuto(inicio) <= inicio_cita <= _a_minuto(fin) and (not barber_id or c["barber_id"] == barber_id):
+            citas[c["status"]] += 1
+    return {"totales": totales, "por_barbero": por_barbero, "por_dia": por_dia, "citas": citas, "detalle": sorted(detalle)}
+
+
+def _rangos():
+    rnd = random.Random(9)
+    dia = datetime.combine(HASTA - timedelta(days=45), time.min)
+    rangos = [
+        (dia, datetime.combine(dia.date(), time.max), None),  # un día completo
+        (dia + timedelta(hours=11, minutes=20), dia + timedelta(hours=16, minutes=45), None),  # dentro de un día
+        (dia + timedelta(hours=14), dia + timedelta(days=9, hours=12, minutes=59), 2),  # bordes parciales, con barbero
+        (dia - timedelta(days=200), datetime.combine(HASTA, time.max), None),  # muchos días completos
+        (dia - timedelta(days=400, hours=-10), dia + timedelta(days=3, hours=18), 1),
+    ]
+    for _ in range(10):
+        a = dia - timedelta(days=rnd.randint(0, 300), hours=rnd.randint(0, 23), minutes=rnd.choice([0, 15, 37]))
+        b = a + timedelta(days=rnd.randint(0, 60), hours=rnd.randint(0, 23), minutes=rnd.randint(0, 59))
+        rangos.append((a, b, rnd.choice([None, 1, 2, 3])))
+    return rangos
+
+
+@pytest.mark.parametrize("inicio,fin,barber_id", _rangos())
+def test_resumen_igual_a_agregacion_en_python(base, inicio, fin, barber_id):
+    data = ReportService(cache=None).resumen(inicio, fin, barber_id)
+    esperado = _esperado(inicio, fin, barber_id)
+    assert esperado["detalle"], "el rango de prueba debe tener cobros"
+    assert data["totales"] == esperado["totales"]
+    assert data["por_barbero"] == esperado["por_barbero"]
+    assert data["por_dia"] == esperado["por_dia"]
+    assert data["citas"] == esperado["citas"]
+    assert sorted(tuple(f) for f in data["pagos_detalle"]) == esperado["detalle"]
+
+
+def test_resumen_ordena_dias_y_detalle(base):
+    inicio = datetime.combine(HASTA - timedelta(days=30), time.min)
+    fin = datetime.combine(HASTA, time.max)
+    data = ReportService(cache=None).resumen(inicio, fin)
+    assert list(data["por_dia"]) == sorted(data["por_dia"])
+    claves = [(f["fecha"], f["hora"]) for f in data["pagos_detalle"]]
+    assert claves == sorted(claves)
+
+
+def test_resumen_sin_detalle_y_contar_pagos(base):
+    inicio = datetime.combine(HASTA - timedelta(days=60), time(12, 30))
+    fin = datetime.combine(HASTA - timedelta(days=10), time(15, 0))
+    servicio = ReportService(cache=None)
+    con_detalle = servicio.resumen(inicio, fin, 3)
+    sin_detalle = servicio.resumen(inicio, fin, 3, incluir_detalle=False)
+    assert sin_detalle["pagos_detalle"] == []
+    assert sin_detalle["totales"] == con_detalle["totales"]
+    assert servicio.contar_pagos(inicio, fin, 3) == len(con_detalle["pagos_detalle"])
+    assert list(servicio.iter_detalle_pagos(inicio, fin, 3, tamano_lote=7)) == con_detalle["pagos_detalle"]